@@ -0,0 +1,64 @@
+"""
+Shared bootstrap for the benchmark scripts.
+
+Each script is run from the ``Gatepass/`` directory, e.g.::
+
+    python benchmarks/bench_notify.py
+
+and works on a throwaway test database (created on entry, destroyed on exit),
+so it never touches real data.
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hostel_gatepass.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+# Fixtures are about the code under test, not PBKDF2
+settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+settings.STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+
+
+@contextmanager
+def test_database():
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def measure(fn, repeat=5):
+    """Run ``fn`` ``repeat`` times; return (best wall time in ms, queries of the last run)"""
+    best = None
+    queries = 0
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            fn()
+            elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+        queries = len(ctx.captured_queries)
+    return best, queries
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(v)) for v in column) for column in zip(headers, *rows)]
+    line = '  '.join(f'{{:>{w}}}' for w in widths)
+    print(line.format(*headers))
+    for row in rows:
+        print(line.format(*row))
@@ -0,0 +1,84 @@
+"""
+GatePass list API at scale: legacy unpaginated nested response vs keyset pages.
+
+Seeds --rows gatepasses and requests the list as a security user (who sees
+everything), reporting p50/p95 latency, queries and payload size.
+
+Usage (from the Gatepass/ directory):
+    python benchmarks/bench_api.py [--rows 50000] [--requests 50] [--skip-legacy]
+"""
+import argparse
+import statistics
+import time
+
+from _django import print_table, test_database
+
+from django.db import connection
+from rest_framework.generics import ListAPIView
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from bench_export import seed
+from gatepass.api_views import GatePassListCreateAPIView
+from gatepass.models import GatePass
+from gatepass.pagination import KeysetPagination
+from gatepass.serializers import GatePassSerializer
+from gatepass.testing import make_security
+
+
+class LegacyListView(ListAPIView):
+    """The list endpoint before pagination: every row, nested serializer, no select_related"""
+    serializer_class = GatePassSerializer
+    pagination_class = None
+
+    def get_queryset(self):
+        return GatePass.objects.all().order_by('-created_at')
+
+
+def run(view, user, params, count):
+    factory = APIRequestFactory()
+    timings = []
+    for _ in range(count):
+        request = factory.get('/api/gatepasses/', params)
+        force_authenticate(request, user=user)
+        queries = []
+        with connection.execute_wrapper(lambda execute, *a: queries.append(1) or execute(*a)):
+            started = time.perf_counter()
+            response = view(request)
+            response.render()
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    return statistics.median(timings), p95, len(queries), len(response.content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--skip-legacy', action='store_true')
+    args = parser.parse_args()
+
+    table = []
+    with test_database():
+        seed(args.rows)
+        security = make_security()
+        view = GatePassListCreateAPIView.as_view()
+        deep_row = GatePass.objects.order_by('-created_at', '-id')[args.rows * 9 // 10]
+        deep_cursor = KeysetPagination().encode_cursor(deep_row)
+
+        cases = [
+            ('page 1 (flat)', view, {}, args.requests),
+            ('page 1 (expand=student)', view, {'expand': 'student'}, args.requests),
+            ('page 1 (fields=id,status)', view, {'fields': 'id,status'}, args.requests),
+            ('page at 90% (cursor)', view, {'cursor': deep_cursor}, args.requests),
+        ]
+        if not args.skip_legacy:
+            cases.insert(0, ('legacy: all rows nested', LegacyListView.as_view(), {}, 1))
+        for label, case_view, params, count in cases:
+            p50, p95, queries, size = run(case_view, security, params, count)
+            table.append((label, f'{p50:.1f}', f'{p95:.1f}', queries, f'{size / 1024:,.1f}'))
+    print_table(('case', 'p50 ms', 'p95 ms', 'queries', 'KB'), table)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+Dashboards and approval API under many concurrent connections: WSGI vs ASGI.
+
+Seeds a throwaway SQLite database (or --database-url), then for each server
+(gunicorn sync workers serving ``hostel_gatepass.wsgi``; gunicorn uvicorn
+workers serving ``hostel_gatepass.asgi`` with the sync views, then with the
+async views of ``ASYNC_VIEWS``) with the same number of worker processes,
+holds --connections concurrent HTTP/1.1 connections against each endpoint for
+--duration seconds and reports throughput, p50/p95/p99 latency and errors.
+
+Sync workers close the connection after every response, so their clients
+reconnect; latencies include connecting and queueing either way.
+
+Usage (from the Gatepass/ directory; needs uvicorn):
+    python benchmarks/bench_asgi.py [--connections 500] [--duration 20] [--workers 2] [--rows 5000]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(BENCH_DIR)
+
+ASGI = ['hostel_gatepass.asgi:application', '-k', 'uvicorn.workers.UvicornWorker']
+
+# name: (gunicorn arguments, ASYNC_VIEWS)
+SERVERS = {
+    'wsgi (sync)': (['hostel_gatepass.wsgi:application'], 'False'),
+    'asgi (sync views)': (ASGI, 'False'),
+    'asgi (async views)': (ASGI, 'True'),
+}
+
+
+def seed(rows):
+    """Gatepasses in every state the dashboards show; returns (users, approvable gatepass ids)"""
+    from django.core.management import call_command
+    from django.test import Client
+
+    from bench_export import seed as seed_returned
+    from gatepass.models import GatePass
+    from gatepass.testing import make_security, make_warden
+    from rest_framework.authtoken.models import Token
+
+    call_command('migrate', verbosity=0)
+    seed_returned(rows)
+    security = make_security()
+    warden = make_warden('M')
+    ids = list(GatePass.objects.order_by('-id').values_list('id', flat=True)[:300])
+    GatePass.objects.filter(pk__in=ids[:50]).update(status='pending')
+    GatePass.objects.filter(pk__in=ids[50:100]).update(status='warden_approved', warden_approval=warden)
+    GatePass.objects.filter(pk__in=ids[100:300]).update(
+        status='security_approved', warden_approval=warden, security_approval=security)
+
+    sessions = {}
+    for user in (security, warden):
+        client = Client()
+        client.force_login(user)
+        sessions[user.role] = client.cookies['sessionid'].value
+    return sessions, Token.objects.create(user=security).key, ids[100:300]
+
+
+def build_cases(port, sessions, token, approvable):
+    def request(method, path, header):
+        return (f"{method} {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n{header}\r\n"
+                "Content-Length: 0\r\n\r\n").encode()
+
+    return [
+        ('security dashboard', [request('GET', '/security/dashboard/', f"Cookie: sessionid={sessions['security']}")]),
+        ('warden dashboard', [request('GET', '/warden/dashboard/', f"Cookie: sessionid={sessions['warden']}")]),
+        ('security approve API', [
+            request('POST', f'/api/gatepasses/{pk}/security-approve/', f'Authorization: Token {token}')
+            for pk in approvable
+        ]),
+    ]
+
+
+async def read_response(reader):
+    """Read one response; return (status, keep_alive)"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = dict(line.lower().split(': ', 1) for line in lines[1:] if ': ' in line)
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.read()
+        return status, False
+    return status, headers.get('connection') != 'close'
+
+
+async def connection(port, requests, offset, deadline, latencies, errors):
+    writer = None
+    n = offset
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(requests[n % len(requests)])
+            n += 1
+            status, keep_alive = await asyncio.wait_for(read_response(reader), 60)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError) as exc:
+            errors[type(exc).__name__] += 1
+            if writer is not None:
+                writer.close()
+            writer = None
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+        if status >= 400:
+            errors[f'HTTP {status}'] += 1
+        if not keep_alive:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def load(port, requests, connections, duration):
+    latencies, errors = [], Counter()
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*[
+        connection(port, requests, n, deadline, latencies, errors) for n in range(connections)
+    ])
+    return latencies, errors, time.perf_counter() - started
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))] if values else float('nan')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, env, workers, port):
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', *args, '-w', str(workers), '-b', f'127.0.0.1:{port}',
+         '--backlog', '2048', '--timeout', '120', '--log-level', 'critical'],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'{args[0]} did not start')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--connections', type=int, default=500)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--database-url', help='an empty database to use instead of a temporary SQLite file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'server_settings',
+            'DATABASE_URL': args.database_url or f'sqlite:///{tmp}/bench.sqlite3',
+            'PYTHONPATH': os.pathsep.join([BENCH_DIR, BASE_DIR, os.environ.get('PYTHONPATH', '')]),
+            # No collectstatic: keep whitenoise's missing STATIC_ROOT warning out of the report
+            'PYTHONWARNINGS': 'ignore::UserWarning',
+        }
+        env.pop('ASYNC_VIEWS', None)
+        os.environ.update(env)
+        from _django import print_table
+
+        sessions, token, approvable = seed(args.rows)
+
+        table = []
+        for server, (server_args, async_views) in SERVERS.items():
+            port = free_port()
+            process = start_server(server_args, {**env, 'ASYNC_VIEWS': async_views}, args.workers, port)
+            try:
+                for case, requests in build_cases(port, sessions, token, approvable):
+                    asyncio.run(load(port, requests, 10, 1))  # warm up
+                    latencies, errors, elapsed = asyncio.run(load(port, requests, args.connections, args.duration))
+                    latencies.sort()
+                    table.append((
+                        server, case, len(latencies), f'{len(latencies) / elapsed:.1f}',
+                        f'{percentile(latencies, 0.5):.0f}', f'{percentile(latencies, 0.95):.0f}',
+                        f'{percentile(latencies, 0.99):.0f}',
+                        ', '.join(f'{name} x{count}' for name, count in errors.most_common()) or '-',
+                    ))
+            finally:
+                process.terminate()
+                process.wait()
+    print(f'{args.connections} connections, {args.duration:g}s per case, {args.workers} workers, {os.cpu_count()} CPUs')
+    print_table(('server', 'case', 'requests', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'errors'), table)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Festival-weekend approvals: N single warden approvals vs one bulk call.
+
+Both go through the warden's pages: a POST to ``warden_approve_gatepass``
+per pass vs one POST of every ID to ``warden_bulk_decision``. Each
+approval notifies the student and all --security guards.
+
+Usage (from the Gatepass/ directory):
+    python benchmarks/bench_bulk.py [--passes 500] [--security 5]
+"""
+import argparse
+
+from _django import measure, print_table, test_database
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.test import Client
+
+from gatepass.models import GatePass, Notification
+from gatepass.testing import make_gatepass, make_security, make_student, make_warden
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--passes', type=int, default=500)
+    parser.add_argument('--security', type=int, default=5)
+    args = parser.parse_args()
+
+    with test_database():
+        cache.clear()
+        warden = make_warden('M')
+        for _ in range(args.security):
+            make_security()
+        students = [make_student('M') for _ in range(50)]
+        client = Client()
+        client.force_login(warden)
+
+        def pending():
+            return [make_gatepass(students[n % len(students)]).pk for n in range(args.passes)]
+
+        def single(ids):
+            for pk in ids:
+                client.post(reverse('warden_approve_gatepass', args=[pk]),
+                            {'action': 'approve', 'parent_verification': 'on'})
+
+        def bulk(ids):
+            client.post(reverse('warden_bulk_decision'), {'ids': ids, 'action': 'approve', 'parent_verification': 'on'})
+
+        rows = []
+        for label, approve in [(f'{args.passes} single calls', single), ('1 bulk call', bulk)]:
+            ids = pending()
+            notifications = Notification.objects.count()
+            ms, queries = measure(lambda: approve(ids), repeat=1)
+            assert GatePass.objects.filter(pk__in=ids, status='warden_approved').count() == len(ids)
+            rows.append((label, f'{ms:.0f}', queries, Notification.objects.count() - notifications))
+    print_table(('case', 'ms', 'queries', 'notifications'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+Peak memory of the outings Excel export: in-memory workbook (legacy) vs streaming.
+
+Each (mode, rows) pair runs in a fresh subprocess that seeds its own test
+database and reports how much the export raised the process's peak RSS.
+
+Usage (from the Gatepass/ directory):
+    python benchmarks/bench_export.py [--rows 5000 20000 50000]
+"""
+import argparse
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import date, time as dtime, timedelta
+
+import openpyxl
+from openpyxl.utils import get_column_letter
+
+
+def reset_peak_rss():
+    """Reset VmHWM to the current RSS (Linux >= 4.0); elsewhere the lifetime peak is used"""
+    gc.collect()
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except OSError:
+        return peak_rss_mb()
+
+
+def seed(rows):
+    from gatepass.models import GatePass, Student, User
+
+    students = max(rows // 20, 1)
+    users = User.objects.bulk_create([
+        User(username=f'bench_{n}', role='student', gender='M', is_approved=True, password='!')
+        for n in range(students)
+    ])
+    students = Student.objects.bulk_create([
+        Student(user=user, hall_ticket_no=f'HT{n:08d}', student_name=f'Student {n}', room_no=f'R{n % 500}',
+                parent_name=f'Parent {n}', parent_mobile=f'9{n:09d}')
+        for n, user in enumerate(users)
+    ])
+    start = date.today() - timedelta(days=365)
+    GatePass.objects.bulk_create((
+        GatePass(student=students[n % len(students)], outing_date=start + timedelta(days=n % 365),
+                 outing_time=dtime(10, 0), expected_return_date=start + timedelta(days=n % 365 + 1),
+                 expected_return_time=dtime(18, 0), purpose='Home visit for the weekend', status='returned')
+        for n in range(rows)
+    ), batch_size=2000)
+
+
+def legacy_export(filters, out):
+    """The pre-streaming implementation: full workbook in memory plus a full column rescan"""
+    from gatepass.exports import outing_queryset
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Student Name", "Hall Ticket No", "Outing Date", "Outing Time", "Expected Return Date",
+               "Expected Return Time", "Status", "Purpose", "Warden Approved By", "Security Approved By"])
+    qs = outing_queryset(filters).select_related(
+        'student', 'student__user', 'warden_approval', 'security_approval'
+    ).order_by('-outing_date', '-outing_time')
+    for gp in qs:
+        ws.append([
+            gp.student.student_name, gp.student.hall_ticket_no, gp.outing_date.strftime('%Y-%m-%d'),
+            gp.outing_time.strftime('%H:%M'), gp.expected_return_date.strftime('%Y-%m-%d'),
+            gp.expected_return_time.strftime('%H:%M'), gp.get_status_display(), gp.purpose,
+            gp.warden_approval.username if gp.warden_approval else "",
+            gp.security_approval.username if gp.security_approval else "",
+        ])
+    for column_cells in ws.columns:
+        length = max(len(str(cell.value)) if cell.value is not None else 0 for cell in column_cells)
+        ws.column_dimensions[get_column_letter(column_cells[0].column)].width = max(length + 2, 12)
+    wb.save(out)
+
+
+def streaming_export(filters, out):
+    from gatepass.exporters import get_exporter
+    from gatepass.exports import export_response, outing_sheets
+
+    response = export_response(get_exporter('xlsx'), outing_sheets(filters), 'bench.xlsx')
+    for chunk in response.streaming_content:
+        out.write(chunk)
+    response.close()
+
+
+def child(mode, rows):
+    from _django import test_database
+
+    with test_database():
+        seed(rows)
+        reset_peak_rss()
+        before = current_rss_mb()
+        started = time.perf_counter()
+        with open(os.devnull, 'wb') as out:
+            (legacy_export if mode == 'legacy' else streaming_export)({}, out)
+        elapsed = time.perf_counter() - started
+        print(json.dumps({'rss_growth_mb': peak_rss_mb() - before, 'seconds': elapsed}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=[5000, 20000, 50000])
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'ROWS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], int(args.child[1]))
+        return
+
+    from _django import print_table
+
+    table = []
+    for rows in args.rows:
+        results = {}
+        for mode in ('legacy', 'streaming'):
+            output = subprocess.run(
+                [sys.executable, __file__, '--child', mode, str(rows)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+        table.append((
+            rows,
+            f"{results['legacy']['rss_growth_mb']:.1f}", f"{results['legacy']['seconds']:.2f}",
+            f"{results['streaming']['rss_growth_mb']:.1f}", f"{results['streaming']['seconds']:.2f}",
+        ))
+    print_table(('rows', 'legacy MB', 'legacy s', 'streaming MB', 'streaming s'), table)
+
+
+if __name__ == '__main__':
+    main()
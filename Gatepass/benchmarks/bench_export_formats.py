@@ -0,0 +1,48 @@
+"""
+Outings export throughput and file size per format (xlsx, csv, parquet/colgz).
+
+Usage (from the Gatepass/ directory):
+    python benchmarks/bench_export_formats.py [--rows 100000] [--formats xlsx csv colgz parquet]
+"""
+import argparse
+import tempfile
+import time
+
+from _django import print_table, test_database
+
+from bench_export import seed
+from gatepass.exporters import EXPORTERS
+from gatepass.exports import outing_sheets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--formats', nargs='+', default=[name for name in EXPORTERS if name != 'columnar'])
+    args = parser.parse_args()
+
+    table = []
+    with test_database():
+        seed(args.rows)
+        for name in args.formats:
+            exporter = EXPORTERS.get(name)
+            if exporter is None:
+                print(f'skipping {name}: not available (is pyarrow installed?)')
+                continue
+            with tempfile.TemporaryFile() as f:
+                started = time.perf_counter()
+                exporter.write(outing_sheets({}), f)
+                elapsed = time.perf_counter() - started
+                size = f.tell()
+            table.append((
+                name,
+                f'{elapsed:.2f}',
+                f'{args.rows / elapsed:,.0f}',
+                f'{size / 1024 / 1024:.2f}',
+                f'{size / args.rows:.1f}',
+            ))
+    print_table(('format', 'seconds', 'rows/s', 'MB', 'bytes/row'), table)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Warden approval fan-out: per-recipient ``Notification.objects.create`` vs ``notify_many``.
+
+Usage (from the Gatepass/ directory):
+    python benchmarks/bench_notify.py [--sizes 1 10 30 100 300] [--repeat 5]
+"""
+import argparse
+
+from _django import measure, print_table, test_database
+
+from django.core.cache import cache
+
+from gatepass.models import Notification, User
+from gatepass.notifications import notify_many, security_recipients
+from gatepass.testing import make_gatepass, make_security, make_student
+
+
+def legacy_fan_out(gatepass):
+    for security in User.objects.filter(role='security'):
+        Notification.objects.create(
+            user=security,
+            gatepass=gatepass,
+            notification_type='warden_approval',
+            message=f"Gatepass approved by warden for {gatepass.student.student_name}"
+        )
+
+
+def bulk_fan_out(gatepass):
+    notify_many(
+        security_recipients(),
+        gatepass,
+        'warden_approval',
+        f"Gatepass approved by warden for {gatepass.student.student_name}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 30, 100, 300])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    with test_database():
+        cache.clear()
+        gatepass = make_gatepass(make_student('M'), status='warden_approved')
+        headcount = 0
+        for size in sorted(args.sizes):
+            while headcount < size:
+                make_security()
+                headcount += 1
+            legacy_ms, legacy_queries = measure(lambda: legacy_fan_out(gatepass), args.repeat)
+            bulk_ms, bulk_queries = measure(lambda: bulk_fan_out(gatepass), args.repeat)
+            rows.append((
+                size,
+                f'{legacy_ms:.1f}', legacy_queries,
+                f'{bulk_ms:.1f}', bulk_queries,
+                f'{legacy_ms / bulk_ms:.1f}x',
+            ))
+    print_table(('security', 'legacy ms', 'queries', 'notify_many ms', 'queries', 'speedup'), rows)
+
+
+if __name__ == '__main__':
+    main()
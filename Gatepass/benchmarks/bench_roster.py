@@ -0,0 +1,86 @@
+"""
+"Who is out": gatepass history scans vs the out roster, as history grows.
+
+For each history size, --out passes are security_approved and everything
+else is returned. Times the warden's Students Out tab (count + latest 10),
+the superadmin's overdue list and the export's Students Out sheet, read
+the old way (filtering GatePass) and from ``OutRosterEntry``.
+
+Usage (from the Gatepass/ directory):
+    python benchmarks/bench_roster.py [--history 10000 100000] [--out 300]
+"""
+import argparse
+from datetime import timedelta
+
+from _django import measure, print_table, test_database
+from bench_export import seed
+
+from django.db.models import Count, Window
+from django.utils import timezone
+
+from gatepass import roster
+from gatepass.exports import _students_out_rows
+from gatepass.models import GatePass, OutRosterEntry
+
+
+def history_students_out():
+    out = GatePass.objects.filter(status='security_approved', student__user__gender__iexact='M')
+    return out.count(), list(out.select_related('student').order_by('-created_at')[:10])
+
+
+def roster_students_out():
+    return list(
+        OutRosterEntry.objects.filter(gender='M').annotate(total_out=Window(expression=Count('pk')))
+        .select_related('gatepass__student').order_by('-left_at', '-gatepass_id')[:10]
+    )
+
+
+def history_overdue():
+    return list(GatePass.objects.filter(
+        status='security_approved', expected_return_date__lt=timezone.localdate(),
+    ).select_related('student').order_by('expected_return_date'))
+
+
+def roster_overdue():
+    return list(GatePass.objects.filter(
+        roster_entry__expected_return_date__lt=timezone.localdate(),
+    ).select_related('student').order_by('roster_entry__expected_return_date'))
+
+
+def history_sheet():
+    return list(GatePass.objects.filter(status='security_approved').order_by('-outing_date', '-outing_time').values_list(
+        'student__student_name', 'student__hall_ticket_no', 'outing_date', 'outing_time', 'expected_return_date',
+        'expected_return_time', 'purpose', 'warden_approval__username', 'security_approval__username',
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--history', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--out', type=int, default=300)
+    args = parser.parse_args()
+
+    rows = []
+    for history in args.history:
+        with test_database():
+            seed(history)
+            out = list(GatePass.objects.order_by('-id').values_list('pk', flat=True)[:args.out])
+            GatePass.objects.filter(pk__in=out[::2]).update(status='security_approved')
+            GatePass.objects.filter(pk__in=out[1::2]).update(
+                status='security_approved', expected_return_date=timezone.localdate() + timedelta(days=2),
+            )
+            roster.reconcile()
+            cases = [
+                ('students out tab', history_students_out, roster_students_out),
+                ('overdue list', history_overdue, roster_overdue),
+                ('students out sheet', history_sheet, lambda: list(_students_out_rows())),
+            ]
+            for label, old, new in cases:
+                old_ms, _ = measure(old)
+                new_ms, _ = measure(new)
+                rows.append((history, label, f'{old_ms:.1f}', f'{new_ms:.1f}'))
+    print_table(('history', 'reader', 'history ms', 'roster ms'), rows)
+
+
+if __name__ == '__main__':
+    main()
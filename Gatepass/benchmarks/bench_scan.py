@@ -0,0 +1,107 @@
+"""
+Gate queue: server time per pass, scanning QR codes vs the dashboard flow.
+
+The dashboard flow is what a guard does without a scanner: load
+``security_dashboard`` to find the pass, open ``security_approve_gatepass``
+and confirm. The scan flow is one token-authenticated POST of the code to
+``/api/gate/scan/`` (exit), and the same again on return. An offline
+terminal uploads all of its exits (then all returns) to ``/api/gate/events/``
+in one request; its per-pass figures are the batch's divided by --passes.
+
+Usage (from the Gatepass/ directory):
+    python benchmarks/bench_scan.py [--passes 300] [--history 2000]
+"""
+import argparse
+import statistics
+import time
+
+from _django import print_table, test_database
+
+from django.core.cache import cache
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from gatepass.models import GatePass
+from gatepass.scan import scan_code
+from gatepass.testing import make_gatepass, make_security, make_student
+
+
+SCAN_STATUS = {'exit': 'security_approved', 'return': 'returned'}
+
+
+def timed(calls):
+    """Run every call; return (p50 ms, p95 ms, queries per call)"""
+    times, queries = [], 0
+    for call in calls:
+        reset_queries()  # the log is capped; a full one captures nothing
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = call()
+            times.append((time.perf_counter() - started) * 1000)
+        assert response.status_code in (200, 302), response.status_code
+        queries += len(ctx.captured_queries)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.95) - 1], queries / len(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--passes', type=int, default=300)
+    parser.add_argument('--history', type=int, default=2000, help='returned passes already in the table')
+    args = parser.parse_args()
+
+    with test_database():
+        cache.clear()
+        guard = make_security()
+        students = [make_student('M') for _ in range(50)]
+        for n in range(args.history):
+            make_gatepass(students[n % len(students)], status='returned')
+
+        def queue():
+            return [make_gatepass(students[n % len(students)], status='warden_approved')
+                    for n in range(args.passes)]
+
+        browser = Client()
+        browser.force_login(guard)
+
+        def page_flow(gatepass):
+            url = reverse('security_approve_gatepass', args=[gatepass.pk])
+            browser.get(reverse('security_dashboard'))
+            browser.get(url)
+            return browser.post(url)
+
+        scanner = Client(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=guard).key}')
+
+        def scan(gatepass):
+            return scanner.post(reverse('api_gate_scan'), {'code': scan_code(gatepass)},
+                                content_type='application/json')
+
+        rows = []
+        passes = queue()
+        p50, p95, queries = timed([lambda g=g: page_flow(g) for g in passes])
+        rows.append(('dashboard + approve page', 'exit', f'{p50:.1f}', f'{p95:.1f}', f'{queries:.0f}'))
+        passes = queue()
+        for label in ('exit', 'return'):
+            p50, p95, queries = timed([lambda g=g: scan(g) for g in passes])
+            rows.append(('scan', label, f'{p50:.1f}', f'{p95:.1f}', f'{queries:.0f}'))
+
+        def upload(events):
+            return scanner.post(reverse('api_gate_events'), {'events': events}, content_type='application/json')
+
+        passes = queue()
+        for label in ('exit', 'return'):
+            at = timezone.now().isoformat()
+            events = [{'id': f'{label}-{g.pk}', 'gatepass': g.pk, 'type': label, 'at': at} for g in passes]
+            ms, _, queries = timed([lambda: upload(events)])
+            assert GatePass.objects.filter(pk__in=[g.pk for g in passes], status=SCAN_STATUS[label]).count() == len(passes)
+            per_pass = ms / len(passes)
+            rows.append(('offline batch', label, f'{per_pass:.2f}', '-', f'{queries / len(passes):.2f}'))
+    print_table(('flow', 'step', 'p50 ms', 'p95 ms', 'queries'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,12 @@
+"""
+Settings for the server started by ``load_test.py``.
+
+``server_settings`` plus ``LoadStatsMiddleware``, which tells the harness
+how many queries each request ran and how big the worker is, and with the
+project's password hashers: logins are among the costs being measured, and
+``generate_sample_data`` hashes each role's password only once.
+"""
+from server_settings import *  # noqa: F401,F403
+from hostel_gatepass.settings import PASSWORD_HASHERS  # noqa: F401,E402
+
+MIDDLEWARE = ['load_stats.LoadStatsMiddleware', *MIDDLEWARE]  # noqa: F405
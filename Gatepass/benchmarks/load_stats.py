@@ -0,0 +1,43 @@
+"""
+Per-request statistics for ``load_test.py``, as response headers.
+
+``X-Load-Queries`` counts the statements run while the view, the template
+and the other middleware handled the request (``DEBUG`` is off, so there is
+no query log to read); ``X-Load-RSS`` is the worker's resident set in KiB
+once the response was built. Queries run while a streaming response is
+iterated (the Excel exports) are not counted.
+"""
+import os
+
+from django.db import connection
+
+_PAGE_KIB = os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+def rss_kib(pid='self'):
+    """Resident set size of ``pid`` in KiB (Linux), 0 if it is gone"""
+    try:
+        with open(f'/proc/{pid}/statm') as statm:
+            return int(statm.read().split()[1]) * _PAGE_KIB
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+class LoadStatsMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            response = self.get_response(request)
+        response['X-Load-Queries'] = str(queries)
+        response['X-Load-RSS'] = str(rss_kib())
+        return response
@@ -0,0 +1,505 @@
+"""
+Multi-role load test: student, warden and guard journeys against gunicorn.
+
+Seeds a throwaway SQLite database (or --database-url) with
+``generate_sample_data``, queues --burst pending requests and --rush students
+already out, starts gunicorn sync workers (``load_settings``) and runs each
+phase for --duration seconds with --users virtual users:
+
+- morning: the approval burst. Wardens open the dashboard and the approval
+  page and approve; guards let approved students out by QR scan; students
+  check their dashboard, request passes and sync the app.
+- evening: the return rush. Guards record returns, by scan or through the
+  dashboard and return form; students poll; wardens watch the Students Out
+  tab and export the day's outings.
+
+Every virtual user logs in first, through the login form or the API. For
+each phase and endpoint it reports requests, p50/p95/p99 latency, DB
+queries per request (mean and max) and the largest worker RSS seen, plus
+the peak RSS of the whole server. 409s (another guard or warden got there
+first) are conflicts, not errors. --output writes the report as JSON;
+--compare prints the change against an earlier one.
+
+Usage (from the Gatepass/ directory):
+    python benchmarks/load_test.py [--users 60] [--duration 30] [--workers 2] [--students 2000] [--seed 1]
+        [--output baseline.json] [--compare old.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict, deque
+from datetime import datetime, time as clock
+from io import StringIO
+from urllib.parse import urlencode
+
+from bench_asgi import BASE_DIR, BENCH_DIR, free_port, percentile, start_server
+from load_stats import rss_kib
+
+# As set by generate_sample_data
+PASSWORDS = {'student': 'Student@123', 'warden': 'Warden@123', 'security': 'Security@123'}
+
+# Share of the virtual users per role
+PHASES = {
+    'morning': {'student': 0.6, 'warden': 0.25, 'security': 0.15},
+    'evening': {'student': 0.55, 'warden': 0.1, 'security': 0.35},
+}
+
+
+def stage(burst, rush):
+    """Pending requests and students out on top of the sample data; returns the work queues"""
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+
+    from gatepass import roster
+    from gatepass.models import GatePass, Student
+    from gatepass.scan import scan_code
+
+    User = get_user_model()
+    today = timezone.localdate()
+    students = list(Student.objects.select_related('user').order_by('?')[:burst + rush])
+    students = [students[n % len(students)] for n in range(burst + rush)]
+    guard = User.objects.filter(role='security').first()
+    wardens = {user.gender: user for user in User.objects.filter(role='warden')}
+    passes = GatePass.objects.bulk_create([
+        GatePass(
+            student=student, outing_date=today, outing_time=clock(9), expected_return_date=today,
+            expected_return_time=clock(20), purpose='Load test', parent_verification=True,
+            **({'status': 'pending'} if n < burst else {
+                'status': 'security_approved', 'security_approval': guard,
+                'warden_approval': wardens.get(student.user.gender),
+            }),
+        )
+        for n, student in enumerate(students)
+    ])
+    roster.reconcile()
+
+    queues = {'pending M': deque(), 'pending F': deque(), 'leaving': deque(), 'out': deque()}
+    for gatepass in passes:
+        key = f'pending {gatepass.student.user.gender}' if gatepass.status == 'pending' else 'out'
+        queues[key].append((gatepass.pk, scan_code(gatepass)))
+    return queues
+
+
+def accounts():
+    """Usernames by role, and the gender of each warden"""
+    from django.contrib.auth import get_user_model
+
+    users = defaultdict(list)
+    genders = {}
+    for username, role, gender in get_user_model().objects.filter(
+        role__in=PASSWORDS, is_approved=True,
+    ).order_by('?').values_list('username', 'role', 'gender'):
+        users[role].append(username)
+        genders[username] = gender
+    return users, genders
+
+
+class Stats:
+    """Samples per endpoint: (ms, queries, worker RSS) and what went wrong"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(Counter)
+        self.conflicts = Counter()
+
+    def record(self, name, status, ms, queries, rss):
+        self.samples[name].append((ms, queries, rss))
+        if status == 409:
+            self.conflicts[name] += 1
+        elif status >= 400:
+            self.errors[name][f'HTTP {status}'] += 1
+
+    def report(self, elapsed):
+        endpoints = {}
+        for name, samples in sorted(self.samples.items()):
+            latencies = sorted(ms for ms, _, _ in samples)
+            queries = [count for _, count, _ in samples]
+            endpoints[name] = {
+                'requests': len(samples),
+                'rps': round(len(samples) / elapsed, 2),
+                'p50_ms': round(percentile(latencies, 0.5), 1),
+                'p95_ms': round(percentile(latencies, 0.95), 1),
+                'p99_ms': round(percentile(latencies, 0.99), 1),
+                'queries_mean': round(sum(queries) / len(queries), 1),
+                'queries_max': max(queries),
+                'rss_kib_max': max(rss for _, _, rss in samples),
+                'conflicts': self.conflicts[name],
+                'errors': dict(self.errors[name]),
+            }
+        for name, errors in self.errors.items():
+            if name not in endpoints:
+                endpoints[name] = {'requests': 0, 'errors': dict(errors)}
+        return endpoints
+
+
+async def read_response(reader):
+    """Read one response; return (status, headers, cookies, body, keep_alive)"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers, cookies = {}, {}
+    for line in lines[1:]:
+        if ': ' not in line:
+            continue
+        key, value = line.split(': ', 1)
+        if key.lower() == 'set-cookie':
+            name, _, value = value.split(';', 1)[0].partition('=')
+            cookies[name] = value
+        headers[key.lower()] = value
+    if 'content-length' in headers:
+        body = await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        chunks = []
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            chunks.append((await reader.readexactly(size + 2))[:-2])
+            if size == 0:
+                break
+        body = b''.join(chunks)
+    else:
+        return status, headers, cookies, await reader.read(), False
+    return status, headers, cookies, body, headers.get('connection') != 'close'
+
+
+class Session:
+    """One client: its cookies (browser) or token (app) and connection"""
+
+    def __init__(self, port, stats):
+        self.port = port
+        self.stats = stats
+        self.cookies = {}
+        self.token = None
+        self.reader = self.writer = None
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def request(self, name, method, path, form=None, data=None):
+        """Send a request and record it under ``name``; returns (status, body), or None if it failed"""
+        headers = [f'Host: 127.0.0.1:{self.port}']
+        body = b''
+        if form is not None:
+            body = urlencode(form).encode()
+            headers.append('Content-Type: application/x-www-form-urlencoded')
+        elif data is not None:
+            body = json.dumps(data).encode()
+            headers.append('Content-Type: application/json')
+        if self.cookies:
+            headers.append('Cookie: ' + '; '.join(f'{key}={value}' for key, value in self.cookies.items()))
+            if method != 'GET' and 'csrftoken' in self.cookies:
+                headers.append(f"X-CSRFToken: {self.cookies['csrftoken']}")
+        if self.token:
+            headers.append(f'Authorization: Token {self.token}')
+        message = (f'{method} {path} HTTP/1.1\r\n' + '\r\n'.join(headers)
+                   + f'\r\nContent-Length: {len(body)}\r\n\r\n').encode() + body
+
+        started = time.perf_counter()
+        try:
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection('127.0.0.1', self.port)
+            self.writer.write(message)
+            status, headers, cookies, body, keep_alive = await asyncio.wait_for(read_response(self.reader), 120)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError) as exc:
+            self.stats.errors[name][type(exc).__name__] += 1
+            self.close()
+            return None
+        self.stats.record(
+            name, status, (time.perf_counter() - started) * 1000,
+            int(headers.get('x-load-queries', 0)), int(headers.get('x-load-rss', 0)),
+        )
+        self.cookies.update(cookies)
+        if not keep_alive:
+            self.close()
+        return status, body
+
+    async def login(self, username, password):
+        await self.request('login page', 'GET', '/login/')
+        response = await self.request('login', 'POST', '/login/', form={'username': username, 'password': password})
+        return bool(response) and response[0] == 302 and 'sessionid' in self.cookies
+
+    async def api_login(self, username, password):
+        response = await self.request('API login', 'POST', '/api/login/', data={'username': username, 'password': password})
+        if response and response[0] == 200:
+            self.token = json.loads(response[1])['token']
+        return self.token is not None
+
+
+def now_fields(prefix):
+    """The current local time as the hour/minute/AM-PM fields of the forms"""
+    from django.utils import timezone
+
+    now = timezone.localtime()
+    return {
+        f'{prefix}_hour': now.hour % 12 or 12, f'{prefix}_minute': now.minute // 5 * 5,
+        f'{prefix}_ampm': 'PM' if now.hour >= 12 else 'AM',
+    }
+
+
+async def student(port, stats, username, queues, phase, deadline, think):
+    from django.utils import timezone
+
+    web, app = Session(port, stats), Session(port, stats)
+    if not (await web.login(username, PASSWORDS['student']) and await app.api_login(username, PASSWORDS['student'])):
+        return
+    since = None
+    while time.perf_counter() < deadline:
+        await web.request('student dashboard', 'GET', '/student/dashboard/')
+        if phase == 'morning' and random.random() < 0.3:
+            today = timezone.localdate().isoformat()
+            await web.request('create gatepass page', 'GET', '/student/gatepass/create/')
+            await web.request('create gatepass', 'POST', '/student/gatepass/create/', form={
+                'outing_date': today, 'expected_return_date': today, 'purpose': 'Load test',
+                'outing_hour': 10, 'outing_minute': 0, 'outing_ampm': 'AM',
+                'expected_return_hour': 6, 'expected_return_minute': 0, 'expected_return_ampm': 'PM',
+            })
+        await asyncio.sleep(random.uniform(0, think))
+        response = await app.request(
+            'API changes', 'GET', '/api/gatepasses/changes/' + (f'?since={since}' if since else ''),
+        )
+        if response and response[0] == 200:
+            since = json.loads(response[1])['next']
+        await app.request('API gatepass list', 'GET', '/api/gatepasses/')
+        await asyncio.sleep(random.uniform(0, think))
+    web.close()
+    app.close()
+
+
+async def warden(port, stats, username, gender, queues, phase, deadline, think):
+    from django.utils import timezone
+
+    web = Session(port, stats)
+    if not await web.login(username, PASSWORDS['warden']):
+        return
+    pending = queues.get(f'pending {gender}', deque())
+    rounds = 0
+    while time.perf_counter() < deadline:
+        await web.request('warden dashboard', 'GET', '/warden/dashboard/')
+        if phase == 'morning' and pending:
+            pk, code = pending.popleft()
+            path = f'/warden/gatepass/{pk}/approve/'
+            await web.request('warden approve page', 'GET', path)
+            await asyncio.sleep(random.uniform(0, think))
+            response = await web.request('warden approve', 'POST', path, form={'action': 'approve', 'parent_verification': 'on'})
+            if response and response[0] == 302:
+                queues['leaving'].append((pk, code))
+        elif phase == 'evening':
+            await web.request('warden students out', 'GET', '/warden/dashboard/?status_filter=security_approved')
+            rounds += 1
+            if rounds % 5 == 0:
+                today = timezone.localdate().isoformat()
+                await web.request('export outings', 'GET', f'/export/outings/?from_date={today}&to_date={today}')
+        await asyncio.sleep(random.uniform(0, think))
+    web.close()
+
+
+async def guard(port, stats, username, queues, phase, deadline, think):
+    from django.utils import timezone
+
+    web, app = Session(port, stats), Session(port, stats)
+    if not (await web.login(username, PASSWORDS['security']) and await app.api_login(username, PASSWORDS['security'])):
+        return
+    await app.request('gate snapshot', 'GET', '/api/gate/snapshot/')
+    while time.perf_counter() < deadline:
+        queue = queues['leaving'] if phase == 'morning' else queues['out']
+        if not queue:
+            await web.request('security dashboard', 'GET', '/security/dashboard/')
+            await asyncio.sleep(random.uniform(0, think) + 0.1)
+            continue
+        pk, code = queue.popleft()
+        if phase == 'morning' or random.random() < 0.7:
+            response = await app.request('gate scan', 'POST', '/api/gate/scan/', data={'code': code})
+            if phase == 'morning' and response and response[0] == 200:
+                queues['out'].append((pk, code))
+        else:
+            path = f'/security/gatepass/{pk}/return/'
+            await web.request('security dashboard', 'GET', '/security/dashboard/')
+            await web.request('record return page', 'GET', path)
+            await web.request('record return', 'POST', path, form={
+                'actual_return_date': timezone.localdate().isoformat(), 'return_notes': '',
+                **now_fields('actual_return'),
+            })
+        await asyncio.sleep(random.uniform(0, think))
+    web.close()
+    app.close()
+
+
+def server_rss(pid):
+    """KiB resident in gunicorn's master and its workers"""
+    total = rss_kib(pid)
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as stat:
+                    ppid = int(stat.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            if ppid == pid:
+                total += rss_kib(entry)
+    return total
+
+
+async def warm_up(port, requests):
+    """Let every worker load the app before the clock starts"""
+    stats = Stats()
+    await asyncio.gather(*[Session(port, stats).request('warm up', 'GET', '/login/') for _ in range(requests)])
+
+
+async def run_phase(port, pid, phase, users, duration, think, queues, roles, genders):
+    stats = Stats()
+    mix = {role: max(1, round(users * share)) for role, share in PHASES[phase].items()}
+    deadline = time.perf_counter() + duration
+    tasks = []
+    for role, count in mix.items():
+        for n in range(count):
+            username = roles[role][n % len(roles[role])]
+            if role == 'student':
+                tasks.append(student(port, stats, username, queues, phase, deadline, think))
+            elif role == 'warden':
+                tasks.append(warden(port, stats, username, genders[username], queues, phase, deadline, think))
+            else:
+                tasks.append(guard(port, stats, username, queues, phase, deadline, think))
+
+    peak = 0
+
+    async def sample_rss():
+        nonlocal peak
+        while time.perf_counter() < deadline:
+            peak = max(peak, server_rss(pid))
+            await asyncio.sleep(0.5)
+
+    started = time.perf_counter()
+    await asyncio.gather(sample_rss(), *tasks)
+    return {
+        'users': mix,
+        'seconds': round(time.perf_counter() - started, 1),
+        'server_rss_kib_peak': peak,
+        'endpoints': stats.report(time.perf_counter() - started),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(old, new):
+    """Rows of (phase, endpoint, p95 before/after, queries before/after) for endpoints in both reports"""
+    def change(before, after):
+        if not before:
+            return f'{before} -> {after}'
+        return f'{before} -> {after} ({(after - before) / before:+.0%})'
+
+    rows = []
+    for phase, result in new['phases'].items():
+        previous = old.get('phases', {}).get(phase, {}).get('endpoints', {})
+        for name, stats in result['endpoints'].items():
+            if stats.get('requests') and previous.get(name, {}).get('requests'):
+                rows.append((phase, name, change(previous[name]['p95_ms'], stats['p95_ms']),
+                             change(previous[name]['queries_mean'], stats['queries_mean'])))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=60, help='concurrent virtual users per phase')
+    parser.add_argument('--duration', type=float, default=30, help='seconds per phase')
+    parser.add_argument('--think', type=float, default=1.0, help='longest pause between steps, in seconds')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--students', type=int, default=2000, help='generate_sample_data --count')
+    parser.add_argument('--seed', type=int, default=1, help='generate_sample_data --seed')
+    parser.add_argument('--burst', type=int, default=300, help='pending requests waiting for the morning')
+    parser.add_argument('--rush', type=int, default=300, help='students out before the evening')
+    parser.add_argument('--phases', nargs='+', choices=PHASES, default=list(PHASES))
+    parser.add_argument('--database-url', help='an empty database to use instead of a temporary SQLite file')
+    parser.add_argument('--output', help='write the report to this JSON file')
+    parser.add_argument('--compare', help='a report written by an earlier --output')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'load_settings',
+            'DATABASE_URL': args.database_url or f'sqlite:///{tmp}/load.sqlite3',
+            'PYTHONPATH': os.pathsep.join([BENCH_DIR, BASE_DIR, os.environ.get('PYTHONPATH', '')]),
+            'PYTHONWARNINGS': 'ignore::UserWarning',
+        }
+        env.pop('ASYNC_VIEWS', None)
+        os.environ.update(env)
+        sys.path.insert(0, BASE_DIR)
+        import django
+        django.setup()
+        from django.core.management import call_command
+
+        call_command('migrate', verbosity=0)
+        call_command('generate_sample_data', count=args.students, seed=args.seed, stdout=StringIO())
+        # Only now: importing _django switches this process to the MD5 hasher
+        from _django import print_table
+        queues = stage(args.burst, args.rush)
+        roles, genders = accounts()
+
+        port = free_port()
+        process = start_server(['hostel_gatepass.wsgi:application'], env, args.workers, port)
+        phases = {}
+        try:
+            asyncio.run(warm_up(port, 4 * args.workers))
+            for phase in args.phases:
+                phases[phase] = asyncio.run(run_phase(
+                    port, process.pid, phase, args.users, args.duration, args.think, queues, roles, genders,
+                ))
+        finally:
+            process.terminate()
+            process.wait()
+
+    report = {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'cpus': os.cpu_count(),
+            'database': 'sqlite' if not args.database_url else args.database_url.split(':', 1)[0],
+            'args': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'database_url')},
+        },
+        'phases': phases,
+    }
+
+    print(f'{args.users} users, {args.duration:g}s per phase, {args.workers} workers, {os.cpu_count()} CPUs')
+    for phase, result in phases.items():
+        print(f"\n{phase}: {result['users']}, server RSS peak {result['server_rss_kib_peak'] // 1024} MiB")
+        print_table(
+            ('endpoint', 'requests', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'queries', 'max queries', 'worker MiB', 'conflicts', 'errors'),
+            [
+                (name, stats['requests'], stats.get('rps', '-'), stats.get('p50_ms', '-'), stats.get('p95_ms', '-'),
+                 stats.get('p99_ms', '-'), stats.get('queries_mean', '-'), stats.get('queries_max', '-'),
+                 stats['rss_kib_max'] // 1024 if 'rss_kib_max' in stats else '-', stats.get('conflicts', 0),
+                 ', '.join(f'{error} x{count}' for error, count in stats['errors'].items()) or '-')
+                for name, stats in result['endpoints'].items()
+            ],
+        )
+    if args.compare:
+        with open(args.compare) as old:
+            previous = json.load(old)
+        print(f"\nAgainst {args.compare} ({previous['meta'].get('revision')}, {previous['meta'].get('date')}):")
+        print_table(('phase', 'endpoint', 'p95 ms', 'queries'), compare(previous, report))
+    if args.output:
+        with open(args.output, 'w') as out:
+            json.dump(report, out, indent=2)
+            out.write('\n')
+        print(f'\nWrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+"""
+Settings for the servers started by ``bench_asgi.py``.
+
+Production settings (``DEBUG`` off, so no query log) over plain HTTP on
+localhost: no SSL redirect or secure cookies, and static files served from
+the app directories so ``collectstatic`` is not needed.
+"""
+import os
+
+os.environ['DEBUG'] = 'False'
+
+from hostel_gatepass.settings import *  # noqa: E402,F401,F403
+
+CSRF_COOKIE_SECURE = False
+SESSION_COOKIE_SECURE = False
+SECURE_SSL_REDIRECT = False
+SECURE_HSTS_SECONDS = 0
+STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
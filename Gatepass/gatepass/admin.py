@@ -2,11 +2,27 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.db import transaction
 from django.contrib import messages
-from .models import User, Student, Warden, Security, GatePass, ParentVerification, Notification
+from .models import (
+    User, Student, Warden, Security, GatePass, ParentVerification, Notification, OutboundEmail, ExportJob, GateEvent,
+)
+from .notifications import bulk_notification_deletes
+from .sync import bulk_tombstones
+
+
+class NotificationDeletesMixin:
+    """Deletes that cascade to notifications update bell counters and feeds once, not per row"""
+
+    def delete_model(self, request, obj):
+        with transaction.atomic(), bulk_notification_deletes():
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic(), bulk_notification_deletes():
+            super().delete_queryset(request, queryset)
 
 
 @admin.register(User)
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(NotificationDeletesMixin, UserAdmin):
     """Custom User Admin"""
     
     list_display = ('username', 'email', 'role', 'gender', 'is_approved', 'is_active', 'date_joined')
@@ -31,7 +47,7 @@ class CustomUserAdmin(UserAdmin):
 
 
 @admin.register(Student)
-class StudentAdmin(admin.ModelAdmin):
+class StudentAdmin(NotificationDeletesMixin, admin.ModelAdmin):
     """Student Admin"""
     
     list_display = ('student_name', 'hall_ticket_no', 'room_no', 'parent_name', 'parent_mobile', 'user')
@@ -57,7 +73,7 @@ class SecurityAdmin(admin.ModelAdmin):
 
 
 @admin.register(GatePass)
-class GatePassAdmin(admin.ModelAdmin):
+class GatePassAdmin(NotificationDeletesMixin, admin.ModelAdmin):
     """GatePass Admin"""
     
     list_display = ('student', 'outing_date', 'outing_time', 'status', 'created_at')
@@ -93,13 +109,14 @@ class GatePassAdmin(admin.ModelAdmin):
             return
         
         try:
-            with transaction.atomic():
-                # Delete related notifications first
+            with transaction.atomic(), bulk_notification_deletes():
+                # Delete related notifications first; counters and feeds are adjusted once at the end
                 Notification.objects.filter(gatepass__in=queryset).delete()
                 # Delete related parent verifications
                 ParentVerification.objects.filter(gatepass__in=queryset).delete()
-                # Finally delete gatepasses
-                deleted_count, _ = queryset.delete()
+                # Finally delete gatepasses, logging deletions for mobile delta sync in one INSERT
+                with bulk_tombstones(queryset):
+                    deleted_count, _ = queryset.delete()
                 
             self.message_user(
                 request,
@@ -126,10 +143,42 @@ class ParentVerificationAdmin(admin.ModelAdmin):
 
 
 @admin.register(Notification)
-class NotificationAdmin(admin.ModelAdmin):
+class NotificationAdmin(NotificationDeletesMixin, admin.ModelAdmin):
     """Notification Admin"""
     
     list_display = ('user', 'gatepass', 'notification_type', 'is_read', 'created_at')
     list_filter = ('notification_type', 'is_read', 'created_at')
     search_fields = ('user__username', 'message')
-    readonly_fields = ('created_at',)
\ No newline at end of file
+    readonly_fields = ('created_at',)
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    """Outbound email queue Admin"""
+    
+    list_display = ('to_email', 'subject', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('to_email', 'subject')
+    # Bodies carry account credentials until delivered
+    exclude = ('body',)
+    readonly_fields = ('created_at', 'sent_at', 'claimed_at', 'last_error')
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    """Background export job Admin"""
+    
+    list_display = ('id', 'status', 'rows_written', 'total_rows', 'file_size', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    readonly_fields = ('filters_key', 'data_version', 'created_at', 'started_at', 'finished_at')
+
+
+@admin.register(GateEvent)
+class GateEventAdmin(admin.ModelAdmin):
+    """Gate terminal event log Admin"""
+    
+    list_display = ('event_id', 'kind', 'gatepass', 'result', 'status', 'recorded_by', 'occurred_at', 'received_at')
+    list_filter = ('kind', 'result', 'received_at')
+    search_fields = ('event_id',)
+    raw_id_fields = ('gatepass', 'recorded_by')
+    readonly_fields = ('received_at',)
@@ -1,12 +1,21 @@
 from django.contrib.auth import authenticate
+from django.db.models import Subquery
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
 from rest_framework.authtoken.models import Token
 from rest_framework.generics import ListCreateAPIView, get_object_or_404
 
+from . import bulk, scan, terminal
+from .conditional import conditional_response, make_etag, page_version
 from .models import GatePass, Student
-from .serializers import GatePassSerializer, UserSerializer
+from .pagination import KeysetPagination
+from .serializers import (
+    BulkGatePassSerializer, GateEventBatchSerializer, GatePassListSerializer, GatePassSerializer, GateScanSerializer,
+    UserSerializer,
+)
+from .sync import ExpiredSyncToken, InvalidSyncToken, changes_since, scoped_tombstones
+from .transitions import transition
 
 
 class LoginAPIView(APIView):
@@ -24,37 +33,102 @@ class LoginAPIView(APIView):
         return Response({'token': token.key, 'user': user_data})
 
 
+def scoped_gatepasses(user):
+    """Gatepasses the API exposes to ``user`` (own / same-gender students / all)"""
+    if user.role == 'student':
+        # student's own gatepasses (joined through the user, no profile lookup)
+        return GatePass.objects.filter(student__user=user).order_by('-created_at')
+    elif user.role == 'warden':
+        if user.gender:
+            # CRITICAL: Gender-based filtering - wardens see ONLY requests from students matching their gender
+            # Male wardens see ONLY male student requests, Female wardens see ONLY female student requests
+            # Students without gender set will NOT appear
+            return GatePass.objects.filter(
+                student__user__gender__iexact=user.gender
+            ).exclude(
+                student__user__gender__isnull=True
+            ).exclude(
+                student__user__gender=''
+            ).order_by('-created_at')
+        else:
+            # If warden gender is not set, return empty queryset (safety measure)
+            return GatePass.objects.none()
+    # security/superadmin: return all gatepasses
+    return GatePass.objects.all().order_by('-created_at')
+
+
 class GatePassListCreateAPIView(ListCreateAPIView):
+    """
+    GET: one page of the caller's gatepasses, newest first (keyset-paginated via ?cursor=).
+    Rows use the flat list serializer; ?expand=student nests the full student/user objects.
+    ?fields=id,status,... limits the fields returned.
+    Responses carry ETag/Last-Modified; a poll whose page has not changed gets 304
+    without serializing.
+    """
     serializer_class = GatePassSerializer
+    pagination_class = KeysetPagination
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET' and self.request.query_params.get('expand') != 'student':
+            return GatePassListSerializer
+        return GatePassSerializer
 
     def get_queryset(self):
-        user = self.request.user
-        if hasattr(user, 'student_profile'):
-            # student's own gatepasses
-            return GatePass.objects.filter(student=user.student_profile).order_by('-created_at')
-        elif user.role == 'warden':
-            if user.gender:
-                # CRITICAL: Gender-based filtering - wardens see ONLY requests from students matching their gender
-                # Male wardens see ONLY male student requests, Female wardens see ONLY female student requests
-                # Students without gender set will NOT appear
-                return GatePass.objects.filter(
-                    student__user__gender__iexact=user.gender
-                ).exclude(
-                    student__user__gender__isnull=True
-                ).exclude(
-                    student__user__gender=''
-                ).order_by('-created_at')
-            else:
-                # If warden gender is not set, return empty queryset (safety measure)
-                return GatePass.objects.none()
-        # security/superadmin: return all gatepasses
-        return GatePass.objects.all().order_by('-created_at')
+        return scoped_gatepasses(self.request.user).select_related('student__user')
+
+    def list(self, request, *args, **kwargs):
+        # The newest deletion in scope rides along on the page query as a scalar subquery
+        last_delete = scoped_tombstones(request.user).order_by('-deleted_at').values('deleted_at')[:1]
+        queryset = self.filter_queryset(self.get_queryset()).annotate(last_delete=Subquery(last_delete))
+        page = self.paginate_queryset(queryset)
+        version, last_modified = page_version(page, self.paginator.has_next)
+        etag = make_etag(version, request.user.pk, request.get_full_path(), request.accepted_renderer.format)
+        return conditional_response(request, etag, last_modified, lambda: self.get_paginated_response(
+            self.get_serializer(page, many=True).data
+        ))
 
     def perform_create(self, serializer):
         # expect student_id in payload (PrimaryKey of Student)
         serializer.save()
 
 
+class GatePassChangesAPIView(APIView):
+    """
+    GET ?since=<token>: gatepasses created/updated and ids deleted since the token.
+    Omit ``since`` for an initial full sync. Keep calling with ``next`` while ``has_more``;
+    a 410 means the token is too old and the client must resync from scratch.
+    """
+
+    def get(self, request, *args, **kwargs):
+        try:
+            changed, deleted, next_token, has_more = changes_since(
+                scoped_gatepasses(request.user).select_related('student'),
+                scoped_tombstones(request.user),
+                request.query_params.get('since'),
+            )
+        except ExpiredSyncToken as exc:
+            return Response({'detail': str(exc), 'reset': True}, status=status.HTTP_410_GONE)
+        except InvalidSyncToken as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = GatePassListSerializer(changed, many=True, context={'request': request})
+        return Response({
+            'changes': serializer.data,
+            'deleted': deleted,
+            'next': next_token,
+            'has_more': has_more,
+        })
+
+
+def transition_conflict(result):
+    """409 for a transition the pass's current status does not allow"""
+    if result.status is None:
+        return Response({'detail': 'No GatePass matches the given query.'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(
+        {'detail': f'This gatepass is {result.status} and cannot be processed.', 'status': result.status},
+        status=status.HTTP_409_CONFLICT,
+    )
+
+
 class WardenApproveAPIView(APIView):
     def post(self, request, pk, *args, **kwargs):
         user = request.user
@@ -78,19 +152,86 @@ class WardenApproveAPIView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        gp.status = 'warden_approved'
-        gp.warden_approval = user
-        gp.save()
+        result = transition(gp, 'warden_approve', user)
+        if not result.applied:
+            return transition_conflict(result)
         return Response({'detail': 'Warden approval recorded'})
 
 
+class BulkWardenApproveAPIView(APIView):
+    """``{"ids": [...]}``: approve many pending passes; results per ID (see ``gatepass.bulk``)"""
+
+    def post(self, request, *args, **kwargs):
+        if request.user.role != 'warden':
+            return Response({'detail': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
+        serializer = BulkGatePassSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        outcome = bulk.warden_approve(request.user, serializer.validated_data['ids'])
+        return Response({'summary': bulk.summarize(outcome), 'results': outcome})
+
+
 class SecurityApproveAPIView(APIView):
     def post(self, request, pk, *args, **kwargs):
         user = request.user
         if user.role != 'security':
             return Response({'detail': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         gp = get_object_or_404(GatePass, pk=pk)
-        gp.status = 'security_approved'
-        gp.security_approval = user
-        gp.save()
+        result = transition(gp, 'security_approve', user)
+        if not result.applied:
+            return transition_conflict(result)
         return Response({'detail': 'Security approval recorded'})
+
+
+class GateScanAPIView(APIView):
+    """
+    ``{"code": "<QR code>"}``: security lets the student out, or back in,
+    whichever the pass is due for (see ``gatepass.scan``).
+    """
+
+    def post(self, request, *args, **kwargs):
+        if request.user.role != 'security':
+            return Response({'detail': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
+        serializer = GateScanSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            outcome = scan.scan(serializer.validated_data['code'], request.user)
+        except scan.InvalidScanCode as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if not outcome.transition.applied:
+            return transition_conflict(outcome.transition)
+        return Response({
+            'action': outcome.action,
+            'gatepass': GatePassListSerializer(outcome.gatepass, context={'request': request}).data,
+        })
+
+
+class GateSnapshotAPIView(APIView):
+    """
+    GET: every pass a gate terminal may scan, as ``{"fields": [...], "passes": [[...], ...]}``
+    (see ``gatepass.terminal``). Unchanged snapshots get 304.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if request.user.role != 'security':
+            return Response({'detail': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
+        rows = terminal.snapshot()
+        etag = make_etag(rows, request.accepted_renderer.format)
+        return conditional_response(request, etag, None, lambda: Response({
+            'fields': terminal.SNAPSHOT_COLUMNS,
+            'passes': rows,
+        }))
+
+
+class GateEventUploadAPIView(APIView):
+    """
+    ``{"events": [{"id", "gatepass", "type": "exit" | "return", "at"}, ...]}``:
+    exits and returns recorded offline; results per event (see ``gatepass.terminal``).
+    """
+
+    def post(self, request, *args, **kwargs):
+        if request.user.role != 'security':
+            return Response({'detail': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
+        serializer = GateEventBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = terminal.upload(request.user, serializer.validated_data['events'])
+        return Response({'summary': terminal.summarize(results), 'results': results})
@@ -43,4 +43,9 @@ class GatepassConfig(AppConfig):
     name = 'gatepass'
 
     def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import signals  # noqa: F401  (connects model signal handlers)
+        from .perf import install_query_wrapper
+        connection_created.connect(install_query_wrapper)
         _create_superuser_from_env()
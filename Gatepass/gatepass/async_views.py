@@ -0,0 +1,264 @@
+"""
+Async versions of the dashboards and the approval APIs.
+
+With ``ASYNC_VIEWS`` set, the ASGI deployment (``hostel_gatepass.asgi``)
+routes these URLs here through ``gatepass.urls_async``; otherwise, and under
+WSGI, the sync views serve them. Each view runs the same queries as its sync
+twin, built by the same helpers in ``gatepass.views``, through Django's async
+ORM (``aaggregate``, ``aget``, ``async for``), and renders its template in a
+thread.
+
+Django 4.2 still runs each ORM call in a worker thread. What the async
+views buy is connection handling: a request that is queued, waiting on a
+slow client or on the database costs an event-loop task, not one of a
+fixed number of sync workers.
+
+The approval APIs are plain async views with the same URLs, token
+authentication and responses as the DRF views in ``gatepass.api_views``
+(DRF 3.15 cannot run async handlers).
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth.views import redirect_to_login
+from django.http import JsonResponse
+from django.shortcuts import redirect, render
+from rest_framework.authtoken.models import Token
+
+from . import views
+from .conditional import conditional_page, per_request
+from .models import GatePass, Student
+from .profiles import require_profile
+from .transitions import transition
+
+
+_render = sync_to_async(render)
+
+
+def login_required(view):
+    """``login_required`` for async views (Django 4.2's decorator only wraps sync views)"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if await sync_to_async(views._authenticated_user)(request) is None:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def _access_denied(request):
+    messages.error(request, 'Access denied.')
+    return redirect('home')
+
+
+async def _aggregate(query):
+    queryset, aggregates = query
+    return await queryset.aaggregate(**aggregates)
+
+
+async def _fetch(queryset):
+    return [row async for row in queryset]
+
+
+# --- Student ---------------------------------------------------------------
+
+@per_request
+async def _student_stats(request):
+    return await _aggregate(views._student_stats_query(request))
+
+
+async def _student_dashboard_version(request):
+    if request.user.role != 'student':
+        return None
+    return tuple(sorted((await _student_stats(request)).items()))
+
+
+@login_required
+@conditional_page(_student_dashboard_version)
+async def student_dashboard(request):
+    """Student dashboard"""
+    if request.user.role != 'student':
+        return _access_denied(request)
+
+    student = await sync_to_async(require_profile)(request, Student)
+    context = {
+        'student': student,
+        'gatepasses': await _fetch(GatePass.objects.filter(student=student).order_by('-created_at')),
+        **views._counters(await _student_stats(request)),
+    }
+    return await _render(request, 'gatepass/student_dashboard.html', context)
+
+
+# --- Warden ----------------------------------------------------------------
+
+@per_request
+async def _warden_stats(request):
+    return await _aggregate(views._warden_stats_query(request))
+
+
+async def _warden_dashboard_version(request):
+    if request.user.role != 'warden':
+        return None
+    return tuple(sorted((await _warden_stats(request)).items()))
+
+
+@login_required
+@conditional_page(_warden_dashboard_version)
+async def warden_dashboard(request):
+    """Warden dashboard"""
+    if request.user.role != 'warden':
+        return _access_denied(request)
+
+    filter_form, all_requests, rejected_by_me = views._warden_requests(request)
+    section_rows = await _fetch(views._warden_section_rows(all_requests, rejected_by_me))
+    context = {
+        'filter_form': filter_form,
+        **views._warden_sections(section_rows),
+        **views._warden_students_out(await _fetch(views._warden_roster_rows(request))),
+        **views._counters(await _warden_stats(request)),
+    }
+    return await _render(request, 'gatepass/warden_dashboard.html', context)
+
+
+# --- Security --------------------------------------------------------------
+
+@per_request
+async def _security_stats(request):
+    return await _aggregate(views._security_stats_query(request))
+
+
+async def _security_dashboard_version(request):
+    if request.user.role != 'security':
+        return None
+    return tuple(sorted((await _security_stats(request)).items()))
+
+
+@login_required
+@conditional_page(_security_dashboard_version)
+async def security_dashboard(request):
+    """Security dashboard"""
+    if request.user.role != 'security':
+        return _access_denied(request)
+
+    context = {name: await _fetch(queryset) for name, queryset in views._security_lists(request).items()}
+    context.update(views._counters(await _security_stats(request)))
+    return await _render(request, 'gatepass/security_dashboard.html', context)
+
+
+# --- Super admin -----------------------------------------------------------
+
+@per_request
+async def _superadmin_stats(request):
+    stats = {}
+    for query in views._superadmin_stats_queries(request):
+        stats.update(await _aggregate(query))
+    return stats
+
+
+async def _superadmin_dashboard_version(request):
+    if request.user.role != 'superadmin':
+        return None
+    return tuple(sorted((await _superadmin_stats(request)).items()))
+
+
+@login_required
+@conditional_page(_superadmin_dashboard_version)
+async def superadmin_dashboard(request):
+    """Super admin dashboard"""
+    if request.user.role != 'superadmin':
+        return _access_denied(request)
+
+    context = {name: await _fetch(queryset) for name, queryset in views._superadmin_lists(request).items()}
+    context.update(views._counters(await _superadmin_stats(request)))
+    return await _render(request, 'gatepass/superadmin_dashboard.html', context)
+
+
+# --- Approval APIs ---------------------------------------------------------
+
+def _api_error(detail, status):
+    response = JsonResponse({'detail': detail}, status=status)
+    if status == 401:
+        response['WWW-Authenticate'] = 'Token'
+    return response
+
+
+async def _token_user(request):
+    """The user for an ``Authorization: Token <key>`` header, or an error response"""
+    auth = request.headers.get('Authorization', '').split()
+    if not auth or auth[0].lower() != 'token':
+        return None, _api_error('Authentication credentials were not provided.', 401)
+    if len(auth) != 2:
+        return None, _api_error('Invalid token header.', 401)
+    try:
+        token = await Token.objects.select_related('user').aget(key=auth[1])
+    except Token.DoesNotExist:
+        return None, _api_error('Invalid token.', 401)
+    if not token.user.is_active:
+        return None, _api_error('User inactive or deleted.', 401)
+    return token.user, None
+
+
+def api_view(view):
+    """POST-only, token-authenticated, CSRF-exempt async API view"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'POST':
+            return _api_error(f'Method "{request.method}" not allowed.', 405)
+        user, error = await _token_user(request)
+        if error is not None:
+            return error
+        return await view(request, user, *args, **kwargs)
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+_transition = sync_to_async(transition)
+
+
+def _transition_conflict(result):
+    if result.status is None:
+        return _api_error('No GatePass matches the given query.', 404)
+    return JsonResponse(
+        {'detail': f'This gatepass is {result.status} and cannot be processed.', 'status': result.status},
+        status=409,
+    )
+
+
+async def _get_gatepass(pk):
+    gatepass = await GatePass.objects.select_related('student__user').filter(pk=pk).afirst()
+    if gatepass is None:
+        return None, _api_error('No GatePass matches the given query.', 404)
+    return gatepass, None
+
+
+@api_view
+async def warden_approve_api(request, user, pk):
+    if user.role != 'warden':
+        return _api_error('Not authorized', 403)
+    gp, error = await _get_gatepass(pk)
+    if error is not None:
+        return error
+
+    # CRITICAL: Enforce gender matching - prevent cross-gender approvals via API
+    if not user.gender or not gp.student.user.gender:
+        return _api_error('Gender information is required for both warden and student to process this request.', 403)
+    if user.gender != gp.student.user.gender:
+        return _api_error('You can only approve gatepass requests from students of your gender.', 403)
+
+    result = await _transition(gp, 'warden_approve', user)
+    if not result.applied:
+        return _transition_conflict(result)
+    return JsonResponse({'detail': 'Warden approval recorded'})
+
+
+@api_view
+async def security_approve_api(request, user, pk):
+    if user.role != 'security':
+        return _api_error('Not authorized', 403)
+    gp, error = await _get_gatepass(pk)
+    if error is not None:
+        return error
+    result = await _transition(gp, 'security_approve', user)
+    if not result.applied:
+        return _transition_conflict(result)
+    return JsonResponse({'detail': 'Security approval recorded'})
@@ -0,0 +1,104 @@
+"""
+Bulk approvals: many gatepasses processed in one request.
+
+Used by the warden and security dashboards ("process selected") and
+``POST /api/gatepasses/bulk-warden-approve/``. Whatever the number of passes,
+one call costs:
+
+- one SELECT for the passes with their students, which decides both the
+  gender scoping and the current status;
+- one conditional UPDATE (``transitions.bulk_transition``);
+- one ``bulk_create`` for every notification (``notifications.bulk_notify``;
+  the database's parameter limit may split it into a few INSERTs);
+
+all inside one transaction.
+
+Results come back per ID, in request order, as ``{'id', 'result', 'status'}``.
+``result`` is one of ``RESULTS``; ``status`` is the pass's status afterwards
+(None if it does not exist).
+"""
+from django.db import transaction
+
+from .models import GatePass
+from .notifications import bulk_notify, security_recipients
+from .transitions import bulk_transition
+
+# Passes per request; keeps the IN lists well inside database parameter limits
+MAX_BULK_IDS = 500
+
+RESULTS = ('applied', 'conflict', 'forbidden', 'not_found')
+
+
+def _gender(user):
+    gender = str(user.gender or '').strip().upper()
+    return gender if gender in ('M', 'F') else None
+
+
+def _process(gatepass_ids, action, actor, permitted, notifications, **fields):
+    gatepass_ids = list(dict.fromkeys(gatepass_ids))
+    with transaction.atomic():
+        loaded = GatePass.objects.select_related('student__user').in_bulk(gatepass_ids)
+        allowed = [loaded[pk] for pk in gatepass_ids if pk in loaded and permitted(loaded[pk])]
+        results = bulk_transition(allowed, action, actor, **fields)
+        bulk_notify(
+            entry
+            for gatepass in allowed if results[gatepass.pk].applied
+            for entry in notifications(gatepass)
+        )
+
+    outcome = []
+    for pk in gatepass_ids:
+        if pk not in loaded:
+            outcome.append({'id': pk, 'result': 'not_found', 'status': None})
+        elif pk not in results:
+            outcome.append({'id': pk, 'result': 'forbidden', 'status': loaded[pk].status})
+        else:
+            applied, status = results[pk]
+            outcome.append({'id': pk, 'result': 'applied' if applied else 'conflict', 'status': status})
+    return outcome
+
+
+def _warden_scope(warden):
+    # Same rule as single approvals: both genders known and equal
+    gender = _gender(warden)
+    return lambda gatepass: gender is not None and _gender(gatepass.student.user) == gender
+
+
+def warden_approve(warden, gatepass_ids):
+    """Approve pending passes of the warden's gender; parent verification is taken as confirmed"""
+    security = security_recipients()
+
+    def notifications(gatepass):
+        return [
+            (security, gatepass, 'warden_approval',
+             f"Gatepass approved by warden for {gatepass.student.student_name}"),
+            ([gatepass.student.user_id], gatepass, 'warden_approval',
+             "Your gatepass request has been approved by the warden."),
+        ]
+    return _process(gatepass_ids, 'warden_approve', warden, _warden_scope(warden), notifications,
+                    parent_verification=True)
+
+
+def warden_reject(warden, gatepass_ids, reason):
+    """Reject pending passes of the warden's gender with one reason"""
+    def notifications(gatepass):
+        return [([gatepass.student.user_id], gatepass, 'warden_rejection',
+                 f"Your gatepass request has been rejected. Reason: {reason}")]
+    return _process(gatepass_ids, 'warden_reject', warden, _warden_scope(warden), notifications,
+                    warden_rejection_reason=reason)
+
+
+def security_approve(security, gatepass_ids):
+    """Approve the exit of warden-approved passes"""
+    def notifications(gatepass):
+        return [([gatepass.student.user_id], gatepass, 'security_approval',
+                 "Your gatepass has been approved by security. You can now leave the campus.")]
+    return _process(gatepass_ids, 'security_approve', security, lambda gatepass: True, notifications)
+
+
+def summarize(outcome):
+    """``{result: count}`` for every result in ``RESULTS``"""
+    counts = dict.fromkeys(RESULTS, 0)
+    for row in outcome:
+        counts[row['result']] += 1
+    return counts
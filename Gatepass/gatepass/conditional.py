@@ -0,0 +1,185 @@
+"""
+Conditional GET (ETag / Last-Modified) for dashboards and the gatepass list API.
+
+Pages that are refreshed constantly - the security dashboard left open at the
+gate, mobile apps polling ``/api/gatepasses/`` - first compute a cheap
+*version* of the data they show:
+
+- dashboards: their statistics aggregate extended with the newest
+  ``updated_at``, computed once and shared with the view (``per_request``);
+- the list API: the ``(id, updated_at)`` pairs of the page it fetched.
+
+The version and everything else that varies the response (user, query
+string, date, notification bell, CSRF cookie, deploy) are hashed into an
+ETag. A matching ``If-None-Match`` is answered with 304 before the template
+is rendered or the page serialized.
+
+Counts plus the newest ``updated_at`` change on every insert, delete and
+``save()``. Queryset ``update()`` bypasses ``auto_now``, so set-based updates
+of gatepasses must set ``updated_at`` themselves (see ``gatepass.sync``).
+
+Dashboards only send ETags: their notification bell and flash messages have
+no timestamp to put in ``Last-Modified``. The API sends both; ``Last-Modified``
+has one-second resolution, so clients should prefer ``If-None-Match``.
+"""
+import asyncio
+import hashlib
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.middleware.csrf import get_token
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
+
+from .notifications import get_notification_feed
+
+
+def queryset_version(queryset):
+    """``"<count>:<newest updated_at>"`` for a gatepass queryset"""
+    stats = queryset.aggregate(last_change=Max('updated_at'), total=Count('id'))
+    last_change = stats['last_change'].isoformat() if stats['last_change'] else '-'
+    return f"{stats['total']}:{last_change}"
+
+
+def per_request(func):
+    """
+    Cache ``func(request)`` on the request.
+
+    Lets a dashboard's version function and the view share one query: the
+    statistics that identify the page are computed once and reused to render it.
+    Coroutine functions are cached by their awaited result.
+    """
+    attr = f'_{func.__name__}'
+
+    if asyncio.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(request):
+            if not hasattr(request, attr):
+                setattr(request, attr, await func(request))
+            return getattr(request, attr)
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(request):
+        if not hasattr(request, attr):
+            setattr(request, attr, func(request))
+        return getattr(request, attr)
+    return wrapper
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.sha256(repr(parts).encode()).hexdigest()[:32])
+
+
+def _page_etag(request, version):
+    user = request.user
+    # Pages with forms embed the CSRF secret. Create it now, so the first
+    # response's ETag still matches once the browser sends the cookie back.
+    get_token(request)
+    bell = [(n.pk, n.is_read) for n in get_notification_feed(user.pk)]
+    return make_etag(
+        version,
+        user.pk,
+        user.unread_notifications,
+        bell,
+        request.get_full_path(),
+        timezone.localdate().isoformat(),
+        request.META.get('CSRF_COOKIE', ''),
+        settings.DEPLOY_VERSION,
+    )
+
+
+def conditional_page(version_func):
+    """
+    View decorator: answer GET/HEAD with 304 when the page's ETag matches.
+
+    ``version_func(request)`` returns the version of the data the page shows,
+    or None to skip conditional handling (e.g. wrong role: the view redirects).
+    Requests with pending flash messages always render, so they are shown.
+
+    Async views (``gatepass.async_views``) take a coroutine ``version_func``.
+    """
+    def etag_func(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or _has_messages(request):
+            return None
+        version = version_func(request)
+        if version is None:
+            return None
+        return _page_etag(request, version)
+
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            return _async_conditional_page(version_func, view)
+        conditional_view = condition(etag_func=etag_func)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.has_header('ETag'):
+                # Browsers must revalidate rather than reuse the page on their own
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
+
+
+def _async_conditional_page(version_func, view):
+    # Django 4.2's ``condition`` only wraps sync views
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        etag = None
+        if request.method in ('GET', 'HEAD') and not await sync_to_async(_has_messages)(request):
+            version = await version_func(request)
+            if version is not None:
+                etag = await sync_to_async(_page_etag)(request, version)
+        response = get_conditional_response(request, etag=etag) if etag else None
+        if response is None:
+            response = await view(request, *args, **kwargs)
+        if etag:
+            response.headers.setdefault('ETag', etag)
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+    return wrapper
+
+
+def _has_messages(request):
+    return bool(len(get_messages(request)))
+
+
+# --- API -------------------------------------------------------------------
+
+def page_version(page, has_next):
+    """
+    ``(version, last_modified)`` for one keyset page of gatepasses.
+
+    Keyset pages only change when one of their rows is updated or deleted, or
+    (first page) a row is created, so the page's ``(id, updated_at)`` pairs
+    identify it. Rows must carry a ``last_delete`` annotation, the newest
+    tombstone in scope, so deletions also move ``last_modified``.
+    """
+    version = ([(gatepass.pk, gatepass.updated_at.isoformat()) for gatepass in page], has_next)
+    changes = [gatepass.updated_at for gatepass in page]
+    if page and page[0].last_delete is not None:
+        changes.append(page[0].last_delete)
+    last_modified = int(max(changes).timestamp()) if changes else None
+    return version, last_modified
+
+
+def conditional_response(request, etag, last_modified, get_response):
+    """
+    304 if ``If-None-Match``/``If-Modified-Since`` match, else ``get_response()``.
+    Either way the response carries the validators.
+    """
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = get_response()
+    if last_modified is not None and not response.has_header('Last-Modified'):
+        response.headers['Last-Modified'] = http_date(last_modified)
+    response.headers.setdefault('ETag', etag)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
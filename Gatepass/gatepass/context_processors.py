@@ -1,10 +1,8 @@
-from .models import Notification
+from .notifications import NotificationFeed
 
 
 def notifications_context(request):
-    """Add notifications to global template context"""
+    """Add the (lazy, cached) notification feed to the global template context"""
     if request.user.is_authenticated:
-        notifications = Notification.objects.filter(user=request.user).order_by('-created_at')[:12]
-        return {'notifications': notifications}
+        return {'notifications': NotificationFeed(request.user)}
     return {'notifications': []}
-
@@ -0,0 +1,278 @@
+"""
+Live updates: gatepass transitions and new notifications pushed to open pages.
+
+Model signals publish small events once the writing transaction commits, and
+``/events/`` (``views.event_stream``, served by the ASGI application) streams
+the events each user may see as Server-Sent Events. Dashboards subscribe and
+refresh themselves instead of being reloaded by hand.
+
+Events go to *channels* that encode who may receive them:
+
+- ``user:<id>``: the student a gatepass belongs to, a notification's recipient;
+- ``warden:M`` / ``warden:F``: wardens of the student's gender;
+- ``role:security``: gate staff, for transitions that involve the gate;
+- ``role:superadmin``: every transition.
+
+The broker between publishers and streams is pluggable (``settings.EVENT_BROKER``).
+``InProcessBroker``, the default, only reaches streams served by the same
+process. With several processes (server workers, the ``scan_overdue_returns``
+worker) use ``RedisBroker``.
+
+Signals do not fire for ``bulk_create`` or queryset ``update()``; code using
+them must call ``publish_transition`` / ``publish_notifications`` itself.
+"""
+import asyncio
+import json
+import logging
+import threading
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+try:
+    import redis
+    import redis.asyncio
+except ImportError:
+    redis = None
+
+
+logger = logging.getLogger(__name__)
+
+# Transitions security staff act on or track at the gate
+GATE_STATUSES = {'warden_approved', 'security_approved', 'returned', 'completed'}
+
+QUEUE_SIZE = 100
+HEARTBEAT_INTERVAL = 20
+# Streams end after this many seconds and the browser reconnects. Bounds the
+# life of a stream whose client vanished without the server noticing.
+STREAM_MAX_AGE = 300
+RECONNECT_DELAY_MS = 3000
+
+
+# --- Brokers ---------------------------------------------------------------
+
+class Broker:
+    """
+    Carries events from publishers to streams.
+
+    ``publish`` is called from synchronous code (views, signals, workers);
+    ``subscribe`` from the event loop serving a stream.
+    """
+
+    def publish(self, channels, event):
+        raise NotImplementedError
+
+    async def subscribe(self, channels):
+        """Return a subscription: ``await sub.get(timeout)`` -> event or None, ``await sub.close()``"""
+        raise NotImplementedError
+
+
+class _QueueSubscription:
+
+    def __init__(self, broker, channels):
+        self.broker = broker
+        self.channels = channels
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def offer(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A client this far behind reloads its page anyway
+            pass
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.broker._remove(self)
+
+
+class InProcessBroker(Broker):
+    """Delivers to streams in this process only; the default"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def publish(self, channels, event):
+        with self._lock:
+            targets = {sub for channel in channels for sub in self._subscriptions.get(channel, ())}
+        for sub in targets:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, event)
+            except RuntimeError:
+                # The stream's event loop has shut down
+                self._remove(sub)
+
+    async def subscribe(self, channels):
+        sub = _QueueSubscription(self, channels)
+        with self._lock:
+            for channel in channels:
+                self._subscriptions.setdefault(channel, set()).add(sub)
+        return sub
+
+    def _remove(self, sub):
+        with self._lock:
+            for channel in sub.channels:
+                subs = self._subscriptions.get(channel)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._subscriptions[channel]
+
+    def subscriber_count(self):
+        with self._lock:
+            return len({sub for subs in self._subscriptions.values() for sub in subs})
+
+
+class _RedisSubscription:
+
+    def __init__(self, client, pubsub):
+        self.client = client
+        self.pubsub = pubsub
+
+    async def get(self, timeout):
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        return json.loads(message['data']) if message else None
+
+    async def close(self):
+        await self.pubsub.reset()
+        close = getattr(self.client, 'aclose', None) or self.client.close
+        await close()
+
+
+class RedisBroker(Broker):
+    """Redis pub/sub, shared by every process using ``EVENT_BROKER_URL``; needs ``redis``"""
+
+    prefix = 'gatepass:events:'
+
+    def __init__(self, url=None):
+        if redis is None:
+            raise ImproperlyConfigured("RedisBroker needs the redis package (pip install redis)")
+        self.url = url or settings.EVENT_BROKER_URL
+        if not self.url:
+            raise ImproperlyConfigured("RedisBroker needs EVENT_BROKER_URL or REDIS_URL")
+        self._client = redis.Redis.from_url(self.url)
+
+    def publish(self, channels, event):
+        data = json.dumps(event)
+        with self._client.pipeline(transaction=False) as pipe:
+            for channel in channels:
+                pipe.publish(self.prefix + channel, data)
+            pipe.execute()
+
+    async def subscribe(self, channels):
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(*[self.prefix + channel for channel in channels])
+        return _RedisSubscription(client, pubsub)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.EVENT_BROKER)()
+    return _broker
+
+
+# --- Publishing ------------------------------------------------------------
+
+def _deliver(channels, event):
+    try:
+        get_broker().publish(channels, event)
+    except Exception:
+        # Live updates are best effort; never fail the write that caused them
+        logger.exception("Could not publish %s event", event['type'])
+
+
+def publish(channels, event):
+    """Publish ``event`` to ``channels`` once the current transaction commits"""
+    event = {'id': uuid.uuid4().hex, **event}
+    channels = sorted(set(channels))
+    transaction.on_commit(lambda: _deliver(channels, event))
+
+
+def gatepass_channels(status, student_user_id, student_gender):
+    channels = [f'user:{student_user_id}', 'role:superadmin']
+    gender = str(student_gender or '').strip().upper()
+    if gender in ('M', 'F'):
+        channels.append(f'warden:{gender}')
+    if status in GATE_STATUSES:
+        channels.append('role:security')
+    return channels
+
+
+def publish_transition(gatepass_id, status, previous_status, student_user_id, student_gender):
+    publish(gatepass_channels(status, student_user_id, student_gender), {
+        'type': 'gatepass',
+        'gatepass_id': gatepass_id,
+        'status': status,
+        'previous_status': previous_status,
+    })
+
+
+def publish_notifications(notifications):
+    for notification in notifications:
+        publish([f'user:{notification.user_id}'], {
+            'type': 'notification',
+            'notification_id': notification.pk,
+            'notification_type': notification.notification_type,
+            'gatepass_id': notification.gatepass_id,
+            'message': notification.message,
+        })
+
+
+# --- Streaming -------------------------------------------------------------
+
+def subscriptions_for(user):
+    """Channels ``user`` may listen to"""
+    channels = [f'user:{user.pk}']
+    if user.role == 'warden':
+        gender = str(user.gender or '').strip().upper()
+        if gender in ('M', 'F'):
+            channels.append(f'warden:{gender}')
+    elif user.role in ('security', 'superadmin'):
+        channels.append(f'role:{user.role}')
+    return channels
+
+
+def _sse(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def sse_stream(channels, heartbeat=HEARTBEAT_INTERVAL, max_age=STREAM_MAX_AGE):
+    """Server-Sent Events for ``channels``, with keep-alive comments, ending after ``max_age``"""
+    sub = await get_broker().subscribe(channels)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_age
+    # Brokers that fan out per channel deliver an event once for each matching channel
+    seen = deque(maxlen=QUEUE_SIZE)
+    try:
+        yield f"retry: {RECONNECT_DELAY_MS}\n\n"
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            event = await sub.get(min(heartbeat, remaining))
+            if event is None:
+                yield ": keep-alive\n\n"
+            elif event['id'] not in seen:
+                seen.append(event['id'])
+                yield _sse(event)
+    finally:
+        await sub.close()
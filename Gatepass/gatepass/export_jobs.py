@@ -0,0 +1,153 @@
+"""
+Background outing exports.
+
+Large outing reports are generated by the ``run_export_jobs`` worker rather
+than inside a web request. Dashboards enqueue a job, poll its progress and
+download the finished file (with HTTP Range support for resumed downloads).
+
+Jobs are de-duplicated by filter set: a request whose filters match a queued,
+running or finished job is answered with that job as long as the exported
+rows have not changed since (see ``data_version``).
+"""
+import hashlib
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import metrics
+from .conditional import queryset_version
+from .exporters import CHUNK_SIZE, get_exporter
+from .exports import outing_queryset, outing_sheets, outings_filename
+from .models import ExportJob
+
+
+# A running job older than this is assumed to belong to a dead worker
+JOB_TIMEOUT = timedelta(hours=1)
+
+
+def filters_key(filters, export_format):
+    canonical = json.dumps([filters, export_format], sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def data_version(filters):
+    """
+    Fingerprint of the rows an export would contain.
+
+    Any status change, edit, insert or delete within the selection moves
+    either the newest ``updated_at`` or the row count.
+    """
+    return queryset_version(outing_queryset(filters))
+
+
+def export_path(job):
+    return os.path.join(settings.EXPORT_ROOT, job.file_name)
+
+
+def request_outing_export(filters, user, export_format='xlsx'):
+    """Return ``(job, created)``, reusing a live job for the same filters, format and data"""
+    key = filters_key(filters, export_format)
+    version = data_version(filters)
+    candidates = (
+        ExportJob.objects
+        .filter(filters_key=key, data_version=version, status__in=['queued', 'running', 'done'])
+        .order_by('-id')
+    )
+    stale_before = timezone.now() - JOB_TIMEOUT
+    for job in candidates:
+        if job.status == 'done' and not os.path.exists(export_path(job)):
+            continue
+        if job.status == 'running' and job.started_at < stale_before:
+            continue
+        return job, False
+    job = ExportJob.objects.create(
+        filters=filters,
+        export_format=export_format,
+        filters_key=key,
+        data_version=version,
+        requested_by=user,
+    )
+    return job, True
+
+
+def _claim_next_job():
+    with transaction.atomic():
+        job = (
+            ExportJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(Q(status='queued') | Q(status='running', started_at__lt=timezone.now() - JOB_TIMEOUT))
+            .order_by('id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'running'
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at'])
+    return job
+
+
+def _track_progress(job, rows):
+    written = 0
+    for row in rows:
+        yield row
+        written += 1
+        if written % CHUNK_SIZE == 0:
+            ExportJob.objects.filter(pk=job.pk).update(rows_written=written)
+    job.rows_written = written
+
+
+def run_export_job(job):
+    """Generate the file for a claimed job; failures are recorded on the job"""
+    # Label the artifact with the data it is actually built from
+    job.data_version = data_version(job.filters)
+    job.total_rows = outing_queryset(job.filters).count()
+    exporter = get_exporter(job.export_format)
+    job.file_name = f"{job.pk}-{outings_filename(job.filters, exporter.extension)}"
+    job.save(update_fields=['data_version', 'total_rows', 'file_name'])
+
+    path = export_path(job)
+    partial = f"{path}.part"
+    try:
+        os.makedirs(settings.EXPORT_ROOT, exist_ok=True)
+        sheets = outing_sheets(job.filters, track_rows=lambda rows: _track_progress(job, rows))
+        with open(partial, 'wb') as f, metrics.timed('gatepass_export_duration_seconds', format=exporter.name, source='job'):
+            exporter.write(sheets, f)
+        os.replace(partial, path)
+    except Exception as exc:
+        if os.path.exists(partial):
+            os.remove(partial)
+        job.status = 'failed'
+        job.error = str(exc) or exc.__class__.__name__
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'rows_written', 'finished_at'])
+        return job
+
+    job.status = 'done'
+    job.file_size = os.path.getsize(path)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'file_size', 'rows_written', 'finished_at'])
+    expire_superseded(job)
+    return job
+
+
+def expire_superseded(job):
+    """Delete older artifacts for the same filters; their data is out of date"""
+    older = ExportJob.objects.filter(filters_key=job.filters_key, status='done', id__lt=job.id)
+    for old in older:
+        if old.file_name and os.path.exists(export_path(old)):
+            os.remove(export_path(old))
+    older.update(status='expired')
+
+
+def run_next_export_job():
+    """Claim and run the oldest queued job; returns it, or None if the queue is empty"""
+    job = _claim_next_job()
+    if job is not None:
+        run_export_job(job)
+    return job
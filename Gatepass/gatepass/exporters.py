@@ -0,0 +1,202 @@
+"""
+Pluggable export formats.
+
+An exporter turns a list of ``Sheet`` objects into a file. XLSX keeps every
+sheet (plus its total row); the single-table formats (CSV, Parquet, columnar
+JSON) write only the first sheet, which holds the exported records.
+
+- ``xlsx``: openpyxl write-only workbook.
+- ``csv``: streamed straight to the client, no temporary file.
+- ``parquet``: only registered when ``pyarrow`` is installed.
+- ``colgz``: pure-Python fallback, gzipped JSON with one column-major block per chunk.
+- ``columnar``: alias for ``parquet`` when available, otherwise ``colgz``.
+"""
+import csv
+import gzip
+import json
+from abc import ABC, abstractmethod
+from itertools import chain, islice
+
+import openpyxl
+from openpyxl.utils import get_column_letter
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+CHUNK_SIZE = 2000
+WIDTH_SAMPLE_ROWS = 200
+MIN_COLUMN_WIDTH = 12
+MAX_COLUMN_WIDTH = 60
+
+
+class Sheet:
+    """
+    One table of an export: a title, a header row and an iterable of rows.
+
+    ``total_label`` adds a "label, row count" line under the rows in formats
+    that have room for it (XLSX).
+    """
+
+    def __init__(self, title, headers, rows, total_label=None):
+        self.title = title
+        self.headers = headers
+        self.rows = rows
+        self.total_label = total_label
+
+
+def _chunks(rows, size=CHUNK_SIZE):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _text(value):
+    return None if value is None else str(value)
+
+
+class Exporter(ABC):
+    """Base class: subclasses set the class attributes and implement ``write``"""
+
+    name = None
+    extension = None
+    content_type = 'application/octet-stream'
+    # True when the exporter also has ``stream(sheets)``, which yields the
+    # file as bytes incrementally, without a temporary file
+    streaming = False
+
+    @abstractmethod
+    def write(self, sheets, fileobj):
+        """Write ``sheets`` to the binary file object ``fileobj``"""
+
+
+def estimate_widths(headers, sample):
+    """Column widths from the header and a sample of rows (not a full rescan)"""
+    widths = [len(str(header)) for header in headers]
+    for row in sample:
+        for index, value in enumerate(row[:len(widths)]):
+            if value is not None:
+                widths[index] = max(widths[index], len(str(value)))
+    return [min(max(width + 2, MIN_COLUMN_WIDTH), MAX_COLUMN_WIDTH) for width in widths]
+
+
+class XlsxExporter(Exporter):
+    """
+    Excel workbook in openpyxl write-only mode.
+
+    Rows are serialised to disk as they are appended; column widths are
+    estimated from the first ``WIDTH_SAMPLE_ROWS`` rows because write-only
+    sheets need them before any row is written.
+    """
+
+    name = 'xlsx'
+    extension = 'xlsx'
+    content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+    def write(self, sheets, fileobj):
+        wb = openpyxl.Workbook(write_only=True)
+        for sheet in sheets:
+            ws = wb.create_sheet(sheet.title)
+            rows = iter(sheet.rows)
+            sample = list(islice(rows, WIDTH_SAMPLE_ROWS))
+            for index, width in enumerate(estimate_widths(sheet.headers, sample), start=1):
+                ws.column_dimensions[get_column_letter(index)].width = width
+            ws.append(sheet.headers)
+            total = 0
+            for row in chain(sample, rows):
+                ws.append(row)
+                total += 1
+            if sheet.total_label:
+                ws.append([])
+                ws.append([sheet.total_label, total])
+        wb.save(fileobj)
+
+
+class _LineBuffer:
+    """File-like target for ``csv.writer`` that hands back what was written"""
+
+    def write(self, value):
+        return value
+
+
+class CsvExporter(Exporter):
+    """UTF-8 CSV of the first sheet"""
+
+    name = 'csv'
+    extension = 'csv'
+    content_type = 'text/csv; charset=utf-8'
+    streaming = True
+
+    def stream(self, sheets):
+        sheet = sheets[0]
+        writer = csv.writer(_LineBuffer())
+        yield writer.writerow(sheet.headers).encode()
+        for chunk in _chunks(sheet.rows):
+            yield ''.join(writer.writerow(row) for row in chunk).encode()
+
+    def write(self, sheets, fileobj):
+        for data in self.stream(sheets):
+            fileobj.write(data)
+
+
+class ParquetExporter(Exporter):
+    """Parquet file of the first sheet (string columns, one row group per chunk)"""
+
+    name = 'parquet'
+    extension = 'parquet'
+    content_type = 'application/vnd.apache.parquet'
+
+    def write(self, sheets, fileobj):
+        sheet = sheets[0]
+        schema = pyarrow.schema([(str(header), pyarrow.string()) for header in sheet.headers])
+        with pyarrow.parquet.ParquetWriter(fileobj, schema) as writer:
+            for chunk in _chunks(sheet.rows):
+                columns = [
+                    pyarrow.array([_text(value) for value in column], type=pyarrow.string())
+                    for column in zip(*chunk)
+                ]
+                writer.write_batch(pyarrow.RecordBatch.from_arrays(columns, schema=schema))
+
+
+class ColumnarJsonExporter(Exporter):
+    """
+    Pure-Python columnar fallback: gzipped JSON lines.
+
+    The first line is ``{"format": "gatepass-columnar", "version": 1, "columns": [...]}``;
+    every following line is one chunk as a list of columns (lists of strings/null).
+    """
+
+    name = 'colgz'
+    extension = 'columns.json.gz'
+    content_type = 'application/gzip'
+
+    def write(self, sheets, fileobj):
+        sheet = sheets[0]
+        with gzip.GzipFile(fileobj=fileobj, mode='wb', compresslevel=6) as out:
+            header = {'format': 'gatepass-columnar', 'version': 1, 'columns': list(sheet.headers)}
+            out.write(json.dumps(header).encode() + b'\n')
+            for chunk in _chunks(sheet.rows):
+                columns = [[_text(value) for value in column] for column in zip(*chunk)]
+                out.write(json.dumps(columns, separators=(',', ':')).encode() + b'\n')
+
+
+EXPORTERS = {
+    exporter.name: exporter
+    for exporter in (XlsxExporter(), CsvExporter(), ColumnarJsonExporter())
+}
+if pyarrow is not None:
+    EXPORTERS['parquet'] = ParquetExporter()
+EXPORTERS['columnar'] = EXPORTERS.get('parquet', EXPORTERS['colgz'])
+
+DEFAULT_FORMAT = 'xlsx'
+
+
+def get_exporter(name):
+    """Exporter registered under ``name`` (default XLSX), or None if unknown"""
+    return EXPORTERS.get((name or DEFAULT_FORMAT).lower())
@@ -0,0 +1,343 @@
+"""
+Outing and student exports.
+
+This module defines *what* is exported (sheets built from querysets read
+with ``.iterator(chunk_size=...)``) and how it is served; the file formats
+live in ``gatepass.exporters``. Memory stays flat however many gatepasses
+are exported: rows are generated lazily and written straight to the
+response or a temporary file.
+
+Streaming formats (CSV) go out through ``StreamingHttpResponse`` as rows are
+read; the others are built in a temporary file and sent with ``FileResponse``.
+Stored artifacts that clients may resume use ``ranged_file_response``.
+"""
+import os
+import re
+import tempfile
+
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+
+from . import metrics
+from .exporters import CHUNK_SIZE, Sheet
+from .models import GatePass, OutRosterEntry, Student, User
+
+
+OUTING_STATUSES = ['security_approved', 'returned', 'completed']
+
+
+def export_response(exporter, sheets, filename):
+    """Serve ``sheets`` in the exporter's format"""
+    labels = {'format': exporter.name, 'source': 'download'}
+    if exporter.streaming:
+        chunks = metrics.timed_stream(exporter.stream(sheets), 'gatepass_export_duration_seconds', **labels)
+        response = StreamingHttpResponse(chunks, content_type=exporter.content_type)
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+        return response
+    tmp = tempfile.TemporaryFile()
+    try:
+        with metrics.timed('gatepass_export_duration_seconds', **labels):
+            exporter.write(sheets, tmp)
+    except BaseException:
+        tmp.close()
+        raise
+    tmp.seek(0)
+    return FileResponse(tmp, as_attachment=True, filename=filename, content_type=exporter.content_type)
+
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _file_chunks(f, length):
+    with f:
+        while length > 0:
+            data = f.read(min(STREAM_CHUNK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def ranged_file_response(request, path, filename, content_type, etag=None):
+    """
+    Serve ``path`` honouring a single-range ``Range`` header (206/416).
+
+    Multi-range requests, and ``If-Range`` values that do not match ``etag``,
+    get the full file as a plain 200.
+    """
+    size = os.path.getsize(path)
+    start, end = 0, size - 1
+    partial = False
+
+    match = _RANGE_RE.match(request.headers.get('Range', '').strip())
+    if_range = request.headers.get('If-Range')
+    if match and (if_range is None or if_range == etag):
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        elif last:
+            start = max(size - int(last), 0)
+        else:
+            match = None
+        if match:
+            if start > end or start >= size:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+            partial = True
+
+    f = open(path, 'rb')
+    f.seek(start)
+    length = end - start + 1
+    response = StreamingHttpResponse(_file_chunks(f, length), content_type=content_type, status=206 if partial else 200)
+    response['Content-Length'] = str(length)
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    if partial:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    if etag:
+        response['ETag'] = etag
+    return response
+
+
+def _time(value):
+    return value.strftime('%H:%M') if value else ""
+
+
+# --- Students export -------------------------------------------------------
+
+def _student_rows():
+    gender_labels = dict(User.GENDER_CHOICES)
+    rows = (
+        Student.objects
+        .order_by('student_name')
+        .values_list(
+            'student_name',
+            'hall_ticket_no',
+            'room_no',
+            'user__gender',
+            'user__email',
+            'user__mobile_number',
+            'parent_name',
+            'parent_mobile',
+            'user__is_approved',
+        )
+    )
+    for (name, hall_ticket_no, room_no, gender, email, mobile,
+         parent_name, parent_mobile, is_approved) in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield [
+            name,
+            hall_ticket_no,
+            room_no,
+            gender_labels.get(gender, gender) if gender else "",
+            email or "",
+            mobile or "",
+            parent_name,
+            parent_mobile,
+            "Yes" if is_approved else "No",
+        ]
+
+
+def _students_out_rows():
+    # From the out roster (``gatepass.roster``), not the gatepass history
+    rows = (
+        OutRosterEntry.objects
+        .order_by('-outing_date', '-outing_time')
+        .values_list(
+            'student__student_name',
+            'student__hall_ticket_no',
+            'outing_date',
+            'outing_time',
+            'expected_return_date',
+            'expected_return_time',
+            'gatepass__purpose',
+            'gatepass__warden_approval__username',
+            'gatepass__security_approval__username',
+        )
+    )
+    for (name, hall_ticket_no, outing_date, outing_time, return_date, return_time,
+         purpose, warden, security) in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield [
+            name,
+            hall_ticket_no,
+            outing_date.strftime('%Y-%m-%d'),
+            _time(outing_time),
+            return_date.strftime('%Y-%m-%d'),
+            _time(return_time),
+            purpose or "",
+            warden or "",
+            security or "",
+        ]
+
+
+def student_sheets():
+    """
+    Sheets for ``export_students_excel``: all students and students currently out.
+    Single-table formats only write the student list.
+    """
+    return [
+        Sheet("Students", [
+            "Student Name",
+            "Hall Ticket No",
+            "Room No",
+            "Gender",
+            "Email",
+            "Mobile",
+            "Parent Name",
+            "Parent Mobile",
+            "Approved",
+        ], _student_rows()),
+        Sheet("Students Out", [
+            "Student Name",
+            "Hall Ticket No",
+            "Outing Date",
+            "Outing Time",
+            "Expected Return Date",
+            "Expected Return Time",
+            "Purpose",
+            "Warden Approved By",
+            "Security Approved By",
+        ], _students_out_rows(), total_label="Total students currently out"),
+    ]
+
+
+def students_filename(extension='xlsx'):
+    return f"gatepass_export_{timezone.localdate().isoformat()}.{extension}"
+
+
+# --- Outings export --------------------------------------------------------
+
+def outing_filters(params):
+    """
+    Normalise the outing export filters from a QueryDict or dict.
+
+    Supports the warden filter form (from_date, to_date, status_filter) and
+    the legacy year/month parameters.
+    """
+    filters = {
+        'from_date': params.get('from_date') or None,
+        'to_date': params.get('to_date') or None,
+        'status_filter': params.get('status_filter') or None,
+    }
+    try:
+        filters['year'] = int(params['year']) if params.get('year') else None
+        filters['month'] = int(params['month']) if params.get('month') else None
+    except ValueError:
+        filters['year'] = None
+        filters['month'] = None
+    return filters
+
+
+def outing_queryset(filters):
+    outing_qs = GatePass.objects.filter(status__in=OUTING_STATUSES)
+    if filters.get('from_date'):
+        outing_qs = outing_qs.filter(outing_date__gte=filters['from_date'])
+    if filters.get('to_date'):
+        outing_qs = outing_qs.filter(outing_date__lte=filters['to_date'])
+    if filters.get('status_filter'):
+        outing_qs = outing_qs.filter(status=filters['status_filter'])
+    if filters.get('year'):
+        outing_qs = outing_qs.filter(outing_date__year=filters['year'])
+    if filters.get('month'):
+        outing_qs = outing_qs.filter(outing_date__month=filters['month'])
+    return outing_qs
+
+
+def _outing_rows(outing_qs):
+    # values_list skips model instantiation, the dominant cost for large exports
+    status_labels = dict(GatePass.STATUS_CHOICES)
+    rows = (
+        outing_qs
+        .order_by('-outing_date', '-outing_time')
+        .values_list(
+            'student__student_name',
+            'student__hall_ticket_no',
+            'outing_date',
+            'outing_time',
+            'expected_return_date',
+            'expected_return_time',
+            'status',
+            'purpose',
+            'warden_approval__username',
+            'security_approval__username',
+        )
+    )
+    for (name, hall_ticket_no, outing_date, outing_time, return_date, return_time,
+         status, purpose, warden, security) in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield [
+            name,
+            hall_ticket_no,
+            outing_date.strftime('%Y-%m-%d'),
+            _time(outing_time),
+            return_date.strftime('%Y-%m-%d'),
+            _time(return_time),
+            status_labels.get(status, status),
+            purpose or "",
+            warden or "",
+            security or "",
+        ]
+
+
+def _monthly_rows(outing_qs):
+    monthly_counts = (
+        outing_qs
+        .annotate(month=TruncMonth('outing_date'))
+        .values('month')
+        .annotate(total=Count('id'))
+        .order_by('month')
+    )
+    grand_total = 0
+    for row in monthly_counts:
+        label = row['month'].strftime('%Y-%m') if row['month'] else "Unknown"
+        yield [label, row['total']]
+        grand_total += row['total']
+    yield []
+    yield ["Grand total outings", grand_total]
+
+
+def outing_sheets(filters, track_rows=None):
+    """
+    Sheets for ``export_outings_excel``: filtered outings and monthly counts.
+    Single-table formats only write the outings.
+
+    ``track_rows`` optionally wraps the outing row iterator (e.g. to report progress).
+    """
+    outing_qs = outing_queryset(filters)
+    rows = _outing_rows(outing_qs)
+    if track_rows:
+        rows = track_rows(rows)
+    return [
+        Sheet("Outings", [
+            "Student Name",
+            "Hall Ticket No",
+            "Outing Date",
+            "Outing Time",
+            "Expected Return Date",
+            "Expected Return Time",
+            "Status",
+            "Purpose",
+            "Warden Approved By",
+            "Security Approved By",
+        ], rows, total_label="Total outings in selection"),
+        Sheet("Monthly Counts", ["Month", "Total Outings"], _monthly_rows(outing_qs)),
+    ]
+
+
+def outings_filename(filters, extension='xlsx'):
+    filename_parts = ["outings"]
+    if filters.get('from_date'):
+        filename_parts.append(f"from-{filters['from_date']}")
+    if filters.get('to_date'):
+        filename_parts.append(f"to-{filters['to_date']}")
+    if filters.get('status_filter'):
+        filename_parts.append(filters['status_filter'])
+    if filters.get('year'):
+        filename_parts.append(str(filters['year']))
+    if filters.get('month'):
+        filename_parts.append(f"{filters['month']:02d}")
+    return f"gatepass_{'_'.join(filename_parts)}.{extension}"
@@ -2,6 +2,7 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.core.exceptions import ValidationError
 from .models import User, Student, GatePass, ParentVerification
+from .bulk import MAX_BULK_IDS
 from .password_validation import validate_password_strength
 from django.utils import timezone
 from datetime import datetime, date
@@ -266,6 +267,40 @@ class WardenApprovalForm(forms.Form):
         return cleaned_data
 
 
+class GatepassIdsField(forms.Field):
+    """The gatepasses ticked on a dashboard list (``<input type="checkbox" name="ids">``)"""
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        try:
+            ids = [int(pk) for pk in value or []]
+        except (TypeError, ValueError):
+            raise ValidationError("Invalid gatepass selection.")
+        if len(ids) > MAX_BULK_IDS:
+            raise ValidationError(f"Select at most {MAX_BULK_IDS} gatepasses at a time.")
+        return ids
+
+    def validate(self, value):
+        if not value:
+            raise ValidationError("Select at least one gatepass.")
+
+
+class WardenBulkDecisionForm(WardenApprovalForm):
+    """Approve or reject the selected pending requests at once"""
+    ids = GatepassIdsField()
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('action') == 'approve' and not cleaned_data.get('parent_verification'):
+            raise ValidationError("Parent verification must be completed before approval.")
+        return cleaned_data
+
+
+class SecurityBulkApproveForm(forms.Form):
+    """Approve the exit of the selected students at once"""
+    ids = GatepassIdsField()
+
+
 class ParentVerificationForm(forms.ModelForm):
     """Parent verification form"""
     
@@ -342,3 +377,22 @@ class WardenDateFilterForm(forms.Form):
             raise ValidationError("From date cannot be after to date")
         
         return cleaned_data
+
+
+class OutingExportForm(WardenDateFilterForm):
+    """Filters of a background outings export: the warden filter, any status, legacy year/month"""
+
+    status_filter = forms.ChoiceField(required=False, choices=[('', 'All Status'), *GatePass.STATUS_CHOICES])
+    year = forms.IntegerField(required=False, min_value=2000, max_value=2100)
+    month = forms.IntegerField(required=False, min_value=1, max_value=12)
+
+    def filters(self):
+        """The cleaned filters, JSON-ready (dates as ISO strings), as ``outing_filters()`` returns them"""
+        data = self.cleaned_data
+        return {
+            'from_date': data['from_date'].isoformat() if data['from_date'] else None,
+            'to_date': data['to_date'].isoformat() if data['to_date'] else None,
+            'status_filter': data['status_filter'] or None,
+            'year': data['year'],
+            'month': data['month'],
+        }
@@ -9,6 +9,8 @@ Usage:
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from gatepass.models import GatePass, Notification, ParentVerification
+from gatepass.notifications import bulk_notification_deletes
+from gatepass.sync import bulk_tombstones
 
 
 class Command(BaseCommand):
@@ -47,11 +49,13 @@ class Command(BaseCommand):
 
         # Delete in transaction
         try:
-            with transaction.atomic():
-                # Delete in correct order (respecting foreign keys)
+            with transaction.atomic(), bulk_notification_deletes():
+                # Delete in correct order (respecting foreign keys); bell
+                # counters and feeds are brought in step once, at the end
                 deleted_notifications = Notification.objects.all().delete()
                 deleted_verifications = ParentVerification.objects.all().delete()
-                deleted_gatepasses = GatePass.objects.all().delete()
+                with bulk_tombstones(GatePass.objects.all()):
+                    deleted_gatepasses = GatePass.objects.all().delete()
 
                 self.stdout.write(self.style.SUCCESS('\n=== Deletion Summary ==='))
                 self.stdout.write(f'Deleted GatePass records: {deleted_gatepasses[0]}')
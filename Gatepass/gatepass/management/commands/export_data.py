@@ -0,0 +1,73 @@
+"""
+Management command to export outings or students to a file, in any of the
+registered export formats (see gatepass/exporters.py).
+
+Usage:
+    python manage.py export_data outings                              # XLSX, named like the web export
+    python manage.py export_data outings --format csv --year 2025
+    python manage.py export_data outings --format columnar --from-date 2025-01-01 --to-date 2025-06-30
+    python manage.py export_data students --format parquet --output students.parquet
+"""
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gatepass.exporters import EXPORTERS, get_exporter
+from gatepass.exports import outing_filters, outing_sheets, outings_filename, student_sheets, students_filename
+
+
+class Command(BaseCommand):
+    help = 'Export outings or students to xlsx, csv or a columnar format'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=['outings', 'students'])
+        parser.add_argument(
+            '--format',
+            default='xlsx',
+            help=f"Output format: {', '.join(EXPORTERS)} (default: xlsx)"
+        )
+        parser.add_argument('--output', help='Output path (default: same name as the web export)')
+        parser.add_argument('--from-date', help='Outings on or after YYYY-MM-DD')
+        parser.add_argument('--to-date', help='Outings on or before YYYY-MM-DD')
+        parser.add_argument('--status', help='Only outings with this status')
+        parser.add_argument('--year', help='Outings in this year')
+        parser.add_argument('--month', help='Outings in this month (1-12)')
+
+    def handle(self, *args, **options):
+        exporter = get_exporter(options['format'])
+        if exporter is None:
+            raise CommandError(f"Unsupported format '{options['format']}'. Choose one of: {', '.join(EXPORTERS)}.")
+
+        if options['dataset'] == 'outings':
+            filters = outing_filters({
+                'from_date': options['from_date'],
+                'to_date': options['to_date'],
+                'status_filter': options['status'],
+                'year': options['year'],
+                'month': options['month'],
+            })
+            sheets = outing_sheets(filters)
+            default_name = outings_filename(filters, exporter.extension)
+        else:
+            sheets = student_sheets()
+            default_name = students_filename(exporter.extension)
+
+        output = options['output'] or default_name
+        # Written next to the output and renamed when complete, so a failed
+        # export leaves no truncated file (nor replaces an earlier one)
+        partial = f"{output}.part"
+        started = time.perf_counter()
+        try:
+            with open(partial, 'wb') as f:
+                exporter.write(sheets, f)
+            os.replace(partial, output)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {output} ({exporter.name}, {os.path.getsize(output)} bytes) in {elapsed:.2f}s.'
+        ))
@@ -0,0 +1,18 @@
+"""
+Management command to delete gatepass tombstones that no valid delta-sync
+token can still need (older than the token lifetime, 30 days by default).
+
+Usage:
+    python manage.py prune_sync_tombstones
+"""
+from django.core.management.base import BaseCommand
+
+from gatepass.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Delete delta-sync tombstones older than the sync token lifetime'
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} tombstone(s).'))
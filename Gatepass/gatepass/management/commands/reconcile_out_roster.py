@@ -0,0 +1,39 @@
+"""
+Management command to rebuild the "currently out" roster from the gatepasses
+and report any drift (run it after bulk data changes that bypass the ORM
+signals, or nightly as a check).
+
+Usage:
+    python manage.py reconcile_out_roster            # report and fix
+    python manage.py reconcile_out_roster --check    # report only; exit status 1 on drift
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from gatepass.roster import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the out roster from the gatepasses and report drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drift, do not fix it'
+        )
+
+    def handle(self, *args, **options):
+        drift = reconcile(fix=not options['check'])
+        for kind, label in (('missing', 'missing from the roster'), ('stale', 'on the roster but not out'),
+                            ('changed', 'with outdated details')):
+            ids = getattr(drift, kind)
+            if ids:
+                shown = ', '.join(f'#{pk}' for pk in ids[:20]) + (' ...' if len(ids) > 20 else '')
+                self.stdout.write(self.style.WARNING(f'{len(ids)} gatepass(es) {label}: {shown}'))
+        total = sum(len(ids) for ids in drift)
+        if not total:
+            self.stdout.write(self.style.SUCCESS('Out roster is in sync.'))
+        elif options['check']:
+            raise CommandError(f'Out roster has drifted ({total} gatepass(es)).')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {total} roster row(s).'))
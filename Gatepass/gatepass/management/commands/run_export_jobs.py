@@ -0,0 +1,49 @@
+"""
+Management command to generate queued background exports (large outing
+reports requested from the warden / super admin dashboards).
+
+Usage:
+    python manage.py run_export_jobs                      # run every queued job once (cron / scheduler)
+    python manage.py run_export_jobs --loop               # keep running, poll every 5 seconds
+    python manage.py run_export_jobs --loop --interval 15
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from gatepass.export_jobs import run_next_export_job
+
+
+class Command(BaseCommand):
+    help = 'Generate queued export files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and poll for jobs every --interval seconds'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=5,
+            help='Seconds between polls when --loop is set (default: 5)'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            while True:
+                job = run_next_export_job()
+                if job is None:
+                    break
+                if job.status == 'done':
+                    self.stdout.write(self.style.SUCCESS(
+                        f'Export #{job.pk}: {job.rows_written} row(s), {job.file_size} bytes.'
+                    ))
+                else:
+                    self.stdout.write(self.style.ERROR(f'Export #{job.pk} failed: {job.error}'))
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,61 @@
+"""
+Management command to notify wardens, the superadmin and students about
+overdue returns. Replaces the check that used to run on every dashboard hit.
+
+Usage:
+    python manage.py scan_overdue_returns                   # single run (cron / scheduler)
+    python manage.py scan_overdue_returns --loop            # in-process scheduler, every 15 minutes
+    python manage.py scan_overdue_returns --loop --interval 300
+    python manage.py scan_overdue_returns --force           # rescan everything overdue
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from gatepass.overdue import scan_overdue_returns, DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Scan overdue gatepass returns and create notifications in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Gatepasses processed per batch (default: {DEFAULT_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Ignore the watermark and rescan every overdue gatepass'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and rescan every --interval seconds'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=900,
+            help='Seconds between scans when --loop is set (default: 900)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        force = options['force']
+
+        while True:
+            watermark = scan_overdue_returns(batch_size=batch_size, force=force)
+            self.stdout.write(self.style.SUCCESS(
+                f'Scanned {watermark.gatepasses_scanned} overdue gatepass(es), '
+                f'created {watermark.notifications_created} notification(s).'
+            ))
+            if not options['loop']:
+                break
+            # Only the first iteration honours --force; later ones use the watermark
+            force = False
+            close_old_connections()
+            time.sleep(options['interval'])
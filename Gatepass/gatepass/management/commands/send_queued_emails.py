@@ -0,0 +1,68 @@
+"""
+Management command to deliver emails queued in the outbound email table
+(registration credentials). Each batch reuses one SMTP connection.
+
+Usage:
+    python manage.py send_queued_emails                    # drain the queue once (cron / scheduler)
+    python manage.py send_queued_emails --loop             # keep running, poll every 30 seconds
+    python manage.py send_queued_emails --loop --interval 10 --batch-size 50
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from gatepass.outbox import deliver_queued_emails, DEFAULT_BATCH_SIZE, DEFAULT_MAX_ATTEMPTS
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued outbound emails in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Emails sent per SMTP connection (default: {DEFAULT_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=DEFAULT_MAX_ATTEMPTS,
+            help=f'Give up on an email after this many failed attempts (default: {DEFAULT_MAX_ATTEMPTS})'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and poll the queue every --interval seconds'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=30,
+            help='Seconds between polls when --loop is set (default: 30)'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent = failed = 0
+            while True:
+                result = deliver_queued_emails(
+                    batch_size=options['batch_size'],
+                    max_attempts=options['max_attempts']
+                )
+                sent += result.sent
+                failed += result.failed
+                # A short batch means the queue is drained. After any failure the
+                # failed rows are queued again, so stop and let them wait for
+                # the next poll instead of retrying them straight away
+                if result.failed or result.sent < options['batch_size']:
+                    break
+            if sent or failed or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Sent {sent} email(s), {failed} failed.'
+                ))
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,300 @@
+"""
+Prometheus metrics, served at ``/metrics`` in the text exposition format.
+
+Counters and histograms are kept in memory by each process:
+
+- ``gatepass_http_requests_total`` / ``gatepass_http_request_duration_seconds``:
+  every request, by view name (recorded by ``perf.PerformanceMiddleware``);
+- ``gatepass_transitions_total``: status changes, by from/to status
+  (``transitions.moved``; ``from_status`` is ``new`` for created passes);
+- ``gatepass_notifications_total``: notifications created, by type;
+- ``gatepass_export_duration_seconds``: time to write an export, by format
+  and by where it ran (``download`` or ``job``).
+
+With several processes (gunicorn workers, the ``run_export_jobs`` worker),
+point ``settings.METRICS_DIR`` at a directory they share. Each process then
+writes its values to a file of its own there every ``FLUSH_INTERVAL``
+seconds and on exit, and a scrape adds up every file. Files of processes
+that have exited are kept, so counters never go backwards; empty the
+directory when the application is deployed.
+
+The gauges (passes waiting in each workflow status, overdue passes) are read
+from a snapshot in the cache that is recomputed at most every
+``METRICS_GAUGE_INTERVAL`` seconds, by one worker at a time. A scrape never
+counts rows itself.
+"""
+import atexit
+import glob
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import GatePass, OutRosterEntry
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+FLUSH_INTERVAL = 5
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, math.inf)
+
+COUNTERS = {
+    'gatepass_http_requests_total': 'Requests served, by view, method and status code.',
+    'gatepass_transitions_total': 'Gatepass status changes, by previous and new status.',
+    'gatepass_notifications_total': 'Notifications created, by type.',
+}
+HISTOGRAMS = {
+    'gatepass_http_request_duration_seconds': 'Time to answer a request, by view.',
+    'gatepass_export_duration_seconds': 'Time to write an export, by format and where it ran.',
+}
+
+# Workflow statuses whose current counts are exported as gauges
+GAUGE_STATUSES = ['pending', 'warden_approved', 'security_approved']
+_GAUGES_KEY = 'gatepass:metrics:gauges'
+_GAUGES_LOCK = 'gatepass:metrics:gauges:refreshing'
+
+
+def _labels(**labels):
+    """``labels`` in exposition syntax; also the key values are stored under"""
+    def escape(value):
+        return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+    return ','.join(f'{name}="{escape(value)}"' for name, value in sorted(labels.items()))
+
+
+# --- Recording -------------------------------------------------------------
+
+_lock = threading.Lock()
+_counters = defaultdict(Counter)
+_histograms = defaultdict(dict)
+_pid = None
+_file_name = None
+_dirty = False
+_flusher = None
+
+
+def _claim():
+    """Start over after a fork: the parent's values are the parent's to report"""
+    global _pid, _file_name, _dirty, _flusher
+    if _pid != os.getpid():
+        _pid = os.getpid()
+        # Not the pid alone: a later process given the same pid must not replace these totals
+        _file_name = f'metrics-{_pid}-{time.time_ns()}.json'
+        _counters.clear()
+        _histograms.clear()
+        _dirty = False
+        _flusher = None
+    if _flusher is None and settings.METRICS_DIR:
+        _flusher = threading.Thread(target=_flush_loop, name='gatepass-metrics', daemon=True)
+        _flusher.start()
+
+
+def count(name, amount=1, **labels):
+    """Add ``amount`` to counter ``name``"""
+    global _dirty
+    with _lock:
+        _claim()
+        _counters[name][_labels(**labels)] += amount
+        _dirty = True
+
+
+def observe(name, seconds, **labels):
+    """Record one ``seconds`` observation in histogram ``name``"""
+    global _dirty
+    key = _labels(**labels)
+    with _lock:
+        _claim()
+        # Per-bucket (not cumulative) counts, then the sum
+        values = _histograms[name].get(key)
+        if values is None:
+            values = _histograms[name][key] = [0] * len(BUCKETS) + [0.0]
+        values[next(i for i, bound in enumerate(BUCKETS) if seconds <= bound)] += 1
+        values[-1] += seconds
+        _dirty = True
+
+
+@contextmanager
+def timed(name, **labels):
+    """Observe how long the block took in histogram ``name``"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+def request_finished(view, method, status, seconds):
+    count('gatepass_http_requests_total', view=view, method=method, status=status)
+    observe('gatepass_http_request_duration_seconds', seconds, view=view)
+
+
+def gatepasses_moved(gatepasses, previous_status):
+    for status, moved in Counter(gatepass.status for gatepass in gatepasses).items():
+        count('gatepass_transitions_total', moved, from_status=previous_status or 'new', to_status=status)
+
+
+def notifications_created(notifications):
+    for notification_type, created in Counter(n.notification_type for n in notifications).items():
+        count('gatepass_notifications_total', created, type=notification_type)
+
+
+def timed_stream(chunks, name, **labels):
+    """``chunks``, observing in histogram ``name`` how long it took to exhaust them"""
+    started = time.perf_counter()
+    yield from chunks
+    observe(name, time.perf_counter() - started, **labels)
+
+
+def reset():
+    """Forget this process's values"""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+# --- Sharing between processes ---------------------------------------------
+
+def _snapshot():
+    with _lock:
+        return {
+            'counters': {name: dict(values) for name, values in _counters.items()},
+            'histograms': {name: {key: list(values) for key, values in series.items()} for name, series in _histograms.items()},
+        }
+
+
+def flush():
+    """Write this process's values to its file in ``METRICS_DIR``"""
+    global _dirty
+    if not settings.METRICS_DIR or _pid != os.getpid():
+        return
+    with _lock:
+        _dirty = False
+    path = os.path.join(settings.METRICS_DIR, _file_name)
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(_snapshot(), f)
+    os.replace(f'{path}.tmp', path)
+
+
+def _flush_loop():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        if _dirty:
+            flush()
+
+
+atexit.register(flush)
+
+
+def _collected():
+    """Values of every process sharing ``METRICS_DIR``, or of this one"""
+    if not settings.METRICS_DIR:
+        return [_snapshot()]
+    flush()
+    snapshots = []
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, 'metrics-*.json')):
+        try:
+            with open(path) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            # Removed or replaced while we were reading it
+            continue
+    return snapshots
+
+
+# --- Gauges ----------------------------------------------------------------
+
+def refresh_gauges():
+    """Count the passes in each gauge status and the overdue ones; store and return the snapshot"""
+    counts = dict(
+        GatePass.objects.filter(status__in=GAUGE_STATUSES)
+        .order_by().values_list('status').annotate(n=Count('id'))
+    )
+    snapshot = {
+        'updated_at': time.time(),
+        'statuses': {status: counts.get(status, 0) for status in GAUGE_STATUSES},
+        # Same test as the overdue scanner: out, with the return date behind us
+        'overdue': OutRosterEntry.objects.filter(expected_return_date__lt=timezone.localdate()).count(),
+    }
+    cache.set(_GAUGES_KEY, snapshot, None)
+    return snapshot
+
+
+def gauges():
+    """
+    The cached gauge snapshot. When it is older than ``METRICS_GAUGE_INTERVAL``
+    the first caller to claim the refresh recomputes it; the others keep
+    serving the old one meanwhile.
+    """
+    snapshot = cache.get(_GAUGES_KEY)
+    if snapshot is not None and time.time() - snapshot['updated_at'] < settings.METRICS_GAUGE_INTERVAL:
+        return snapshot
+    if snapshot is None:
+        return refresh_gauges()
+    if not cache.add(_GAUGES_LOCK, True, settings.METRICS_GAUGE_INTERVAL):
+        return snapshot
+    try:
+        return refresh_gauges()
+    finally:
+        cache.delete(_GAUGES_LOCK)
+
+
+# --- Exposition --------------------------------------------------------------
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _sample(name, labels, value):
+    return f'{name}{{{labels}}} {_number(value)}' if labels else f'{name} {_number(value)}'
+
+
+def render():
+    """Every metric in the Prometheus text format"""
+    counters = defaultdict(Counter)
+    histograms = defaultdict(dict)
+    for snapshot in _collected():
+        for name, values in snapshot['counters'].items():
+            counters[name].update(values)
+        for name, series in snapshot['histograms'].items():
+            for key, values in series.items():
+                merged = histograms[name].get(key)
+                histograms[name][key] = values if merged is None else [a + b for a, b in zip(merged, values)]
+
+    lines = []
+    for name, help_text in COUNTERS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        lines += [_sample(name, key, value) for key, value in sorted(counters[name].items())]
+    for name, help_text in HISTOGRAMS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for key, values in sorted(histograms[name].items()):
+            cumulative = 0
+            for bound, observed in zip(BUCKETS, values):
+                cumulative += observed
+                le = f'le="{_number(bound)}"'
+                lines.append(_sample(f'{name}_bucket', f'{key},{le}' if key else le, cumulative))
+            lines.append(_sample(f'{name}_sum', key, values[-1]))
+            lines.append(_sample(f'{name}_count', key, cumulative))
+
+    snapshot = gauges()
+    lines += [
+        '# HELP gatepass_gatepasses Gatepasses currently in each waiting status.',
+        '# TYPE gatepass_gatepasses gauge',
+        *(_sample('gatepass_gatepasses', _labels(status=status), n) for status, n in snapshot['statuses'].items()),
+        '# HELP gatepass_overdue_gatepasses Students out past their expected return date.',
+        '# TYPE gatepass_overdue_gatepasses gauge',
+        _sample('gatepass_overdue_gatepasses', '', snapshot['overdue']),
+        '# HELP gatepass_gauges_updated_timestamp_seconds When the gauges above were counted.',
+        '# TYPE gatepass_gauges_updated_timestamp_seconds gauge',
+        _sample('gatepass_gauges_updated_timestamp_seconds', '', snapshot['updated_at']),
+    ]
+    return '\n'.join(lines) + '\n'
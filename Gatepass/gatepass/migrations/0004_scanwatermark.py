@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gatepass', '0003_alter_security_shift_alter_user_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('scanned_for_date', models.DateField(blank=True, null=True)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('gatepasses_scanned', models.PositiveIntegerField(default=0)),
+                ('notifications_created', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gatepass', '0004_scanwatermark'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gatepass',
+            index=models.Index(fields=['status', '-created_at'], name='gatepass_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gatepass',
+            index=models.Index(fields=['student', '-created_at'], name='gatepass_student_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gatepass',
+            index=models.Index(fields=['status', 'outing_date'], name='gatepass_status_outing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gatepass',
+            index=models.Index(fields=['security_approval', 'status', '-created_at'], name='gatepass_exit_by_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gatepass',
+            index=models.Index(fields=['return_verified_by', 'status', '-created_at'], name='gatepass_return_by_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gatepass',
+            index=models.Index(condition=models.Q(('status', 'security_approved')), fields=['expected_return_date'], name='gatepass_out_return_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-created_at'], name='notification_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:47
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_unread_notifications(apps, schema_editor):
+    User = apps.get_model('gatepass', 'User')
+    Notification = apps.get_model('gatepass', 'Notification')
+    unread = (
+        Notification.objects
+        .filter(user=OuterRef('pk'), is_read=False)
+        .order_by()
+        .values('user')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    User.objects.update(unread_notifications=Coalesce(
+        Subquery(unread, output_field=IntegerField()), Value(0)
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gatepass', '0005_gatepass_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='unread_notifications',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_unread_notifications, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gatepass', '0008_exportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='export_format',
+            field=models.CharField(default='xlsx', max_length=10),
+        ),
+    ]
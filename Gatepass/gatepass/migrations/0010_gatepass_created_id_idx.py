@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gatepass', '0009_exportjob_format'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gatepass',
+            index=models.Index(fields=['-created_at', '-id'], name='gatepass_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gatepass', '0010_gatepass_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GatePassTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gatepass_id', models.PositiveIntegerField()),
+                ('student_user_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('student_gender', models.CharField(blank=True, max_length=1)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='gatepass',
+            index=models.Index(fields=['updated_at', 'id'], name='gatepass_updated_id_idx'),
+        ),
+    ]
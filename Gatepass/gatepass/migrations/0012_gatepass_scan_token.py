@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:40
+
+from django.db import migrations, models
+
+from gatepass.models import new_scan_token
+
+
+def fill_scan_tokens(apps, schema_editor):
+    GatePass = apps.get_model('gatepass', 'GatePass')
+    rows = list(GatePass.objects.filter(scan_token__isnull=True).only('pk'))
+    for row in rows:
+        row.scan_token = new_scan_token()
+    GatePass.objects.bulk_update(rows, ['scan_token'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gatepass', '0011_delta_sync'),
+    ]
+
+    operations = [
+        # Added nullable, filled per row, then made unique: a unique default would give every existing row the same token
+        migrations.AddField(
+            model_name='gatepass',
+            name='scan_token',
+            field=models.CharField(editable=False, max_length=22, null=True),
+        ),
+        migrations.RunPython(fill_scan_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='gatepass',
+            name='scan_token',
+            field=models.CharField(default=new_scan_token, editable=False, max_length=22, unique=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gatepass', '0012_gatepass_scan_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GateEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=64)),
+                ('kind', models.CharField(choices=[('exit', 'Exit'), ('return', 'Return')], max_length=10)),
+                ('occurred_at', models.DateTimeField()),
+                ('result', models.CharField(choices=[('applied', 'Applied'), ('conflict', 'Conflict'), ('not_found', 'Not found')], max_length=10)),
+                ('status', models.CharField(blank=True, max_length=20, null=True)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('gatepass', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='gate_events', to='gatepass.gatepass')),
+                ('recorded_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gate_events', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='gateevent',
+            constraint=models.UniqueConstraint(fields=('recorded_by', 'event_id'), name='gate_event_unique_per_guard'),
+        ),
+    ]
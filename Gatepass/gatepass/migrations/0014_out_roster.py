@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def _gender(value):
+    value = str(value or '').strip().upper()
+    return value if value in ('M', 'F') else ''
+
+
+def fill_roster(apps, schema_editor):
+    GatePass = apps.get_model('gatepass', 'GatePass')
+    OutRosterEntry = apps.get_model('gatepass', 'OutRosterEntry')
+    out = GatePass.objects.filter(status='security_approved').values_list(
+        'pk', 'student_id', 'student__user__gender', 'outing_date', 'outing_time',
+        'expected_return_date', 'expected_return_time', 'updated_at',
+    )
+    OutRosterEntry.objects.bulk_create([
+        OutRosterEntry(
+            gatepass_id=pk, student_id=student_id, gender=_gender(gender),
+            outing_date=outing_date, outing_time=outing_time, expected_return_date=return_date,
+            expected_return_time=return_time, left_at=updated_at,
+        )
+        for pk, student_id, gender, outing_date, outing_time, return_date, return_time, updated_at in out.iterator()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gatepass', '0013_gate_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutRosterEntry',
+            fields=[
+                ('gatepass', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='roster_entry', serialize=False, to='gatepass.gatepass')),
+                ('gender', models.CharField(blank=True, max_length=1)),
+                ('outing_date', models.DateField()),
+                ('outing_time', models.TimeField()),
+                ('expected_return_date', models.DateField()),
+                ('expected_return_time', models.TimeField()),
+                ('left_at', models.DateTimeField()),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='roster_entries', to='gatepass.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['gender', '-left_at'], name='roster_gender_left_idx'), models.Index(fields=['expected_return_date'], name='roster_return_date_idx')],
+            },
+        ),
+        migrations.RunPython(fill_roster, migrations.RunPython.noop),
+    ]
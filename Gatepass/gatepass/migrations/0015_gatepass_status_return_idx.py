@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gatepass', '0014_out_roster'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='gatepass',
+            name='gatepass_out_return_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='gatepass',
+            index=models.Index(fields=['status', 'expected_return_date'], name='gatepass_status_return_idx'),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import secrets
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.core.validators import RegexValidator
@@ -30,9 +32,23 @@ class User(AbstractUser):
     )
     gender = models.CharField(max_length=1, choices=GENDER_CHOICES, null=True, blank=True)
     is_approved = models.BooleanField(default=False)
+    # Maintained by gatepass.notifications; avoids COUNT(*) when rendering the bell
+    unread_notifications = models.IntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    def save(self, *args, **kwargs):
+        # The unread counter only moves through F() updates: a full save of a
+        # loaded user (admin form, profile edit, approval) must not write back
+        # the value it read while a notification arrived in between
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'unread_notifications' and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
 
@@ -87,6 +103,11 @@ class Security(models.Model):
         return f"{self.name} (Security)"
 
 
+def new_scan_token():
+    """Random lookup key for a gatepass's QR code (see ``gatepass.scan``)"""
+    return secrets.token_urlsafe(16)
+
+
 class GatePass(models.Model):
     """Gate pass request model"""
     
@@ -135,9 +156,32 @@ class GatePass(models.Model):
         limit_choices_to={'role': 'security'}
     )
     return_notes = models.TextField(max_length=500, null=True, blank=True)
+    # Unique (so indexed): the gate scan finds the pass by it; the QR code carries it signed
+    scan_token = models.CharField(max_length=22, unique=True, default=new_scan_token, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            # Dashboards: filter by status, newest first
+            models.Index(fields=['status', '-created_at'], name='gatepass_status_created_idx'),
+            # Student dashboard / API: one student's history, newest first
+            models.Index(fields=['student', '-created_at'], name='gatepass_student_created_idx'),
+            # API keyset pagination for unscoped (security/superadmin) lists
+            models.Index(fields=['-created_at', '-id'], name='gatepass_created_id_idx'),
+            # API delta sync: rows changed after a watermark
+            models.Index(fields=['updated_at', 'id'], name='gatepass_updated_id_idx'),
+            # Outing exports: status__in + outing_date range
+            models.Index(fields=['status', 'outing_date'], name='gatepass_status_outing_idx'),
+            # Security dashboard: a guard's exits and returns
+            models.Index(fields=['security_approval', 'status', '-created_at'], name='gatepass_exit_by_status_idx'),
+            models.Index(fields=['return_verified_by', 'status', '-created_at'], name='gatepass_return_by_status_idx'),
+            # Overdue counts: passes that are out, by expected return date. Not a
+            # partial index: the ORM sends the status as a parameter, and SQLite
+            # can only use a partial index when the condition is a literal
+            models.Index(fields=['status', 'expected_return_date'], name='gatepass_status_return_idx'),
+        ]
+    
     def __str__(self):
         return f"GatePass for {self.student.student_name} - {self.outing_date}"
     
@@ -182,5 +226,184 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            # Notification bell / dashboards: a user's latest notifications
+            models.Index(fields=['user', '-created_at'], name='notification_user_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_notification_type_display()} - {self.user.username}"
+
+
+class ScanWatermark(models.Model):
+    """Progress marker for background scans (e.g. overdue returns)"""
+    
+    name = models.CharField(max_length=50, unique=True)
+    scanned_for_date = models.DateField(null=True, blank=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    gatepasses_scanned = models.PositiveIntegerField(default=0)
+    notifications_created = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.name} (last run: {self.last_run_at})"
+
+
+class OutboundEmail(models.Model):
+    """Email waiting to be delivered by the ``send_queued_emails`` worker"""
+    
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    to_email = models.EmailField()
+    from_email = models.CharField(max_length=254)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='outbound_email_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
+
+
+class ExportJob(models.Model):
+    """Outing report generated in the background by the ``run_export_jobs`` worker"""
+    
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+        ('expired', 'Expired'),
+    ]
+    
+    filters = models.JSONField(default=dict)
+    export_format = models.CharField(max_length=10, default='xlsx')
+    # Identical filter sets (and format) share a key; data_version changes when the exported rows do
+    filters_key = models.CharField(max_length=64)
+    data_version = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    total_rows = models.PositiveIntegerField(default=0)
+    rows_written = models.PositiveIntegerField(default=0)
+    file_name = models.CharField(max_length=255, blank=True)
+    file_size = models.PositiveBigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='export_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['filters_key', 'data_version'], name='export_job_filters_idx'),
+            models.Index(fields=['status', 'id'], name='export_job_status_idx'),
+        ]
+    
+    @property
+    def progress(self):
+        """Percentage of rows written so far"""
+        if self.status == 'done':
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, self.rows_written * 100 // self.total_rows)
+    
+    def __str__(self):
+        return f"Export #{self.pk} ({self.status})"
+
+
+class GatePassTombstone(models.Model):
+    """
+    Record of a deleted gatepass, so delta-sync clients learn about deletions.
+
+    Keeps just enough of the gatepass to apply the same role/gender scoping
+    as the live rows.
+    """
+    
+    gatepass_id = models.PositiveIntegerField()
+    student_user_id = models.PositiveIntegerField(null=True, blank=True)
+    student_gender = models.CharField(max_length=1, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Deleted gatepass #{self.gatepass_id}"
+
+
+class GateEvent(models.Model):
+    """
+    Exit or return recorded on a gate terminal, possibly while offline.
+
+    Uploaded in batches (``gatepass.terminal``); ``event_id`` is the
+    terminal's own ID for the event, so uploading a batch again is harmless.
+    """
+    
+    KIND_CHOICES = [
+        ('exit', 'Exit'),
+        ('return', 'Return'),
+    ]
+    RESULT_CHOICES = [
+        ('applied', 'Applied'),
+        ('conflict', 'Conflict'),
+        ('not_found', 'Not found'),
+    ]
+    
+    event_id = models.CharField(max_length=64)
+    recorded_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='gate_events')
+    gatepass = models.ForeignKey(GatePass, on_delete=models.SET_NULL, null=True, blank=True, related_name='gate_events')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    occurred_at = models.DateTimeField()
+    result = models.CharField(max_length=10, choices=RESULT_CHOICES)
+    # The pass's status once the event was processed
+    status = models.CharField(max_length=20, null=True, blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['recorded_by', 'event_id'], name='gate_event_unique_per_guard'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} of gatepass #{self.gatepass_id} ({self.result})"
+
+
+class OutRosterEntry(models.Model):
+    """
+    A student who is out right now: one row per ``security_approved`` gatepass.
+
+    Maintained incrementally by ``gatepass.roster`` on exits and returns, so
+    "who is out" reads this table instead of the gatepass history.
+    """
+    
+    gatepass = models.OneToOneField(GatePass, on_delete=models.CASCADE, primary_key=True, related_name='roster_entry')
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='roster_entries')
+    # The student's gender, normalised to 'M'/'F' ('' if unknown), for warden scoping
+    gender = models.CharField(max_length=1, blank=True)
+    outing_date = models.DateField()
+    outing_time = models.TimeField()
+    expected_return_date = models.DateField()
+    expected_return_time = models.TimeField()
+    left_at = models.DateTimeField()
+    
+    class Meta:
+        indexes = [
+            # Warden's Students Out tab: one gender, latest exits first
+            models.Index(fields=['gender', '-left_at'], name='roster_gender_left_idx'),
+            # Overdue scan / superadmin overdue list
+            models.Index(fields=['expected_return_date'], name='roster_return_date_idx'),
+        ]
+    
     def __str__(self):
-        return f"{self.get_notification_type_display()} - {self.user.username}"
\ No newline at end of file
+        return f"Gatepass #{self.gatepass_id} out since {self.left_at}"
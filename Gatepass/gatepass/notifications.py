@@ -0,0 +1,222 @@
+"""
+Notification feed and unread-counter helpers.
+
+The notification bell is rendered on every authenticated page, so its data is
+kept off the database hot path:
+
+- The latest ``FEED_SIZE`` notifications per user are cached with Django's
+  cache framework and invalidated by the ``Notification`` signals in
+  ``gatepass.signals`` once the change commits (a reader that misses the
+  cache before the commit cannot cache the old feed for long). Other workers
+  only see the invalidation through a shared cache (``CACHE_DIR`` or
+  ``REDIS_URL``), so ``NOTIFICATION_FEED_TIMEOUT`` defaults to 0 - feeds are
+  not cached - with the per-process default.
+- ``User.unread_notifications`` is a denormalised counter maintained with
+  ``F()`` updates, so reading it costs nothing beyond the user row that the
+  auth middleware already loads.
+
+``bulk_create`` and queryset ``update()`` bypass signals; code that uses
+them must call ``notifications_created`` / ``sync_unread_counts``. Deletes,
+queryset and cascading ones included, are handled by the ``post_delete`` signal,
+one UPDATE per row; deletes of many rows (bulk admin actions, cascades from
+gatepasses or users) belong inside ``bulk_notification_deletes``, which adds
+the changes up per user.
+
+Views fan notifications out with ``notify_many``, which writes every
+recipient's row in one ``bulk_create`` (``bulk_notify`` for many messages). Recipient sets (wardens of a gender,
+approved security staff) are read fresh each time: one indexed query, and a
+per-process cache would keep deleted or revoked staff in other workers.
+"""
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from . import metrics
+from .events import publish_notifications
+from .models import Notification, User
+
+
+FEED_SIZE = 12
+
+_state = threading.local()
+
+
+def _feed_key(user_id):
+    return f'gatepass:notification-feed:{user_id}'
+
+
+def get_notification_feed(user_id):
+    """Return the user's latest notifications, from cache when possible"""
+    timeout = settings.NOTIFICATION_FEED_TIMEOUT
+    key = _feed_key(user_id)
+    feed = cache.get(key) if timeout > 0 else None
+    if feed is None:
+        feed = list(Notification.objects.filter(user_id=user_id).order_by('-created_at')[:FEED_SIZE])
+        if timeout > 0:
+            cache.set(key, feed, timeout)
+    return feed
+
+
+def invalidate_notification_feeds(user_ids):
+    """Drop the users' cached feeds when the current transaction commits (at once outside one)"""
+    keys = [_feed_key(user_id) for user_id in set(user_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def adjust_unread_counts(deltas):
+    """Apply {user_id: delta} to the unread counters, one UPDATE per distinct delta"""
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(user_id)
+    for delta, user_ids in by_delta.items():
+        User.objects.filter(pk__in=user_ids).update(unread_notifications=F('unread_notifications') + delta)
+
+
+def notifications_created(notifications):
+    """Bookkeeping for notifications written with ``bulk_create`` (which sends no signals)"""
+    adjust_unread_counts(Counter(n.user_id for n in notifications if not n.is_read))
+    invalidate_notification_feeds(n.user_id for n in notifications)
+    publish_notifications(notifications)
+    metrics.notifications_created(notifications)
+
+
+def notification_deleted(notification):
+    """Bookkeeping for one deleted notification (called from the ``post_delete`` signal)"""
+    pending = getattr(_state, 'deleted', None)
+    delta = 0 if notification.is_read else -1
+    if pending is not None:
+        pending[notification.user_id] += delta
+        return
+    adjust_unread_counts({notification.user_id: delta})
+    invalidate_notification_feeds([notification.user_id])
+
+
+@contextmanager
+def bulk_notification_deletes():
+    """
+    Delete notifications, directly or by cascade, with set-based bookkeeping.
+
+    Inside the block the ``post_delete`` signal only adds up each user's
+    unread delta; on exit the counters get one UPDATE per distinct delta and
+    the feeds one cache delete. Use it within ``transaction.atomic()``: an
+    exception skips the bookkeeping.
+    """
+    if getattr(_state, 'deleted', None) is not None:
+        # Nested: the outer block does the bookkeeping
+        yield
+        return
+    _state.deleted = deltas = Counter()
+    try:
+        yield
+    finally:
+        _state.deleted = None
+    adjust_unread_counts(deltas)
+    invalidate_notification_feeds(deltas)
+
+
+def sync_unread_counts():
+    """Recompute every user's unread counter from scratch (after bulk deletes/updates)"""
+    unread = (
+        Notification.objects
+        .filter(user=OuterRef('pk'), is_read=False)
+        .order_by()
+        .values('user')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    User.objects.update(unread_notifications=Coalesce(
+        Subquery(unread, output_field=IntegerField()), Value(0)
+    ))
+
+
+def warden_recipients(gender):
+    """
+    IDs of approved wardens with exactly this gender ('M' or 'F').
+
+    Students without a valid gender notify nobody (strict gender separation).
+    """
+    gender = str(gender or '').strip().upper()
+    if gender not in ('M', 'F'):
+        return []
+    return list(
+        User.objects.filter(role='warden', is_approved=True, gender__iexact=gender).values_list('pk', flat=True)
+    )
+
+
+def security_recipients():
+    """IDs of approved security staff"""
+    return list(User.objects.filter(role='security', is_approved=True).values_list('pk', flat=True))
+
+
+def notify_many(recipients, gatepass, notification_type, message):
+    """
+    Create the same notification for every recipient with a single INSERT.
+
+    ``recipients`` may contain users or user IDs. Returns the created notifications.
+    """
+    return bulk_notify([(recipients, gatepass, notification_type, message)])
+
+
+def bulk_notify(entries):
+    """
+    ``notify_many`` for several messages at once: one INSERT for every
+    ``(recipients, gatepass, notification_type, message)`` entry.
+    """
+    notifications = [
+        Notification(
+            user_id=user_id,
+            gatepass=gatepass,
+            notification_type=notification_type,
+            message=message
+        )
+        for recipients, gatepass, notification_type, message in entries
+        for user_id in sorted({getattr(recipient, 'pk', recipient) for recipient in recipients})
+    ]
+    if not notifications:
+        return []
+    notifications = Notification.objects.bulk_create(notifications)
+    notifications_created(notifications)
+    return notifications
+
+
+class NotificationFeed:
+    """
+    Lazy notification feed for templates.
+
+    Nothing is fetched until the template iterates, slices or tests the feed,
+    so pages that never render the bell pay nothing.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._items = None
+
+    @property
+    def items(self):
+        if self._items is None:
+            self._items = get_notification_feed(self.user.pk)
+        return self._items
+
+    @property
+    def unread_count(self):
+        return max(self.user.unread_notifications, 0)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
@@ -0,0 +1,104 @@
+"""
+Durable outbound email queue.
+
+Request handlers never talk to SMTP: ``queue_email`` stores the message in
+``OutboundEmail`` within the caller's transaction, so it commits (or rolls
+back) together with the rows it is about, and the ``send_queued_emails``
+worker delivers queued rows in batches, one SMTP connection per batch.
+
+Delivery is at-least-once: a row claimed by a worker that dies mid-batch is
+picked up again after ``CLAIM_TIMEOUT``. Bodies are blanked once sent because
+registration emails contain the account password.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_ATTEMPTS = 5
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+DeliveryResult = namedtuple('DeliveryResult', 'sent failed')
+
+
+def queue_email(to_email, subject, body, from_email=None):
+    """Queue an email for the worker, in the current transaction: nothing is stored if it rolls back"""
+    if not to_email:
+        return
+    OutboundEmail.objects.create(
+        to_email=to_email,
+        from_email=from_email or getattr(settings, 'DEFAULT_FROM_EMAIL', 'no-reply@gatepass.local'),
+        subject=subject,
+        body=body,
+    )
+
+
+def _claim_batch(batch_size):
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutboundEmail.objects
+            .select_for_update(skip_locked=True)
+            .filter(Q(status='queued') | Q(status='sending', claimed_at__lt=now - CLAIM_TIMEOUT))
+            .order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        OutboundEmail.objects.filter(id__in=ids).update(
+            status='sending', claimed_at=now, attempts=F('attempts') + 1
+        )
+    return list(OutboundEmail.objects.filter(id__in=ids).order_by('id'))
+
+
+def deliver_queued_emails(batch_size=DEFAULT_BATCH_SIZE, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    Send one batch of queued emails over a single backend connection.
+
+    Failed messages go back to the queue until they have been tried
+    ``max_attempts`` times, then stay ``failed`` with the last error.
+    """
+    emails = _claim_batch(batch_size)
+    if not emails:
+        return DeliveryResult(0, 0)
+
+    sent_ids = []
+    errors = {}
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+        for email in emails:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email, [email.to_email], connection=connection
+            )
+            try:
+                message.send()
+                sent_ids.append(email.id)
+            except Exception as exc:
+                errors[email.id] = str(exc) or exc.__class__.__name__
+    except Exception as exc:
+        # Could not connect at all: the whole batch is retried
+        for email in emails:
+            errors.setdefault(email.id, str(exc) or exc.__class__.__name__)
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    if sent_ids:
+        OutboundEmail.objects.filter(id__in=sent_ids).update(
+            status='sent', sent_at=timezone.now(), body='', last_error=''
+        )
+    failed = [email for email in emails if email.id in errors]
+    for email in failed:
+        email.status = 'failed' if email.attempts >= max_attempts else 'queued'
+        email.last_error = errors[email.id]
+    OutboundEmail.objects.bulk_update(failed, ['status', 'last_error'])
+    return DeliveryResult(len(sent_ids), len(failed))
@@ -0,0 +1,103 @@
+"""
+Overdue-return scanner.
+
+Dashboards used to run this check synchronously on every hit. It now runs out
+of band through the ``scan_overdue_returns`` management command, which walks
+overdue passes in id-ordered batches, looks up "already notified today" once
+per batch and writes notifications with a single ``bulk_create``.
+
+A ``ScanWatermark`` row remembers the last run. Once a day has been fully
+swept, later runs on the same day only look at passes touched since the
+previous run (e.g. an exit recorded late for a pass that is already overdue).
+"""
+from django.utils import timezone
+
+from .models import GatePass, Notification, ScanWatermark, User
+from .notifications import notifications_created
+
+
+WATERMARK_NAME = 'overdue_returns'
+DEFAULT_BATCH_SIZE = 500
+
+
+def _overdue_notifications(gatepass, superadmin):
+    """Build (unsaved) overdue notifications for the warden, superadmin and student"""
+    student = gatepass.student
+    notifications = []
+    if gatepass.warden_approval_id:
+        notifications.append(Notification(
+            user_id=gatepass.warden_approval_id,
+            gatepass=gatepass,
+            notification_type='overdue_return',
+            message=f"URGENT: Student {student.student_name} has not returned after expected date {gatepass.expected_return_date}. Parent contact: {student.parent_mobile}"
+        ))
+    if superadmin:
+        notifications.append(Notification(
+            user=superadmin,
+            gatepass=gatepass,
+            notification_type='overdue_return',
+            message=f"URGENT: Student {student.student_name} (Hall Ticket: {student.hall_ticket_no}) has not returned after expected date {gatepass.expected_return_date}. Parent contact: {student.parent_mobile}"
+        ))
+    notifications.append(Notification(
+        user_id=student.user_id,
+        gatepass=gatepass,
+        notification_type='overdue_return',
+        message=f"URGENT: You have not returned to the hostel after your expected return date {gatepass.expected_return_date}. Please contact the hostel immediately."
+    ))
+    return notifications
+
+
+def scan_overdue_returns(today=None, batch_size=DEFAULT_BATCH_SIZE, force=False):
+    """
+    Notify everyone involved about passes that are past their expected return date.
+
+    Returns the updated ``ScanWatermark`` (its counters describe this run).
+    Pass ``force=True`` to rescan every overdue pass even if today was already swept.
+    """
+    started_at = timezone.now()
+    today = today or timezone.localdate()
+    watermark, _ = ScanWatermark.objects.get_or_create(name=WATERMARK_NAME)
+
+    # Passes that are out, found through the out roster (``gatepass.roster``)
+    overdue = GatePass.objects.filter(roster_entry__expected_return_date__lt=today)
+    if not force and watermark.scanned_for_date == today and watermark.last_run_at:
+        # Today has already been swept; only passes changed since then can be new
+        overdue = overdue.filter(updated_at__gte=watermark.last_run_at)
+    overdue = overdue.select_related('student').order_by('id')
+
+    superadmin = User.objects.filter(role='superadmin').order_by('id').first()
+
+    scanned = 0
+    created = 0
+    last_id = 0
+    while True:
+        batch = list(overdue.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        scanned += len(batch)
+
+        # One set-based lookup per batch instead of one exists() per pass
+        already_notified = set(
+            Notification.objects.filter(
+                gatepass_id__in=[gatepass.id for gatepass in batch],
+                notification_type='overdue_return',
+                created_at__date=today
+            ).values_list('gatepass_id', flat=True)
+        )
+
+        to_create = []
+        for gatepass in batch:
+            if gatepass.id not in already_notified:
+                to_create.extend(_overdue_notifications(gatepass, superadmin))
+        if to_create:
+            Notification.objects.bulk_create(to_create, batch_size=batch_size)
+            notifications_created(to_create)
+            created += len(to_create)
+
+    watermark.scanned_for_date = today
+    watermark.last_run_at = started_at
+    watermark.gatepasses_scanned = scanned
+    watermark.notifications_created = created
+    watermark.save()
+    return watermark
@@ -0,0 +1,307 @@
+"""
+Per-request performance instrumentation.
+
+``PerformanceMiddleware`` times every request and counts it in a per-view
+aggregate. A share of requests (``settings.PERF_SAMPLE_RATE``) is also
+*measured*:
+
+- every query, through a wrapper that ``connection_created`` installs on each
+  database connection. It is a no-op unless the current request is measured,
+  and follows the request into ``sync_to_async`` threads (it is a context
+  variable);
+- template rendering, through ``DjangoTemplates``, the project's template
+  backend;
+- the response size.
+
+A measured request gets a ``Server-Timing`` header (total, db, tpl) and a
+JSON log line on the ``gatepass.perf`` logger: INFO normally, WARNING when it
+took longer than ``PERF_SLOW_MS`` or ran the same statement (ignoring
+parameters) ``PERF_SIMILAR_QUERIES`` times or more, the N+1 signature. The
+flagged statement is in the line.
+
+Each process flushes its aggregate to the cache at most every
+``FLUSH_INTERVAL`` seconds; ``view_stats()`` merges the workers that share
+the cache (see ``CACHES``: the default local-memory cache only sees its own
+process). The super admin's Performance page shows it. Every request is also
+recorded in the ``gatepass.metrics`` latency histogram.
+"""
+import json
+import logging
+import os
+import random
+import re
+import socket
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.template.backends import django as django_backend
+
+from . import metrics
+
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 30
+STATS_TIMEOUT = 24 * 60 * 60
+_WORKERS_KEY = 'gatepass:perf:workers'
+_WORKER = f'{socket.gethostname()}:{os.getpid()}'
+
+# Totals kept per view; the ones after ``sampled`` only cover measured requests
+STAT_FIELDS = ['requests', 'total_ms', 'max_ms', 'sampled', 'queries', 'db_ms', 'template_ms', 'bytes', 'slow', 'n_plus_one']
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+
+_current = ContextVar('gatepass_perf_measurement', default=None)
+
+
+def normalize_sql(sql):
+    """The statement with ``IN`` lists of any length folded together"""
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+class Measurement:
+    """What one measured request did"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.rendering = False
+        self.statements = Counter()
+        self.executions = Counter()
+
+    def query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - started) * 1000
+            self.queries += 1
+            self.statements[normalize_sql(sql)] += 1
+            self.executions[sql, repr(params)] += 1
+
+    @property
+    def duplicates(self):
+        """Executions that repeated an earlier one exactly, parameters included"""
+        return sum(count - 1 for count in self.executions.values())
+
+    def most_repeated(self):
+        """(statement, times) of the statement run most often, or (None, 0)"""
+        return self.statements.most_common(1)[0] if self.statements else (None, 0)
+
+
+@contextmanager
+def measuring():
+    """Measure the queries and template renders inside the block; yields the ``Measurement``"""
+    measurement = Measurement()
+    token = _current.set(measurement)
+    try:
+        yield measurement
+    finally:
+        _current.reset(token)
+
+
+def _query(execute, sql, params, many, context):
+    measurement = _current.get()
+    if measurement is None:
+        return execute(sql, params, many, context)
+    return measurement.query(execute, sql, params, many, context)
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    """``connection_created`` receiver"""
+    if _query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Django's template backend, timing renders during measured requests"""
+
+    def from_string(self, template_code):
+        return Template(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return Template(super().get_template(template_name))
+
+
+class Template:
+
+    def __init__(self, template):
+        self._template = template
+
+    def __getattr__(self, name):
+        return getattr(self._template, name)
+
+    def render(self, context=None, request=None):
+        measurement = _current.get()
+        if measurement is None or measurement.rendering:
+            return self._template.render(context, request)
+        measurement.rendering = True
+        started = time.perf_counter()
+        try:
+            return self._template.render(context, request)
+        finally:
+            measurement.template_ms += (time.perf_counter() - started) * 1000
+            measurement.rendering = False
+
+
+# --- Aggregates ------------------------------------------------------------
+
+_lock = threading.Lock()
+_stats = defaultdict(lambda: dict.fromkeys(STAT_FIELDS, 0))
+_last_flush = 0.0
+
+
+def _count(view, total_ms, entry):
+    global _last_flush
+    with _lock:
+        stats = _stats[view]
+        stats['requests'] += 1
+        stats['total_ms'] += total_ms
+        stats['max_ms'] = max(stats['max_ms'], total_ms)
+        if entry:
+            stats['sampled'] += 1
+            stats['queries'] += entry['queries']
+            stats['db_ms'] += entry['db_ms']
+            stats['template_ms'] += entry['template_ms']
+            stats['bytes'] += entry['bytes'] or 0
+            stats['slow'] += 'slow' in entry['flags']
+            stats['n_plus_one'] += 'n+1' in entry['flags']
+        due = time.monotonic() - _last_flush >= FLUSH_INTERVAL
+        if due:
+            _last_flush = time.monotonic()
+    if due:
+        flush()
+
+
+def flush():
+    """Publish this process's aggregate to the cache"""
+    with _lock:
+        snapshot = {view: dict(stats) for view, stats in _stats.items()}
+    cache.set(f'gatepass:perf:{_WORKER}', snapshot, STATS_TIMEOUT)
+    workers = cache.get(_WORKERS_KEY) or set()
+    if _WORKER not in workers:
+        cache.set(_WORKERS_KEY, workers | {_WORKER}, STATS_TIMEOUT)
+
+
+def view_stats():
+    """
+    Per-view totals of every worker sharing the cache, busiest first: dicts of
+    ``STAT_FIELDS`` plus ``view`` and per-request averages.
+    """
+    flush()
+    workers = cache.get(_WORKERS_KEY) or set()
+    merged = defaultdict(lambda: dict.fromkeys(STAT_FIELDS, 0))
+    for snapshot in cache.get_many([f'gatepass:perf:{worker}' for worker in workers]).values():
+        for view, stats in snapshot.items():
+            totals = merged[view]
+            for field in STAT_FIELDS:
+                totals[field] = max(totals[field], stats[field]) if field == 'max_ms' else totals[field] + stats[field]
+    rows = []
+    for view, totals in merged.items():
+        sampled = totals['sampled'] or 1
+        rows.append({
+            'view': view, **totals,
+            'avg_ms': totals['total_ms'] / totals['requests'],
+            'avg_queries': totals['queries'] / sampled,
+            'avg_db_ms': totals['db_ms'] / sampled,
+            'avg_template_ms': totals['template_ms'] / sampled,
+            'avg_bytes': totals['bytes'] / sampled,
+        })
+    return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+
+def reset():
+    """Forget this process's aggregate"""
+    with _lock:
+        _stats.clear()
+
+
+# --- Middleware ------------------------------------------------------------
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unresolved'
+
+
+def _response_size(response):
+    if not response.streaming:
+        return len(response.content)
+    length = response.get('Content-Length')
+    return int(length) if length else None
+
+
+def _report(request, response, total_ms, measurement):
+    """Count the request; for a measured one also add Server-Timing and log it"""
+    entry = None
+    if measurement is not None:
+        statement, times = measurement.most_repeated()
+        entry = {
+            'view': _view_name(request),
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 1),
+            'queries': measurement.queries,
+            'db_ms': round(measurement.db_ms, 1),
+            'template_ms': round(measurement.template_ms, 1),
+            'bytes': _response_size(response),
+            'duplicates': measurement.duplicates,
+            'flags': [],
+        }
+        if total_ms >= settings.PERF_SLOW_MS:
+            entry['flags'].append('slow')
+        if times >= settings.PERF_SIMILAR_QUERIES:
+            entry['flags'].append('n+1')
+            entry['repeated'] = {'times': times, 'sql': statement}
+        response['Server-Timing'] = (
+            f'total;dur={total_ms:.1f}, db;dur={measurement.db_ms:.1f};desc="{measurement.queries} queries", '
+            f'tpl;dur={measurement.template_ms:.1f}'
+        )
+        logger.log(logging.WARNING if entry['flags'] else logging.INFO, json.dumps(entry))
+    _count(_view_name(request), total_ms, entry)
+    metrics.request_finished(_view_name(request), request.method, response.status_code, total_ms / 1000)
+
+
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _sampled(self):
+        rate = settings.PERF_SAMPLE_RATE
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        if not self._sampled():
+            response = self.get_response(request)
+            _report(request, response, (time.perf_counter() - started) * 1000, None)
+            return response
+        with measuring() as measurement:
+            response = self.get_response(request)
+        _report(request, response, (time.perf_counter() - started) * 1000, measurement)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        if not self._sampled():
+            response = await self.get_response(request)
+            _report(request, response, (time.perf_counter() - started) * 1000, None)
+            return response
+        with measuring() as measurement:
+            response = await self.get_response(request)
+        _report(request, response, (time.perf_counter() - started) * 1000, measurement)
+        return response
@@ -0,0 +1,98 @@
+"""
+Role profiles, cached.
+
+Students, wardens and security staff each have a profile row (``Student``,
+``Warden``, ``Security``) next to their ``User``, which pages used to look up
+with a query on every request. ``profile_for(user)`` reads it from the cache
+instead: one query on a miss, and a user without a profile is remembered as
+such too. ``ProfileMiddleware`` puts it on ``request.profile``, resolved on
+first use like ``request.user``.
+
+The returned profile has ``user`` set to the given user, and the user's
+reverse accessor (``user.student_profile`` etc.) is filled in, so neither
+direction costs a query.
+
+Saving or deleting a profile, or saving its user, drops the cached entry
+(``gatepass.signals``). Queryset ``update()`` does not. With the default
+per-process cache, other workers may serve a changed profile for up to
+``PROFILE_CACHE_TIMEOUT`` seconds.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+from django.utils.functional import SimpleLazyObject
+
+from .models import Security, Student, Warden
+
+
+PROFILE_MODELS = {'student': Student, 'warden': Warden, 'security': Security}
+PROFILE_TIMEOUT = getattr(settings, 'PROFILE_CACHE_TIMEOUT', 300)
+
+# Cached for users whose role has no profile row (cache.get returns None for misses)
+_NO_PROFILE = 'none'
+
+
+def _key(user_id):
+    return f'gatepass:profile:{user_id}'
+
+
+def profile_for(user):
+    """The ``Student``, ``Warden`` or ``Security`` row of ``user``, or None"""
+    if not user.is_authenticated:
+        return None
+    try:
+        return user._gatepass_profile
+    except AttributeError:
+        pass
+    model = PROFILE_MODELS.get(user.role)
+    profile = None
+    if model is not None:
+        cached = cache.get(_key(user.pk))
+        if isinstance(cached, model):
+            profile = cached
+        elif cached != _NO_PROFILE:
+            profile = model.objects.filter(user_id=user.pk).first()
+            cache.set(_key(user.pk), profile or _NO_PROFILE, PROFILE_TIMEOUT)
+    if profile is not None:
+        # Also fills the reverse one-to-one cache on the user
+        profile.user = user
+    user._gatepass_profile = profile
+    return profile
+
+
+def require_profile(request, model):
+    """The request's profile if it is a ``model``; 404 otherwise, like ``get_object_or_404(model, user=...)``"""
+    profile = profile_for(request.user)
+    if not isinstance(profile, model):
+        raise Http404(f'No {model._meta.object_name} matches the given query.')
+    return profile
+
+
+def invalidate(user_id):
+    cache.delete(_key(user_id))
+
+
+class ProfileMiddleware:
+    """
+    Sets ``request.profile``. It is resolved on first use, through
+    ``request.user`` at that time, so DRF token users get theirs too; async
+    code must resolve it with ``sync_to_async(profile_for)``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.profile = SimpleLazyObject(lambda: profile_for(request.user))
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.profile = SimpleLazyObject(lambda: profile_for(request.user))
+        return await self.get_response(request)
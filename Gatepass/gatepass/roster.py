@@ -0,0 +1,107 @@
+"""
+"Who is out right now": the ``OutRosterEntry`` table.
+
+One row per ``security_approved`` gatepass, keyed by the pass, with the
+student, the student's gender and the outing and expected return. It is
+maintained incrementally, in the same transaction as the change:
+
+- ``transitions`` add rows on exit and remove them on return (one statement
+  per call, however many passes a bulk step moves);
+- ``signals`` cover ``save()`` of a pass (admin edits, fixtures) and changes
+  of a student's gender;
+- deleting a pass deletes its row (cascade).
+
+Queryset ``update()`` and ``bulk_create`` of gatepasses bypass all of that;
+``reconcile()`` (``python manage.py reconcile_out_roster``) rebuilds the
+table and reports the drift it found.
+
+The warden's Students Out tab, the "Students Out" export sheet, the
+superadmin's overdue list and ``scan_overdue_returns`` read the roster, so
+their cost follows the number of students out, not the gatepass history.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+
+from .models import GatePass, OutRosterEntry
+
+
+OUT = 'security_approved'
+
+# Copied from the gatepass; ``left_at`` is only set when the row is created
+_FIELDS = ['student', 'gender', 'outing_date', 'outing_time', 'expected_return_date', 'expected_return_time']
+
+# Gatepass ids by kind of drift
+Drift = namedtuple('Drift', 'missing stale changed')
+
+
+def normalize_gender(value):
+    gender = str(value or '').strip().upper()
+    return gender if gender in ('M', 'F') else ''
+
+
+def _entry(gatepass):
+    return OutRosterEntry(
+        gatepass=gatepass,
+        student_id=gatepass.student_id,
+        gender=normalize_gender(gatepass.student.user.gender),
+        outing_date=gatepass.outing_date,
+        outing_time=gatepass.outing_time,
+        expected_return_date=gatepass.expected_return_date,
+        expected_return_time=gatepass.expected_return_time,
+        left_at=gatepass.updated_at,
+    )
+
+
+def _values(entry):
+    return tuple(getattr(entry, field if field != 'student' else 'student_id') for field in _FIELDS)
+
+
+def sync(gatepasses):
+    """
+    Bring the roster in line with ``gatepasses``: add or refresh the ones that
+    are out, drop the others. Students and their users must be loaded.
+    """
+    out = [gatepass for gatepass in gatepasses if gatepass.status == OUT]
+    back = [gatepass.pk for gatepass in gatepasses if gatepass.status != OUT]
+    if out:
+        OutRosterEntry.objects.bulk_create(
+            [_entry(gatepass) for gatepass in out],
+            update_conflicts=True, unique_fields=['gatepass'], update_fields=_FIELDS,
+        )
+    if back:
+        OutRosterEntry.objects.filter(gatepass_id__in=back).delete()
+
+
+def student_gender_changed(user):
+    """Re-scope the roster rows of ``user``'s student after a gender change"""
+    OutRosterEntry.objects.filter(student__user=user).exclude(
+        gender=normalize_gender(user.gender)
+    ).update(gender=normalize_gender(user.gender))
+
+
+def reconcile(fix=True):
+    """
+    Compare the roster with the gatepasses that are out and, if ``fix``,
+    rebuild the rows that differ. Returns the ``Drift`` found.
+    """
+    with transaction.atomic():
+        expected = {
+            gatepass.pk: _entry(gatepass)
+            for gatepass in GatePass.objects.filter(status=OUT).select_related('student__user').iterator()
+        }
+        actual = {entry.gatepass_id: entry for entry in OutRosterEntry.objects.iterator()}
+        drift = Drift(
+            missing=sorted(expected.keys() - actual.keys()),
+            stale=sorted(actual.keys() - expected.keys()),
+            changed=sorted(
+                pk for pk in expected.keys() & actual.keys() if _values(expected[pk]) != _values(actual[pk])
+            ),
+        )
+        if fix:
+            OutRosterEntry.objects.filter(gatepass_id__in=drift.stale).delete()
+            OutRosterEntry.objects.bulk_create(
+                [expected[pk] for pk in drift.missing + drift.changed],
+                update_conflicts=True, unique_fields=['gatepass'], update_fields=_FIELDS, batch_size=500,
+            )
+    return drift
@@ -0,0 +1,81 @@
+"""
+Gate scans: exit and return from a gatepass's QR code.
+
+The code is ``<scan_token>:<signature>`` (``django.core.signing``, salted per
+purpose). ``scan()`` checks the signature against ``SECRET_KEY`` before
+touching the database, so a forged or mistyped code is refused without a
+query. A valid code costs one indexed SELECT on ``GatePass.scan_token`` and
+the step the pass is due for:
+
+- ``warden_approved``: the student leaves (``security_approve``);
+- ``security_approved``: the student is back (``record_return``, stamped now).
+
+Both go through ``transitions.transition``, so two guards scanning the same
+code at once get one exit and one conflict. The step and the student's
+notification are written in one transaction.
+"""
+from collections import namedtuple
+
+from django.core import signing
+from django.db import transaction
+from django.utils import timezone
+
+from .models import GatePass
+from .notifications import notify_many
+from .transitions import TransitionResult, transition
+
+
+_signer = signing.Signer(salt='gatepass.scan')
+
+# Status the pass is in -> (transition, scan action reported to the guard)
+SCAN_STEPS = {
+    'warden_approved': ('security_approve', 'exit'),
+    'security_approved': ('record_return', 'return'),
+}
+
+# ``gatepass`` is None when no pass has the token
+ScanResult = namedtuple('ScanResult', 'action gatepass transition')
+
+
+class InvalidScanCode(ValueError):
+    pass
+
+
+def scan_code(gatepass):
+    """The signed code to print as the gatepass's QR code"""
+    return _signer.sign(gatepass.scan_token)
+
+
+def read_scan_code(code):
+    """The scan token in ``code``; raises ``InvalidScanCode`` if it was not signed here"""
+    try:
+        return _signer.unsign(str(code).strip())
+    except signing.BadSignature:
+        raise InvalidScanCode('Invalid scan code')
+
+
+def scan(code, guard):
+    """Let the student out or back in, whichever the pass is due for"""
+    token = read_scan_code(code)
+    try:
+        gatepass = GatePass.objects.select_related('student__user').get(scan_token=token)
+    except GatePass.DoesNotExist:
+        return ScanResult(None, None, TransitionResult(False, None))
+    if gatepass.status not in SCAN_STEPS:
+        return ScanResult(None, gatepass, TransitionResult(False, gatepass.status))
+
+    action, label = SCAN_STEPS[gatepass.status]
+    with transaction.atomic():
+        if action == 'security_approve':
+            result = transition(gatepass, action, guard)
+            message = "Your gatepass has been approved by security. You can now leave the campus."
+            notification_type = 'security_approval'
+        else:
+            now = timezone.localtime()
+            result = transition(gatepass, action, guard,
+                                actual_return_date=now.date(), actual_return_time=now.time().replace(microsecond=0))
+            message = f"Your return has been recorded on {gatepass.actual_return_date} at {gatepass.actual_return_time}"
+            notification_type = 'return_recorded'
+        if result.applied:
+            notify_many([gatepass.student.user_id], gatepass, notification_type, message)
+    return ScanResult(label, gatepass, result)
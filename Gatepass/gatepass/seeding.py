@@ -0,0 +1,314 @@
+"""
+Sample data at production scale (``python manage.py generate_sample_data``).
+
+Writing hundreds of thousands of rows one ``save()`` at a time is dominated
+by PBKDF2 and per-row round trips, so ``generate`` instead:
+
+- hashes each role's password once and gives every user of the role that hash;
+- writes students in batches of ``batch_size``; each batch is one
+  transaction with a ``bulk_create`` per table: users, students, their
+  gatepass history, parent verifications and notifications;
+- draws everything from one ``random.Random(seed)``, so a seed always gives
+  the same data set. Dates are relative to today.
+
+Each student gets ``0..2*passes`` gatepasses created over the last ``days``
+days, in the afternoon and evening. Statuses follow the dates. Future
+outings are still pending or decided. Students whose outing is under way
+are mostly out. Past outings are mostly returned, with a few overdue or
+never used. Approvals, exits and returns carry their own timestamps, and
+``updated_at`` is the latest of them.
+
+Notifications mirror what the views send to students for every pass.
+Every warden of the student's gender and every guard also get a copy of
+each request and warden approval, so that fan-out is limited to the last
+``staff_days`` days; otherwise staff would own most of the table.
+
+``bulk_create`` sends no signals. ``generate`` rebuilds what the signals
+maintain: the out roster, the unread counters and the notification feeds.
+"""
+import base64
+import random
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from . import roster
+from .models import GatePass, Notification, ParentVerification, Security, Student, User, Warden
+from .notifications import invalidate_notification_feeds, sync_unread_counts
+
+
+PASSWORDS = {
+    'warden': 'Warden@123',
+    'security': 'Security@123',
+    'student': 'Student@123',
+}
+
+FIRST_NAMES = ['Raj', 'Priya', 'Amit', 'Neha', 'Arjun', 'Isha', 'Vikram', 'Ananya', 'Rohan', 'Diya']
+LAST_NAMES = ['Singh', 'Patel', 'Kumar', 'Sharma', 'Gupta', 'Reddy', 'Verma', 'Joshi', 'Nair', 'Rao']
+ROOMS = ['A101', 'A102', 'B101', 'B102', 'C101', 'C102', 'D101', 'D102']
+DEPARTMENTS = ['Boys Hostel A', 'Boys Hostel B', 'Girls Hostel A', 'Girls Hostel B', 'Central']
+SHIFTS = ['Morning', 'Afternoon', 'Night']
+PURPOSES = [
+    'Home visit', 'Medical emergency', 'Family emergency', 'Doctor appointment',
+    'University work', 'Project work', 'Interview', 'Personal work',
+]
+REJECTION_REASONS = ['Exams this week', 'Parent not reachable', 'Too many outings this month', 'Incomplete details']
+
+# Student usernames are student_1000, student_1001, ...
+FIRST_STUDENT = 1000
+
+APPROVED = ('warden_approved', 'security_approved', 'returned', 'completed')
+LEFT = ('security_approved', 'returned', 'completed')
+BACK = ('returned', 'completed')
+
+Generated = namedtuple('Generated', 'wardens security students gatepasses notifications')
+
+
+@contextmanager
+def given_timestamps(*models):
+    """
+    Make the ``auto_now``/``auto_now_add`` fields of ``models`` keep the
+    values set on the instance, so ``bulk_create`` can write a history.
+    Affects the whole process while active.
+    """
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def hall_ticket(number):
+    return f'20{number % 24:02d}{number:05d}'
+
+
+def mobile(prefix, number):
+    """Unique 10-digit numbers per ``prefix`` digit (random ones collide at this scale)"""
+    return f'{prefix}{number:09d}'
+
+
+class SampleData:
+    """Row factories sharing one random generator, clock and set of password hashes"""
+
+    def __init__(self, rng, now, days, staff_days, passes):
+        self.rng = rng
+        self.now = now
+        self.today = timezone.localdate(now)
+        self.days = days
+        self.staff_since = now - timedelta(days=staff_days)
+        self.passes = passes
+        self.hashes = {role: make_password(password) for role, password in PASSWORDS.items()}
+        self.wardens = {'M': [], 'F': []}
+        self.guards = []
+
+    def at(self, day, clock):
+        return timezone.make_aware(datetime.combine(day, clock))
+
+    def user(self, role, username, **fields):
+        joined = self.now - timedelta(days=self.days + self.rng.uniform(1, 30))
+        return User(
+            username=username, password=self.hashes[role], role=role, is_approved=True,
+            email=f"{username.replace('_', '')}@gatepass.com", date_joined=joined,
+            created_at=joined, updated_at=joined, **fields,
+        )
+
+    def staff(self, role, count):
+        """Wardens (of alternating gender) or guards ``<role>_1..count`` that do not exist yet"""
+        existing = set(User.objects.filter(username__startswith=f'{role}_').values_list('username', flat=True))
+        numbers = [n for n in range(1, count + 1) if f'{role}_{n}' not in existing]
+        users = User.objects.bulk_create([
+            self.user(
+                role, f'{role}_{n}', first_name=f'{role.title()}{n}',
+                mobile_number=mobile(7 if role == 'warden' else 6, n),
+                gender='MF'[n % 2] if role == 'warden' else 'M',
+            )
+            for n in numbers
+        ])
+        if role == 'warden':
+            Warden.objects.bulk_create([
+                Warden(user=user, name=f'Warden {n}', department=self.rng.choice(DEPARTMENTS))
+                for n, user in zip(numbers, users)
+            ])
+        else:
+            Security.objects.bulk_create([
+                Security(user=user, name=f'Security Staff {n}', shift=self.rng.choice(SHIFTS))
+                for n, user in zip(numbers, users)
+            ])
+        return len(users)
+
+    def load_staff(self):
+        for user_id, role, gender in User.objects.filter(
+            role__in=['warden', 'security'], is_approved=True,
+        ).order_by('pk').values_list('pk', 'role', 'gender'):
+            if role == 'security':
+                self.guards.append(user_id)
+            elif gender in self.wardens:
+                self.wardens[gender].append(user_id)
+
+    def students(self, numbers):
+        """Users and students numbered ``numbers``"""
+        people = [
+            (n, self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES), self.rng.choice('MF'))
+            for n in numbers
+        ]
+        users = User.objects.bulk_create([
+            self.user('student', f'student_{n}', first_name=first, last_name=last, gender=gender,
+                      mobile_number=mobile(9, n))
+            for n, first, last, gender in people
+        ])
+        return Student.objects.bulk_create([
+            Student(
+                user=user, hall_ticket_no=hall_ticket(n), student_name=f'{first} {last}',
+                room_no=self.rng.choice(ROOMS), parent_name=f'{first} Parent', parent_mobile=mobile(8, n),
+            )
+            for user, (n, first, last, gender) in zip(users, people)
+        ])
+
+    def status(self, outing_date, return_date):
+        roll = self.rng.random()
+        if outing_date > self.today:
+            return 'pending' if roll < 0.55 else 'warden_approved' if roll < 0.9 else 'warden_rejected'
+        if outing_date == self.today:
+            return ('pending' if roll < 0.15 else 'warden_approved' if roll < 0.5
+                    else 'security_approved' if roll < 0.9 else 'warden_rejected')
+        if return_date >= self.today:
+            return 'security_approved' if roll < 0.75 else 'returned' if roll < 0.9 else 'warden_rejected'
+        if roll < 0.82:
+            return 'returned'
+        if roll < 0.87:
+            return 'completed'
+        if roll < 0.97:
+            return 'warden_rejected'
+        # Overdue, or approved and never used
+        return 'security_approved' if roll < 0.985 else 'warden_approved'
+
+    def gatepass(self, student):
+        """A gatepass, its parent verification and its notifications, all unsaved"""
+        rng = self.rng
+        user = student.user
+        day = timezone.localdate(self.now - timedelta(days=rng.uniform(0, self.days)))
+        created = min(self.at(day, time()) + timedelta(hours=rng.triangular(8, 23, 19)), self.now)
+        outing_date = timezone.localdate(created) + timedelta(days=rng.choice([0, 0, 1, 1, 1, 2, 3, 5]))
+        outing_time = time(rng.randint(8, 16), rng.choice([0, 30]))
+        return_date = outing_date + timedelta(days=rng.choice([0, 0, 1, 1, 2, 3, 7]))
+        return_time = time(rng.randint(18, 21), rng.choice([0, 30]))
+        status = self.status(outing_date, return_date)
+
+        gatepass = GatePass(
+            student=student, outing_date=outing_date, outing_time=outing_time,
+            expected_return_date=return_date, expected_return_time=return_time,
+            purpose=rng.choice(PURPOSES), status=status, scan_token=self.token(),
+            created_at=created, updated_at=created,
+        )
+        notes = [(created, self.wardens.get(user.gender, []), 'gatepass_request',
+                  f'New gatepass request from {student.student_name}')]
+        if status != 'pending':
+            decided = min(created + timedelta(hours=rng.uniform(0.2, 10)), self.now)
+            wardens = self.wardens.get(user.gender) or self.wardens['M'] + self.wardens['F']
+            gatepass.warden_approval_id = rng.choice(wardens) if wardens else None
+            gatepass.updated_at = decided
+        if status == 'warden_rejected':
+            gatepass.warden_rejection_reason = rng.choice(REJECTION_REASONS)
+            notes.append((decided, [user.pk], 'warden_rejection',
+                          f'Your gatepass request has been rejected. Reason: {gatepass.warden_rejection_reason}'))
+        if status in APPROVED:
+            gatepass.parent_verification = True
+            notes.append((decided, [user.pk], 'warden_approval', 'Your gatepass request has been approved by the warden.'))
+            notes.append((decided, self.guards, 'warden_approval',
+                          f'Gatepass approved by warden for {student.student_name}'))
+        if status in LEFT:
+            left = min(max(self.at(outing_date, outing_time) + timedelta(minutes=rng.uniform(-30, 90)), decided), self.now)
+            gatepass.security_approval_id = rng.choice(self.guards) if self.guards else None
+            gatepass.updated_at = left
+            notes.append((left, [user.pk], 'security_approval',
+                          'Your gatepass has been approved by security. You can now leave the campus.'))
+        if status in BACK:
+            late = rng.uniform(2, 30) if rng.random() < 0.1 else rng.uniform(-3, 1)
+            back = min(max(self.at(return_date, return_time) + timedelta(hours=late), left), self.now)
+            local = timezone.localtime(back)
+            gatepass.return_verified_by_id = rng.choice(self.guards) if self.guards else None
+            gatepass.actual_return_date = local.date()
+            gatepass.actual_return_time = local.time().replace(second=0, microsecond=0)
+            gatepass.updated_at = back
+            notes.append((back, [user.pk], 'return_recorded',
+                          f'Your return has been recorded on {gatepass.actual_return_date} at {gatepass.actual_return_time}'))
+
+        verification = ParentVerification(
+            gatepass=gatepass, parent_mobile=student.parent_mobile,
+            verification_code=f'{rng.randrange(10 ** 6):06d}', is_verified=gatepass.parent_verification,
+            verified_at=gatepass.updated_at if gatepass.parent_verification else None, created_at=created,
+        )
+        notifications = [
+            Notification(
+                user_id=user_id, gatepass=gatepass, notification_type=kind, message=message,
+                created_at=sent, is_read=rng.random() < (0.95 if sent < self.now - timedelta(days=2) else 0.3),
+            )
+            for sent, recipients, kind, message in notes
+            if recipients == [user.pk] or sent >= self.staff_since
+            for user_id in recipients
+        ]
+        return gatepass, verification, notifications
+
+    def token(self):
+        """A ``scan_token`` from the seeded generator"""
+        return base64.urlsafe_b64encode(self.rng.randbytes(16)).rstrip(b'=').decode()
+
+    def history(self, students):
+        """Gatepasses for ``students``; returns (gatepasses, notifications) written"""
+        passes, verifications, notifications = [], [], []
+        for student in students:
+            for _ in range(self.rng.randint(0, 2 * self.passes)):
+                gatepass, verification, notes = self.gatepass(student)
+                passes.append(gatepass)
+                verifications.append(verification)
+                notifications.extend(notes)
+        GatePass.objects.bulk_create(passes)
+        ParentVerification.objects.bulk_create(verifications)
+        Notification.objects.bulk_create(notifications)
+        return len(passes), len(notifications)
+
+
+def generate(students, wardens=20, security=30, passes=3, days=120, staff_days=7, batch_size=1000,
+             seed=None, progress=None):
+    """
+    Create ``wardens`` wardens, ``security`` guards and ``students`` students
+    with their history (skipping usernames that already exist). ``progress``
+    is called with the number of students written after each batch.
+    Returns the ``Generated`` counts.
+    """
+    data = SampleData(random.Random(seed), timezone.now(), days, staff_days, passes)
+    taken_users = set(User.objects.filter(username__startswith='student_').values_list('username', flat=True))
+    taken_tickets = set(Student.objects.values_list('hall_ticket_no', flat=True))
+    numbers = [
+        n for n in range(FIRST_STUDENT, FIRST_STUDENT + students)
+        if f'student_{n}' not in taken_users and hall_ticket(n) not in taken_tickets
+    ]
+    counts = {'gatepasses': 0, 'notifications': 0}
+    with given_timestamps(User, GatePass, ParentVerification, Notification):
+        with transaction.atomic():
+            generated_wardens = data.staff('warden', wardens)
+            generated_security = data.staff('security', security)
+        data.load_staff()
+        for start in range(0, len(numbers), batch_size):
+            with transaction.atomic():
+                gatepasses, notifications = data.history(data.students(numbers[start:start + batch_size]))
+            counts['gatepasses'] += gatepasses
+            counts['notifications'] += notifications
+            if progress:
+                progress(min(start + batch_size, len(numbers)))
+
+    roster.reconcile()
+    sync_unread_counts()
+    invalidate_notification_feeds(data.guards + data.wardens['M'] + data.wardens['F'])
+    return Generated(generated_wardens, generated_security, len(numbers), **counts)
@@ -1,5 +1,29 @@
 from rest_framework import serializers
+from .bulk import MAX_BULK_IDS
 from .models import User, Student, GatePass, ParentVerification
+from .scan import SCAN_STEPS, scan_code
+from .terminal import MAX_EVENTS
+
+
+class SparseFieldsMixin:
+    """
+    Honour ``?fields=a,b,c`` on GET requests by dropping every other field.
+
+    Unknown names are ignored; if none match, all fields are returned.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        requested = request.query_params.get('fields')
+        if not requested:
+            return
+        wanted = {name.strip() for name in requested.split(',')} & set(self.fields)
+        if wanted:
+            for name in set(self.fields) - wanted:
+                self.fields.pop(name)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -16,20 +40,68 @@ class StudentSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'hall_ticket_no', 'student_name', 'room_no', 'parent_name', 'parent_mobile']
 
 
-class GatePassSerializer(serializers.ModelSerializer):
+class ScanCodeMixin:
+    """``scan_code``: the QR code a student shows at the gate, while the pass can be scanned"""
+
+    def get_scan_code(self, gatepass):
+        request = self.context.get('request')
+        if request is None or request.user.role != 'student' or gatepass.status not in SCAN_STEPS:
+            return None
+        return scan_code(gatepass)
+
+
+class GatePassSerializer(ScanCodeMixin, SparseFieldsMixin, serializers.ModelSerializer):
     student = StudentSerializer(read_only=True)
     student_id = serializers.PrimaryKeyRelatedField(write_only=True, queryset=Student.objects.all(), source='student')
+    scan_code = serializers.SerializerMethodField()
 
     class Meta:
         model = GatePass
         fields = [
             'id', 'student', 'student_id', 'outing_date', 'outing_time', 'expected_return_date',
             'expected_return_time', 'purpose', 'status', 'warden_approval', 'security_approval',
-            'actual_return_date', 'actual_return_time', 'created_at'
+            'actual_return_date', 'actual_return_time', 'scan_code', 'created_at'
+        ]
+
+
+class GatePassListSerializer(ScanCodeMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    """Flat gatepass representation for list pages: student details inline, no nesting"""
+    student_id = serializers.IntegerField(read_only=True)
+    student_name = serializers.CharField(source='student.student_name', read_only=True)
+    hall_ticket_no = serializers.CharField(source='student.hall_ticket_no', read_only=True)
+    room_no = serializers.CharField(source='student.room_no', read_only=True)
+    scan_code = serializers.SerializerMethodField()
+
+    class Meta:
+        model = GatePass
+        fields = [
+            'id', 'student_id', 'student_name', 'hall_ticket_no', 'room_no', 'outing_date', 'outing_time',
+            'expected_return_date', 'expected_return_time', 'purpose', 'status', 'warden_approval',
+            'security_approval', 'actual_return_date', 'actual_return_time', 'scan_code', 'created_at'
         ]
+        read_only_fields = fields
 
 
 class ParentVerificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = ParentVerification
         fields = ['id', 'gatepass', 'parent_mobile', 'verification_code', 'is_verified']
+
+
+class BulkGatePassSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=MAX_BULK_IDS)
+
+
+class GateScanSerializer(serializers.Serializer):
+    code = serializers.CharField(max_length=100)
+
+
+class GateEventSerializer(serializers.Serializer):
+    id = serializers.CharField(max_length=64)
+    gatepass = serializers.IntegerField()
+    type = serializers.ChoiceField(choices=['exit', 'return'])
+    at = serializers.DateTimeField()
+
+
+class GateEventBatchSerializer(serializers.Serializer):
+    events = serializers.ListField(child=GateEventSerializer(), allow_empty=False, max_length=MAX_EVENTS)
@@ -0,0 +1,90 @@
+"""
+Model signal handlers for the gatepass app. Connected in ``GatepassConfig.ready``.
+"""
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import metrics, profiles, roster, transitions
+from .events import publish_notifications
+from .models import GatePass, Notification, Security, Student, User, Warden
+from .notifications import adjust_unread_counts, invalidate_notification_feeds, notification_deleted
+from .sync import record_tombstone
+
+
+@receiver(post_init, sender=Notification)
+def remember_read_state(sender, instance, **kwargs):
+    instance._loaded_is_read = instance.is_read
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, created, **kwargs):
+    if created:
+        delta = 0 if instance.is_read else 1
+    elif instance.is_read != instance._loaded_is_read:
+        delta = -1 if instance.is_read else 1
+    else:
+        delta = 0
+    instance._loaded_is_read = instance.is_read
+    adjust_unread_counts({instance.user_id: delta})
+    invalidate_notification_feeds([instance.user_id])
+    if created:
+        publish_notifications([instance])
+        metrics.notifications_created([instance])
+
+
+@receiver(post_delete, sender=Notification)
+def notification_removed(sender, instance, **kwargs):
+    # Also sent for queryset deletes and cascades (a deleted gatepass or user);
+    # batched inside notifications.bulk_notification_deletes
+    notification_deleted(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, which cannot change the user's profile
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    # The role decides which profile the user has
+    profiles.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=Warden)
+@receiver(post_save, sender=Security)
+@receiver(post_delete, sender=Student)
+@receiver(post_delete, sender=Warden)
+@receiver(post_delete, sender=Security)
+def profile_changed(sender, instance, **kwargs):
+    profiles.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def student_user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or instance.role != 'student':
+        return
+    if update_fields is None or 'gender' in update_fields:
+        roster.student_gender_changed(instance)
+
+
+@receiver(post_init, sender=GatePass)
+def remember_status(sender, instance, **kwargs):
+    instance._loaded_status = instance.status
+
+
+@receiver(post_save, sender=GatePass)
+def gatepass_saved(sender, instance, created, **kwargs):
+    previous = None if created else instance._loaded_status
+    if previous == instance.status:
+        # Not a move, but the dates of a pass that is out may have changed
+        if instance.status == roster.OUT:
+            transitions.load_students([instance])
+            roster.sync([instance])
+        return
+    instance._loaded_status = instance.status
+    transitions.moved([instance], previous)
+
+
+@receiver(post_delete, sender=GatePass)
+def gatepass_deleted(sender, instance, **kwargs):
+    record_tombstone(instance)
@@ -0,0 +1,173 @@
+"""
+Delta sync for mobile clients (``/api/gatepasses/changes/``).
+
+A client keeps an opaque token and asks for everything that changed since:
+
+- created/updated gatepasses, found with an indexed range scan on
+  ``(updated_at, id)`` after the token's watermark;
+- deleted gatepasses, from the ``GatePassTombstone`` log (ids after the
+  token's last tombstone).
+
+Rows younger than ``SYNC_LAG`` are held back until the next poll so a
+transaction that commits slightly after its ``updated_at`` is not skipped.
+Tokens older than ``TOMBSTONE_RETENTION`` are rejected because the
+tombstones they depend on may have been pruned; the client must resync.
+
+Queryset ``update()`` does not touch ``updated_at`` (``auto_now`` only applies
+to ``save()``), so set-based updates of gatepasses must set it explicitly.
+"""
+import base64
+import binascii
+import json
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import islice
+
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import GatePassTombstone, Student
+
+
+SYNC_PAGE_SIZE = 500
+SYNC_LAG = timedelta(seconds=5)
+TOMBSTONE_RETENTION = timedelta(days=30)
+
+_state = threading.local()
+
+
+class InvalidSyncToken(ValueError):
+    pass
+
+
+class ExpiredSyncToken(InvalidSyncToken):
+    pass
+
+
+def encode_token(state):
+    data = json.dumps(state, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_token(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        issued_at = parse_datetime(state['at'])
+        updated_at = parse_datetime(state['u']) if state['u'] else None
+        if issued_at is None or not isinstance(state['i'], int) or not isinstance(state['d'], int):
+            raise ValueError
+    except (TypeError, ValueError, KeyError, binascii.Error):
+        raise InvalidSyncToken('Invalid sync token')
+    if issued_at < timezone.now() - TOMBSTONE_RETENTION:
+        raise ExpiredSyncToken('Sync token expired; resync from scratch')
+    return updated_at, state['i'], state['d']
+
+
+def scoped_tombstones(user):
+    """Tombstones visible to ``user``, mirroring the API's gatepass scoping"""
+    if user.role == 'student':
+        return GatePassTombstone.objects.filter(student_user_id=user.pk)
+    if user.role == 'warden':
+        gender = str(user.gender or '').strip().upper()
+        if gender not in ('M', 'F'):
+            return GatePassTombstone.objects.none()
+        return GatePassTombstone.objects.filter(student_gender=gender)
+    return GatePassTombstone.objects.all()
+
+
+def changes_since(gatepasses, tombstones, token=None, page_size=SYNC_PAGE_SIZE):
+    """
+    One page of changes after ``token`` (None for an initial full sync).
+
+    ``gatepasses`` and ``tombstones`` must already be scoped to the caller.
+    Returns ``(changed_rows, deleted_ids, next_token, has_more)``.
+    """
+    now = timezone.now()
+    horizon = now - SYNC_LAG
+    if token:
+        updated_at, last_id, last_tombstone = decode_token(token)
+    else:
+        # A fresh client has nothing to delete; start after the current log
+        updated_at, last_id = None, 0
+        last_tombstone = GatePassTombstone.objects.aggregate(last=Max('id'))['last'] or 0
+
+    changed = gatepasses.filter(updated_at__lt=horizon)
+    if updated_at is not None:
+        # (updated_at, id) > watermark, as a range on updated_at so the index is used
+        changed = changed.filter(updated_at__gte=updated_at).exclude(updated_at=updated_at, id__lte=last_id)
+    changed = list(changed.order_by('updated_at', 'id')[:page_size + 1])
+
+    deleted = list(
+        tombstones
+        .filter(id__gt=last_tombstone, deleted_at__lt=horizon)
+        .order_by('id')
+        .values_list('id', 'gatepass_id')[:page_size + 1]
+    )
+
+    has_more = len(changed) > page_size or len(deleted) > page_size
+    changed = changed[:page_size]
+    deleted = deleted[:page_size]
+    if changed:
+        updated_at, last_id = changed[-1].updated_at, changed[-1].pk
+    if deleted:
+        last_tombstone = deleted[-1][0]
+
+    next_token = encode_token({
+        'u': updated_at.isoformat() if updated_at else None,
+        'i': last_id,
+        'd': last_tombstone,
+        'at': now.isoformat(),
+    })
+    return changed, [gatepass_id for _, gatepass_id in deleted], next_token, has_more
+
+
+# --- Tombstone recording ---------------------------------------------------
+
+def record_tombstone(gatepass):
+    """Called from the GatePass post_delete signal"""
+    if getattr(_state, 'bulk', False):
+        return
+    student = (
+        Student.objects
+        .filter(pk=gatepass.student_id)
+        .values_list('user_id', 'user__gender')
+        .first()
+    )
+    user_id, gender = student or (None, '')
+    GatePassTombstone.objects.create(
+        gatepass_id=gatepass.pk,
+        student_user_id=user_id,
+        student_gender=str(gender or '').strip().upper(),
+    )
+
+
+@contextmanager
+def bulk_tombstones(queryset):
+    """
+    Record tombstones for ``queryset`` in batched INSERTs, then let the caller delete it.
+
+    Per-row recording from the delete signal is suppressed inside the block.
+    """
+    rows = queryset.values_list('pk', 'student__user_id', 'student__user__gender').iterator(chunk_size=1000)
+    while True:
+        batch = [
+            GatePassTombstone(gatepass_id=pk, student_user_id=user_id, student_gender=str(gender or '').strip().upper())
+            for pk, user_id, gender in islice(rows, 1000)
+        ]
+        if not batch:
+            break
+        GatePassTombstone.objects.bulk_create(batch)
+    _state.bulk = True
+    try:
+        yield
+    finally:
+        _state.bulk = False
+
+
+def prune_tombstones(older_than=TOMBSTONE_RETENTION):
+    """Delete tombstones no valid sync token can still need"""
+    deleted, _ = GatePassTombstone.objects.filter(deleted_at__lt=timezone.now() - older_than).delete()
+    return deleted
@@ -0,0 +1,156 @@
+"""
+Offline gate terminals.
+
+A terminal at the gate keeps working through network outages:
+
+- ``snapshot()``: the passes a guard may scan right now (``warden_approved``:
+  may leave; ``security_approved``: out and due back) as compact rows. The
+  terminal matches a scanned QR code by its token part (see ``gatepass.scan``).
+- ``upload(guard, events)``: the exits and returns the terminal recorded,
+  sent as one batch once the network is back.
+
+Uploads are idempotent. Each event carries the terminal's own ``id``; an
+event the guard already uploaded answers with its stored result and is not
+applied again.
+
+Conflicts are resolved per pass, in the order the events happened:
+
+- an exit applies to a ``warden_approved`` pass, a return to a
+  ``security_approved`` one;
+- a return for a pass that is still ``warden_approved`` means the exit was
+  not uploaded (another terminal, a missed scan), so the exit is applied
+  with it;
+- anything else (already out, already back, rejected) is a ``conflict``, and
+  a pass that does not exist is ``not_found``. Neither changes anything.
+
+Returns are stamped with the time the terminal recorded them; times ahead of
+the server's clock are clamped to the upload time. Whatever the batch size,
+an upload is a fixed number of queries: the stored events, the passes, one
+conditional UPDATE per step (``transitions.bulk_transition``), the return
+times, the notifications and the event log, all in one transaction.
+"""
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import GateEvent, GatePass
+from .notifications import bulk_notify
+from .scan import SCAN_STEPS
+from .transitions import bulk_transition
+
+# Events per upload; keeps the IN lists well inside database parameter limits
+MAX_EVENTS = 500
+
+RESULTS = ('applied', 'conflict', 'not_found')
+
+SNAPSHOT_FIELDS = [
+    'id', 'scan_token', 'status', 'student__student_name', 'student__hall_ticket_no', 'student__room_no',
+    'expected_return_date', 'expected_return_time',
+]
+# Column names sent to terminals
+SNAPSHOT_COLUMNS = [field.replace('student__', '') for field in SNAPSHOT_FIELDS]
+
+
+def snapshot():
+    """Every scannable pass as a row of ``SNAPSHOT_FIELDS``"""
+    return list(
+        GatePass.objects.filter(status__in=SCAN_STEPS).order_by('id').values_list(*SNAPSHOT_FIELDS)
+    )
+
+
+def upload(guard, events):
+    """
+    Apply a terminal's ``events`` (dicts with ``id``, ``gatepass``, ``type``
+    and ``at``). Returns ``{'id', 'result', 'status'}`` per event, in upload
+    order; ``status`` is the pass's status after the upload.
+    """
+    unique = {}
+    for event in events:
+        unique.setdefault(event['id'], event)
+    events = list(unique.values())
+    try:
+        with transaction.atomic():
+            return _upload(guard, events)
+    except IntegrityError:
+        # The same batch was uploaded concurrently and committed first; its results are stored now
+        with transaction.atomic():
+            return _upload(guard, events)
+
+
+def _upload(guard, events):
+    stored = {
+        event.event_id: {'id': event.event_id, 'result': event.result, 'status': event.status}
+        for event in GateEvent.objects.filter(recorded_by=guard, event_id__in=[event['id'] for event in events])
+    }
+    new = sorted((event for event in events if event['id'] not in stored), key=lambda event: event['at'])
+    passes = GatePass.objects.select_related('student__user').in_bulk({event['gatepass'] for event in new})
+
+    # Walk each pass through its events; only the steps that fit are planned
+    status = {pk: gatepass.status for pk, gatepass in passes.items()}
+    exits, returns, planned = {}, {}, set()
+    now = timezone.now()
+    for event in new:
+        pk = event['gatepass']
+        if pk not in passes:
+            continue
+        if status[pk] == 'warden_approved' or (event['type'] == 'return' and status[pk] == 'security_approved'):
+            if status[pk] == 'warden_approved':
+                exits[pk] = passes[pk]
+            if event['type'] == 'return':
+                returns[pk] = min(event['at'], now)
+            status[pk] = 'returned' if event['type'] == 'return' else 'security_approved'
+            planned.add(event['id'])
+
+    exited = bulk_transition(exits.values(), 'security_approve', guard)
+    for pk, result in exited.items():
+        if not result.applied:
+            # Moved on since it was loaded; the return below applies only if it is out now
+            passes[pk].status = result.status
+    returned = bulk_transition([passes[pk] for pk in returns], 'record_return', guard)
+    back = []
+    for pk, result in returned.items():
+        if not result.applied:
+            passes[pk].status = result.status
+            continue
+        returned_at = timezone.localtime(returns[pk])
+        passes[pk].actual_return_date = returned_at.date()
+        passes[pk].actual_return_time = returned_at.time().replace(microsecond=0)
+        back.append(passes[pk])
+    GatePass.objects.bulk_update(back, ['actual_return_date', 'actual_return_time'])
+
+    notifications = [
+        ([passes[pk].student.user_id], passes[pk], 'security_approval',
+         "Your gatepass has been approved by security. You can now leave the campus.")
+        for pk, result in exited.items() if result.applied
+    ]
+    notifications += [
+        ([gatepass.student.user_id], gatepass, 'return_recorded',
+         f"Your return has been recorded on {gatepass.actual_return_date} at {gatepass.actual_return_time}")
+        for gatepass in back
+    ]
+    bulk_notify(notifications)
+
+    log = []
+    for event in new:
+        gatepass = passes.get(event['gatepass'])
+        step = returned if event['type'] == 'return' else exited
+        if gatepass is None:
+            result = 'not_found'
+        elif event['id'] in planned and step[gatepass.pk].applied:
+            result = 'applied'
+        else:
+            result = 'conflict'
+        log.append(GateEvent(
+            event_id=event['id'], recorded_by=guard, gatepass=gatepass, kind=event['type'],
+            occurred_at=event['at'], result=result, status=gatepass.status if gatepass else None,
+        ))
+        stored[event['id']] = {'id': event['id'], 'result': result, 'status': gatepass.status if gatepass else None}
+    GateEvent.objects.bulk_create(log)
+    return [stored[event['id']] for event in events]
+
+
+def summarize(results):
+    """``{result: count}`` for every result in ``RESULTS``"""
+    counts = dict.fromkeys(RESULTS, 0)
+    for row in results:
+        counts[row['result']] += 1
+    return counts
@@ -0,0 +1,95 @@
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from .models import GatePass
+from .testing import make_gatepass, make_security, make_student, make_warden
+
+
+class GatePassListAPITest(APITestCase):
+    url = reverse('api_gatepass_list_create')
+
+    def setUp(self):
+        self.security = make_security()
+        self.client.force_authenticate(self.security)
+
+    def seed(self, count, student=None):
+        student = student or make_student('M')
+        return [make_gatepass(student) for _ in range(count)]
+
+    def walk(self, **params):
+        ids = []
+        response = self.client.get(self.url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row['id'] for row in response.data['results'])
+            if not response.data['next']:
+                return ids
+            response = self.client.get(response.data['next'])
+
+    def test_cursor_walk_is_complete_and_ordered_with_timestamp_ties(self):
+        passes = self.seed(12)
+        # Half the rows share one created_at, so ordering must fall back to id
+        tie = timezone.now()
+        GatePass.objects.filter(pk__in=[gp.pk for gp in passes[:6]]).update(created_at=tie)
+
+        ids = self.walk(page_size=5)
+
+        expected = list(GatePass.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_rows_created_while_paging_do_not_shift_pages(self):
+        self.seed(6)
+        first = self.client.get(self.url, {'page_size': 3})
+        self.seed(2)
+        second = self.client.get(first.data['next'])
+        seen = [row['id'] for row in first.data['results'] + second.data['results']]
+        self.assertEqual(len(set(seen)), 6)
+        self.assertIsNone(second.data['next'])
+
+    def test_query_count_is_independent_of_page_size(self):
+        for _ in range(5):
+            self.seed(10)
+        with self.assertNumQueries(1):
+            small = self.client.get(self.url, {'page_size': 5})
+        with self.assertNumQueries(1):
+            large = self.client.get(self.url, {'page_size': 50, 'expand': 'student'})
+        self.assertEqual((len(small.data['results']), len(large.data['results'])), (5, 50))
+
+    def test_flat_rows_and_expand(self):
+        student = make_student('M', student_name='Farah')
+        self.seed(1, student)
+
+        row = self.client.get(self.url).data['results'][0]
+        self.assertEqual((row['student_id'], row['student_name']), (student.pk, 'Farah'))
+        self.assertNotIn('student', row)
+
+        row = self.client.get(self.url, {'expand': 'student'}).data['results'][0]
+        self.assertEqual(row['student']['user']['id'], student.user_id)
+
+    def test_sparse_fields(self):
+        self.seed(2)
+        rows = self.client.get(self.url, {'fields': 'id,status,bogus'}).data['results']
+        self.assertEqual(set(rows[0]), {'id', 'status'})
+        rows = self.client.get(self.url, {'fields': 'bogus'}).data['results']
+        self.assertIn('outing_date', rows[0])
+
+    def test_page_size_is_capped(self):
+        self.seed(3)
+        response = self.client.get(self.url, {'page_size': 'abc'})
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(len(self.client.get(self.url, {'page_size': '0'}).data['results']), 1)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'not-a-cursor'}).status_code, 404)
+
+    def test_scoping_is_preserved(self):
+        male, female = make_student('M'), make_student('F')
+        own = self.seed(2, male)
+        self.seed(3, female)
+
+        self.client.force_authenticate(male.user)
+        self.assertEqual(sorted(self.walk()), sorted(gp.pk for gp in own))
+
+        self.client.force_authenticate(make_warden('F'))
+        self.assertEqual(len(self.walk()), 3)
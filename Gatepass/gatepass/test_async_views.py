@@ -0,0 +1,201 @@
+import asyncio
+from functools import partial
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import resolve, reverse
+from rest_framework.authtoken.models import Token
+
+from hostel_gatepass.asgi import RequestLimit
+
+from . import async_views
+from .models import GatePass
+from .testing import make_gatepass, make_security, make_student, make_user, make_warden, plain_static_files
+
+
+ASYNC_URLS = override_settings(ROOT_URLCONF='hostel_gatepass.urls_asgi')
+
+
+def call(request, *args, **kwargs):
+    """Make an ``AsyncClient`` request from a sync test"""
+    async def run():
+        return await request(*args, **kwargs)
+    return async_to_sync(run)()
+
+
+def ids(rows):
+    return [row.pk for row in rows]
+
+
+@plain_static_files
+class AsyncDashboardTest(TestCase):
+    """The async dashboards show what the sync ones do."""
+
+    def setUp(self):
+        cache.clear()
+        self.warden = make_warden('M')
+        self.security = make_security()
+        self.student = make_student('M')
+        for status in ['pending', 'warden_approved', 'warden_rejected', 'security_approved', 'returned']:
+            make_gatepass(self.student, status=status, warden_approval=self.warden)
+        make_gatepass(make_student('F'), status='warden_approved')
+
+    def get(self, user, url, query=None):
+        self.client.force_login(user)
+        sync_response = self.client.get(url, query)
+        with ASYNC_URLS:
+            self.assertIs(resolve(url).func, getattr(async_views, resolve(url).url_name))
+            self.async_client.force_login(user)
+            async_response = call(self.async_client.get, url, query)
+        self.assertEqual(async_response.status_code, 200)
+        return sync_response.context, async_response.context
+
+    def assertSameContext(self, sync_context, async_context, lists, counters):
+        for name in lists:
+            self.assertEqual(ids(async_context[name]), ids(sync_context[name]), name)
+        for name in counters:
+            self.assertEqual(async_context[name], sync_context[name], name)
+
+    def test_student_dashboard(self):
+        sync_context, async_context = self.get(self.student.user, reverse('student_dashboard'))
+        self.assertEqual(async_context['student'], self.student)
+        self.assertSameContext(sync_context, async_context, ['gatepasses'], ['total_requests', 'pending_requests'])
+
+    def test_warden_dashboard(self):
+        sync_context, async_context = self.get(self.warden, reverse('warden_dashboard'), {'status_filter': 'pending'})
+        self.assertSameContext(
+            sync_context, async_context,
+            ['pending_requests', 'approved_requests', 'rejected_requests', 'returned_requests', 'students_out_requests'],
+            ['total_pending', 'total_approved', 'total_rejected', 'total_returned', 'filtered_count'],
+        )
+
+    def test_security_dashboard(self):
+        sync_context, async_context = self.get(self.security, reverse('security_dashboard'))
+        self.assertSameContext(
+            sync_context, async_context,
+            ['approved_requests', 'security_approved', 'returned_requests'],
+            ['total_pending', 'total_approved', 'total_returned'],
+        )
+        self.assertNotIn('last_change', async_context)
+
+    def test_superadmin_dashboard(self):
+        superadmin = make_user('superadmin', is_approved=True)
+        sync_context, async_context = self.get(superadmin, reverse('superadmin_dashboard'))
+        self.assertSameContext(
+            sync_context, async_context,
+            ['pending_users', 'overdue_returns', 'pending_gatepass_approvals', 'recent_gatepasses'],
+            ['total_students', 'total_wardens', 'total_gatepasses', 'pending_gatepasses', 'overdue_count'],
+        )
+
+    @ASYNC_URLS
+    @override_settings(NOTIFICATION_FEED_TIMEOUT=300)
+    def test_unchanged_dashboard_is_not_rendered(self):
+        url = reverse('security_dashboard')
+        self.async_client.force_login(self.security)
+        get = partial(call, self.async_client.get)
+        get(url)
+        etag = get(url)['ETag']
+        # session + user + the dashboard's statistics, nothing rendered
+        with self.assertNumQueries(3):
+            response = get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        make_gatepass(self.student, status='warden_approved')
+        self.assertEqual(get(url, headers={'If-None-Match': etag}).status_code, 200)
+
+    @ASYNC_URLS
+    def test_wrong_role_and_anonymous(self):
+        url = reverse('security_dashboard')
+        response = call(self.async_client.get, url)
+        self.assertRedirects(response, f"{reverse('login')}?next={url}", fetch_redirect_response=False)
+
+        self.async_client.force_login(self.student.user)
+        response = call(self.async_client.get, url)
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+        self.assertFalse(response.has_header('ETag'))
+
+
+@ASYNC_URLS
+class AsyncApprovalAPITest(TestCase):
+
+    def setUp(self):
+        self.warden = make_warden('M')
+        self.security = make_security()
+        self.gatepass = make_gatepass(make_student('M'))
+
+    def post(self, url_name, user=None, pk=None, token=None):
+        if user is not None:
+            token = Token.objects.create(user=user).key
+        headers = {'Authorization': f'Token {token}'} if token else {}
+        url = reverse(url_name, args=[pk or self.gatepass.pk])
+        return call(self.async_client.post, url, headers=headers)
+
+    def test_warden_then_security_approval(self):
+        response = self.post('api_warden_approve', self.warden)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'detail': 'Warden approval recorded'})
+        self.gatepass.refresh_from_db()
+        self.assertEqual((self.gatepass.status, self.gatepass.warden_approval), ('warden_approved', self.warden))
+
+        self.assertEqual(self.post('api_security_approve', self.security).status_code, 200)
+        self.gatepass.refresh_from_db()
+        self.assertEqual((self.gatepass.status, self.gatepass.security_approval), ('security_approved', self.security))
+
+        response = self.post('api_security_approve', make_security())
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['status'], 'security_approved')
+
+    def test_roles_and_gender_are_enforced(self):
+        self.assertEqual(self.post('api_warden_approve', self.security).status_code, 403)
+        self.assertEqual(self.post('api_security_approve', self.warden).status_code, 403)
+        response = self.post('api_warden_approve', make_warden('F'))
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('your gender', response.json()['detail'])
+        self.assertEqual(GatePass.objects.get().status, 'pending')
+
+    def test_authentication_and_missing_gatepass(self):
+        response = self.post('api_warden_approve')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Token')
+        self.assertEqual(self.post('api_warden_approve', token='nope').json(), {'detail': 'Invalid token.'})
+
+        inactive = make_user('warden', gender='M', is_active=False)
+        self.assertEqual(self.post('api_warden_approve', inactive).status_code, 401)
+
+        response = self.post('api_warden_approve', self.warden, pk=self.gatepass.pk + 100)
+        self.assertEqual(response.status_code, 404)
+        response = call(self.async_client.get, reverse('api_warden_approve', args=[self.gatepass.pk]))
+        self.assertEqual(response.status_code, 405)
+
+
+class RequestLimitTest(SimpleTestCase):
+
+    def test_requests_wait_for_a_slot_but_streams_do_not(self):
+        running = []
+        peak = 0
+        release = asyncio.Event()
+
+        async def app(scope, receive, send):
+            nonlocal peak
+            running.append(scope['path'])
+            peak = max(peak, len(running))
+            await release.wait()
+            running.remove(scope['path'])
+
+        async def run():
+            limited = RequestLimit(app, 2, unlimited=['/events/'])
+            tasks = [
+                asyncio.create_task(limited({'type': 'http', 'path': f'/page/{n}/'}, None, None)) for n in range(5)
+            ]
+            await asyncio.sleep(0)
+            stream = asyncio.create_task(limited({'type': 'http', 'path': '/events/'}, None, None))
+            await asyncio.sleep(0)
+            self.assertEqual(sorted(running), ['/events/', '/page/0/', '/page/1/'])
+            release.set()
+            await asyncio.gather(*tasks, stream)
+
+        async_to_sync(run)()
+        self.assertEqual(peak, 3)
+        self.assertEqual(running, [])
@@ -0,0 +1,139 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from . import bulk
+from .models import GatePass, Notification
+from .testing import make_gatepass, make_security, make_student, make_user, make_warden, plain_static_files
+
+
+class BulkApprovalTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.warden = make_warden('M')
+        self.security = [make_security(), make_security()]
+        self.students = [make_student('M') for _ in range(3)]
+
+    def pending(self, count):
+        return [make_gatepass(self.students[n % 3]).pk for n in range(count)]
+
+    def test_results_per_id_in_request_order(self):
+        mine = self.pending(2)
+        other_gender = make_gatepass(make_student('F')).pk
+        processed = make_gatepass(self.students[0], status='warden_rejected').pk
+        missing = max(mine + [other_gender, processed]) + 1
+
+        outcome = bulk.warden_approve(self.warden, [processed, mine[0], missing, other_gender, mine[1], mine[0]])
+
+        self.assertEqual(outcome, [
+            {'id': processed, 'result': 'conflict', 'status': 'warden_rejected'},
+            {'id': mine[0], 'result': 'applied', 'status': 'warden_approved'},
+            {'id': missing, 'result': 'not_found', 'status': None},
+            {'id': other_gender, 'result': 'forbidden', 'status': 'pending'},
+            {'id': mine[1], 'result': 'applied', 'status': 'warden_approved'},
+        ])
+        self.assertEqual(bulk.summarize(outcome), {'applied': 2, 'conflict': 1, 'forbidden': 1, 'not_found': 1})
+        approved = GatePass.objects.filter(pk__in=mine)
+        self.assertEqual(set(approved.values_list('status', 'warden_approval', 'parent_verification')),
+                         {('warden_approved', self.warden.pk, True)})
+        self.assertEqual(GatePass.objects.get(pk=other_gender).status, 'pending')
+
+    def test_notifications_match_single_approvals(self):
+        ids = self.pending(3)
+        bulk.warden_approve(self.warden, ids)
+        for gatepass in GatePass.objects.filter(pk__in=ids).select_related('student'):
+            recipients = set(Notification.objects.filter(gatepass=gatepass).values_list('user_id', flat=True))
+            self.assertEqual(recipients, {gatepass.student.user_id, *(user.pk for user in self.security)})
+        self.security[0].refresh_from_db()
+        self.assertEqual(self.security[0].unread_notifications, 3)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        bulk.warden_approve(self.warden, self.pending(1))  # warm the recipient cache
+
+        def queries(count):
+            ids = self.pending(count)
+            with CaptureQueriesContext(connection) as ctx:
+                outcome = bulk.warden_approve(self.warden, ids)
+            self.assertEqual(bulk.summarize(outcome)['applied'], count)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(queries(5), queries(60))
+
+    def test_reject_and_security_approve(self):
+        ids = self.pending(2)
+        outcome = bulk.warden_reject(self.warden, ids, 'Exams this week')
+        self.assertEqual({row['status'] for row in outcome}, {'warden_rejected'})
+        self.assertEqual(set(GatePass.objects.values_list('warden_rejection_reason', flat=True)), {'Exams this week'})
+
+        approved = [make_gatepass(self.students[0], status='warden_approved').pk for _ in range(2)]
+        outcome = bulk.security_approve(self.security[0], approved + ids)
+        self.assertEqual([row['result'] for row in outcome], ['applied', 'applied', 'conflict', 'conflict'])
+        self.assertEqual(GatePass.objects.filter(security_approval=self.security[0]).count(), 2)
+
+
+@plain_static_files
+class BulkPageTest(TestCase):
+
+    def setUp(self):
+        self.warden = make_warden('M')
+        self.student = make_student('M')
+        self.ids = [make_gatepass(self.student).pk for _ in range(3)]
+        self.client.force_login(self.warden)
+        self.url = reverse('warden_bulk_decision')
+
+    def test_dashboard_offers_selection(self):
+        response = self.client.get(reverse('warden_dashboard'))
+        self.assertContains(response, f'name="ids" value="{self.ids[0]}" form="warden-bulk-form"')
+
+    def test_approve_requires_parent_verification(self):
+        response = self.client.post(self.url, {'ids': self.ids, 'action': 'approve'})
+        self.assertRedirects(response, reverse('warden_dashboard'), fetch_redirect_response=False)
+        self.assertEqual(GatePass.objects.filter(status='pending').count(), 3)
+
+        self.client.post(self.url, {'ids': self.ids[:2], 'action': 'approve', 'parent_verification': 'on'})
+        self.assertEqual(GatePass.objects.filter(status='warden_approved').count(), 2)
+
+    def test_reject_reports_skipped_passes(self):
+        GatePass.objects.filter(pk=self.ids[0]).update(status='warden_approved')
+        response = self.client.post(self.url, {'ids': self.ids, 'action': 'reject', 'rejection_reason': 'Exams'},
+                                    follow=True)
+        self.assertContains(response, 'Rejected 2 gatepass(es).')
+        self.assertContains(response, f'Skipped 1 already processed (#{self.ids[0]}).')
+
+    def test_security_bulk_approve(self):
+        security = make_security()
+        approved = [make_gatepass(self.student, status='warden_approved').pk for _ in range(2)]
+        self.client.force_login(security)
+        self.client.post(reverse('security_bulk_approve'), {'ids': approved})
+        self.assertEqual(GatePass.objects.filter(security_approval=security).count(), 2)
+
+        self.client.force_login(self.warden)
+        response = self.client.post(reverse('security_bulk_approve'), {'ids': self.ids})
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+
+
+class BulkAPITest(APITestCase):
+    url = reverse('api_bulk_warden_approve')
+
+    def setUp(self):
+        self.warden = make_warden('M')
+        self.client.force_authenticate(self.warden)
+        self.ids = [make_gatepass(make_student('M')).pk for _ in range(3)]
+
+    def test_bulk_warden_approve(self):
+        response = self.client.post(self.url, {'ids': self.ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['summary']['applied'], 3)
+        self.assertEqual([row['id'] for row in response.data['results']], self.ids)
+
+    def test_validation_and_roles(self):
+        self.assertEqual(self.client.post(self.url, {'ids': []}, format='json').status_code, 400)
+        too_many = list(range(1, bulk.MAX_BULK_IDS + 2))
+        self.assertEqual(self.client.post(self.url, {'ids': too_many}, format='json').status_code, 400)
+
+        self.client.force_authenticate(make_user('student', gender='M'))
+        self.assertEqual(self.client.post(self.url, {'ids': self.ids}, format='json').status_code, 403)
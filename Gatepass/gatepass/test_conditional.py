@@ -0,0 +1,146 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import parse_http_date
+from rest_framework.test import APITestCase
+
+from .models import GatePass, Notification
+from .notifications import notify_many
+from .testing import make_gatepass, make_security, make_student, make_user, make_warden, plain_static_files
+
+
+@plain_static_files
+class DashboardConditionalGetTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.security = make_security()
+        self.student = make_student('M')
+        self.gatepass = make_gatepass(self.student, status='warden_approved')
+        self.client.force_login(self.security)
+        self.url = reverse('security_dashboard')
+
+    def fetch_etag(self, url):
+        # The first load sets the CSRF cookie, which is part of the ETag
+        self.client.get(url)
+        return self.client.get(url)['ETag']
+
+    @override_settings(NOTIFICATION_FEED_TIMEOUT=300)
+    def test_unchanged_dashboard_is_not_rendered(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+
+        # session + user + the dashboard's statistics, nothing rendered
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_gatepass_change_invalidates_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.gatepass.status = 'security_approved'
+        self.gatepass.security_approval = self.security
+        self.gatepass.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        make_gatepass(make_student('F'), status='warden_approved')
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_new_notification_invalidates_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        notify_many([self.security.pk], self.gatepass, 'general', "Shift change")
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get(self.url)['ETag']
+        notification = Notification.objects.get(user=self.security)
+        notification.is_read = True
+        notification.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_pending_messages_are_always_rendered(self):
+        pending = make_gatepass(self.student, status='pending')
+        etag = self.client.get(self.url)['ETag']
+        # Refused without changing anything; the error is flashed on the dashboard
+        response = self.client.post(reverse('security_approve_gatepass', args=[pending.pk]))
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'This gatepass must be approved by warden first.')
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_wrong_role_is_redirected_without_etag(self):
+        self.client.force_login(make_student('M').user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_etag_depends_on_user_and_filters(self):
+        warden = make_warden('M')
+        self.client.force_login(warden)
+        url = reverse('warden_dashboard')
+        etag = self.fetch_etag(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(url, {'status_filter': 'pending'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        self.client.force_login(make_warden('M'))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_student_and_superadmin_dashboards(self):
+        for user, url_name in [
+            (self.student.user, 'student_dashboard'),
+            (make_user('superadmin', is_approved=True), 'superadmin_dashboard'),
+        ]:
+            self.client.force_login(user)
+            url = reverse(url_name)
+            etag = self.fetch_etag(url)
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            make_gatepass(self.student)
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class APIConditionalGetTest(APITestCase):
+    url = reverse('api_gatepass_list_create')
+
+    def setUp(self):
+        self.student = make_student('M')
+        self.passes = [make_gatepass(self.student) for _ in range(3)]
+        self.client.force_authenticate(make_security())
+
+    def test_if_none_match(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.passes[0].status = 'warden_approved'
+        self.passes[0].save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_modified_since_sees_deletions(self):
+        GatePass.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+        last_modified = self.client.get(self.url)['Last-Modified']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        self.passes[1].delete()
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(parse_http_date(response['Last-Modified']), parse_http_date(last_modified))
+
+    def test_etag_varies_with_page(self):
+        first = self.client.get(self.url, {'page_size': 2})
+        second = self.client.get(first.data['next'])
+        self.assertNotEqual(first['ETag'], second['ETag'])
+        self.assertEqual(self.client.get(first.data['next'], HTTP_IF_NONE_MATCH=second['ETag']).status_code, 304)
@@ -0,0 +1,88 @@
+from datetime import time, timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import GatePass, Notification
+from .testing import make_user, make_student, make_warden, make_security, plain_static_files
+
+
+STATUSES = ['pending', 'warden_approved', 'warden_rejected', 'security_approved', 'returned']
+
+
+@plain_static_files
+class DashboardQueryCountTest(TestCase):
+    """Dashboard query counts must not depend on how many gatepasses are rendered."""
+
+    def setUp(self):
+        self.superadmin = make_user('superadmin')
+        self.warden = make_warden('M')
+        self.security = make_security()
+        self.students = [make_student('M') for _ in range(5)]
+        self.rows = 0
+
+    def seed(self, total):
+        """Top the dataset up to ``total`` gatepasses (plus one notification each)."""
+        yesterday = timezone.localdate() - timedelta(days=1)
+        gatepasses = []
+        for i in range(self.rows, total):
+            gatepasses.append(GatePass(
+                student=self.students[i % len(self.students)],
+                outing_date=yesterday - timedelta(days=3),
+                outing_time=time(9, 0),
+                expected_return_date=yesterday,
+                expected_return_time=time(18, 0),
+                purpose='Home visit',
+                status=STATUSES[i % len(STATUSES)],
+                warden_approval=self.warden,
+                security_approval=self.security,
+                return_verified_by=self.security,
+            ))
+        created = GatePass.objects.bulk_create(gatepasses)
+        Notification.objects.bulk_create([
+            Notification(
+                user=self.warden,
+                gatepass=gatepass,
+                notification_type='gatepass_request',
+                message='New gatepass request'
+            )
+            for gatepass in created
+        ])
+        self.rows = total
+
+    def assertQueryCountIsFlat(self, url_name, user):
+        self.client.force_login(user)
+        url = reverse(url_name)
+
+        # Notifications are seeded with bulk_create, so start each render from a cold feed cache
+        self.seed(10)
+        cache.clear()
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.seed(1000)
+        cache.clear()
+        with self.assertNumQueries(len(small.captured_queries)):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_student_dashboard(self):
+        self.assertQueryCountIsFlat('student_dashboard', self.students[0].user)
+
+    def test_warden_dashboard(self):
+        self.assertQueryCountIsFlat('warden_dashboard', self.warden)
+
+    def test_security_dashboard(self):
+        self.assertQueryCountIsFlat('security_dashboard', self.security)
+
+    def test_superadmin_dashboard(self):
+        self.assertQueryCountIsFlat('superadmin_dashboard', self.superadmin)
+
+    def test_debug_info(self):
+        self.assertQueryCountIsFlat('debug_info', self.superadmin)
+
+    def test_warden_debug(self):
+        self.assertQueryCountIsFlat('warden_debug', self.warden)
@@ -0,0 +1,145 @@
+import asyncio
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+from django.urls import reverse
+
+from . import events
+from .events import InProcessBroker, sse_stream, subscriptions_for
+from .notifications import notify_many
+from .testing import make_gatepass, make_security, make_student, make_user, make_warden
+
+
+class RecordingBroker:
+
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channels, event):
+        self.published.append((channels, event))
+
+
+class PublishingTest(TestCase):
+
+    def setUp(self):
+        self.broker = RecordingBroker()
+        patcher = mock.patch.object(events, '_broker', self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.student = make_student('F')
+
+    def test_transitions_are_published_after_commit_to_scoped_channels(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            gatepass = make_gatepass(self.student)
+        self.assertEqual(self.broker.published, [])
+        for callback in callbacks:
+            callback()
+        channels, event = self.broker.published[0]
+        self.assertEqual(channels, sorted([f'user:{self.student.user_id}', 'role:superadmin', 'warden:F']))
+        self.assertEqual((event['type'], event['gatepass_id'], event['status']), ('gatepass', gatepass.pk, 'pending'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            gatepass.status = 'warden_approved'
+            gatepass.save()
+        channels, event = self.broker.published[-1]
+        self.assertIn('role:security', channels)
+        self.assertEqual((event['status'], event['previous_status']), ('warden_approved', 'pending'))
+
+    def test_saves_without_a_transition_are_not_published(self):
+        gatepass = make_gatepass(self.student)
+        with self.captureOnCommitCallbacks(execute=True):
+            gatepass.purpose = 'Library'
+            gatepass.save()
+        self.assertEqual(self.broker.published, [])
+
+    def test_notifications_reach_only_their_recipient(self):
+        gatepass = make_gatepass(self.student)
+        wardens = [make_warden('F'), make_warden('F')]
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_many([w.pk for w in wardens], gatepass, 'gatepass_request', "New request")
+        self.assertEqual(
+            sorted(channels for channels, event in self.broker.published if event['type'] == 'notification'),
+            [[f'user:{wardens[0].pk}'], [f'user:{wardens[1].pk}']],
+        )
+
+    def test_subscriptions_follow_role_and_gender(self):
+        self.assertEqual(subscriptions_for(self.student.user), [f'user:{self.student.user_id}'])
+        warden = make_warden('M')
+        self.assertEqual(subscriptions_for(warden), [f'user:{warden.pk}', 'warden:M'])
+        security = make_security()
+        self.assertEqual(subscriptions_for(security), [f'user:{security.pk}', 'role:security'])
+        ungendered = make_user('warden', gender='', is_approved=True)
+        self.assertEqual(subscriptions_for(ungendered), [f'user:{ungendered.pk}'])
+
+
+class EventStreamTest(TestCase):
+    url = reverse('event_stream')
+
+    def setUp(self):
+        self.broker = InProcessBroker()
+        patcher = mock.patch.object(events, '_broker', self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.security = make_security()
+        self.async_client.force_login(self.security)
+
+    async def next_chunk(self, stream):
+        return (await asyncio.wait_for(stream.__anext__(), 2)).decode()
+
+    async def test_stream_delivers_events_for_the_users_channels(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        self.assertEqual(await self.next_chunk(stream), 'retry: 3000\n\n')
+
+        student = await sync_to_async(make_student)('M')
+        gatepass = await sync_to_async(make_gatepass)(student)
+
+        def approve():
+            with self.captureOnCommitCallbacks(execute=True):
+                gatepass.status = 'warden_approved'
+                gatepass.save()
+        # A pending pass is not published to security; the approval is
+        await sync_to_async(approve)()
+
+        chunk = await self.next_chunk(stream)
+        self.assertIn('event: gatepass\n', chunk)
+        self.assertIn('"status": "warden_approved"', chunk)
+        await stream.aclose()
+
+    async def test_events_for_other_channels_are_not_streamed(self):
+        response = await self.async_client.get(self.url)
+        stream = response.streaming_content
+        await self.next_chunk(stream)
+        self.broker.publish(['warden:F'], {'id': 'a', 'type': 'gatepass'})
+        self.broker.publish(['role:security', f'user:{self.security.pk}'], {'id': 'b', 'type': 'notification'})
+        chunk = await self.next_chunk(stream)
+        self.assertIn('id: b\n', chunk)
+        await stream.aclose()
+
+    def test_wsgi_and_anonymous_requests(self):
+        self.client.force_login(self.security)
+        self.assertEqual(self.client.get(self.url).status_code, 204)
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+class SseStreamTest(TestCase):
+
+    async def test_heartbeat_deduplication_and_expiry(self):
+        broker = InProcessBroker()
+        with mock.patch.object(events, '_broker', broker):
+            stream = sse_stream(['user:1', 'role:security'], heartbeat=0.05, max_age=0.5)
+            self.assertEqual(await stream.__anext__(), 'retry: 3000\n\n')
+            self.assertEqual(await stream.__anext__(), ': keep-alive\n\n')
+
+            # One event on two of the stream's channels arrives once
+            broker.publish(['user:1'], {'id': 'x', 'type': 'gatepass'})
+            broker.publish(['role:security'], {'id': 'x', 'type': 'gatepass'})
+            chunks = [chunk async for chunk in stream]
+        self.assertEqual([chunk for chunk in chunks if chunk.startswith('id:')], [
+            'id: x\nevent: gatepass\ndata: {"id": "x", "type": "gatepass"}\n\n',
+        ])
+        self.assertEqual(broker.subscriber_count(), 0)
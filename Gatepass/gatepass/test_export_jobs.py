@@ -0,0 +1,146 @@
+import shutil
+import tempfile
+from datetime import date
+from io import BytesIO, StringIO
+
+import openpyxl
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .export_jobs import export_path, request_outing_export, run_next_export_job
+from .models import ExportJob, GatePass
+from .testing import make_gatepass, make_student, make_user, make_warden, plain_static_files
+
+
+@plain_static_files
+class ExportJobTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.export_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.export_root, ignore_errors=True)
+        settings_override = override_settings(EXPORT_ROOT=self.export_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.superadmin = make_user('superadmin')
+        self.client.force_login(self.superadmin)
+        self.student = make_student('M')
+        for day in (3, 10, 20):
+            make_gatepass(self.student, status='returned', outing_date=date(2025, 1, day))
+        make_gatepass(self.student, status='returned', outing_date=date(2024, 6, 1))
+
+    def enqueue(self, **filters):
+        return self.client.post(reverse('export_outings_job'), filters)
+
+    def test_job_lifecycle(self):
+        response = self.enqueue(year='2025')
+        self.assertEqual(response.status_code, 201)
+        job = response.json()
+        self.assertEqual((job['status'], job['download_url']), ('queued', None))
+
+        call_command('run_export_jobs', stdout=StringIO())
+
+        job = self.client.get(job['status_url']).json()
+        self.assertEqual((job['status'], job['progress']), ('done', 100))
+        response = self.client.get(job['download_url'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('gatepass_outings_2025.xlsx', response['Content-Disposition'])
+        wb = openpyxl.load_workbook(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(list(wb['Outings'].iter_rows(values_only=True))[-1][:2], ('Total outings in selection', 3))
+
+    def test_identical_filters_reuse_job_until_data_changes(self):
+        first = self.enqueue(year='2025', from_date='').json()
+        self.assertEqual(self.enqueue(year='2025').json()['id'], first['id'])
+        self.assertEqual(self.enqueue(year='2025').status_code, 200)
+        self.assertNotEqual(self.enqueue(year='2024').json()['id'], first['id'])
+
+        run_next_export_job()
+        run_next_export_job()
+        self.assertEqual(self.enqueue(year='2025').json()['id'], first['id'])
+
+        gatepass = GatePass.objects.filter(outing_date__year=2025).first()
+        gatepass.status = 'completed'
+        gatepass.save()
+        second = self.enqueue(year='2025').json()
+        self.assertNotEqual(second['id'], first['id'])
+
+        run_next_export_job()
+        old = ExportJob.objects.get(pk=first['id'])
+        self.assertEqual(old.status, 'expired')
+        self.assertEqual(self.client.get(reverse('export_job_download', args=[old.pk])).status_code, 404)
+
+    def test_invalid_filters_are_rejected_before_queueing(self):
+        for filters in (
+            {'from_date': 'yesterday'},
+            {'from_date': '2025-02-01', 'to_date': '2025-01-01'},
+            {'status_filter': "x' OR 1=1"},
+            {'month': '13'},
+        ):
+            response = self.enqueue(**filters)
+            self.assertEqual(response.status_code, 400, filters)
+            self.assertIn('errors', response.json())
+        self.assertFalse(ExportJob.objects.exists())
+
+        job = ExportJob.objects.get(pk=self.enqueue(from_date='2025-01-01', status_filter='completed').json()['id'])
+        self.assertEqual(job.filters, {
+            'from_date': '2025-01-01', 'to_date': None, 'status_filter': 'completed', 'year': None, 'month': None,
+        })
+
+    def test_missing_artifact_is_regenerated(self):
+        job, _ = request_outing_export({'year': 2025}, self.superadmin)
+        run_next_export_job()
+        job.refresh_from_db()
+        shutil.rmtree(self.export_root)
+
+        again, created = request_outing_export({'year': 2025}, self.superadmin)
+        self.assertTrue(created)
+        self.assertEqual(run_next_export_job().status, 'done')
+
+    def test_download_supports_range(self):
+        job, _ = request_outing_export({}, self.superadmin)
+        job = run_next_export_job()
+        with open(export_path(job), 'rb') as f:
+            content = f.read()
+        url = reverse('export_job_download', args=[job.pk])
+
+        response = self.client.get(url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(content)}')
+        self.assertEqual(b''.join(response.streaming_content), content[10:20])
+
+        response = self.client.get(url, HTTP_RANGE='bytes=100-')
+        self.assertEqual(b''.join(response.streaming_content), content[100:])
+        response = self.client.get(url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(response.streaming_content), content[-5:])
+
+        self.assertEqual(self.client.get(url, HTTP_RANGE=f'bytes={len(content)}-').status_code, 416)
+
+        # A stale If-Range validator means the client's partial copy is outdated
+        response = self.client.get(url, HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"other"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        response = self.client.get(url, HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE=response['ETag'])
+        self.assertEqual(response.status_code, 206)
+
+    def test_progress_is_reported(self):
+        job, _ = request_outing_export({}, self.superadmin)
+        self.assertEqual(job.progress, 0)
+        job = run_next_export_job()
+        self.assertEqual((job.total_rows, job.rows_written), (4, 4))
+        self.assertIsNone(run_next_export_job())
+
+    def test_students_and_security_cannot_use_jobs(self):
+        job, _ = request_outing_export({}, self.superadmin)
+        self.client.force_login(make_user('student'))
+        self.assertEqual(self.enqueue().status_code, 403)
+        self.assertEqual(self.client.get(reverse('export_job_status', args=[job.pk])).status_code, 403)
+
+    def test_dashboards_show_export_button(self):
+        response = self.client.get(reverse('superadmin_dashboard'))
+        self.assertContains(response, reverse('export_outings_job'))
+        self.client.force_login(make_warden('M'))
+        response = self.client.get(reverse('warden_dashboard'), {'from_date': '2025-01-01'})
+        self.assertContains(response, 'name="from_date" value="2025-01-01"')
@@ -0,0 +1,133 @@
+import csv
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+from io import BytesIO, StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+from django.urls import reverse
+
+from .exporters import EXPORTERS, Exporter, Sheet, get_exporter, pyarrow
+from .testing import make_gatepass, make_student, make_warden, plain_static_files
+
+
+def body(response):
+    return b''.join(response.streaming_content)
+
+
+class ExporterTest(TestCase):
+
+    def sheets(self, rows=5000):
+        return [Sheet('Rows', ['Name', 'Count'], ([f'row {n}', n] for n in range(rows)), total_label='Total')]
+
+    def test_csv_streams_in_chunks(self):
+        chunks = list(get_exporter('csv').stream(self.sheets()))
+        self.assertGreater(len(chunks), 2)
+        rows = list(csv.reader(StringIO(b''.join(chunks).decode())))
+        self.assertEqual(rows[0], ['Name', 'Count'])
+        self.assertEqual(rows[-1], ['row 4999', '4999'])
+        self.assertEqual(len(rows), 5001)
+
+    def test_colgz_fallback_is_column_major(self):
+        out = BytesIO()
+        EXPORTERS['colgz'].write(self.sheets(rows=3), out)
+        lines = gzip.decompress(out.getvalue()).decode().splitlines()
+        self.assertEqual(json.loads(lines[0])['columns'], ['Name', 'Count'])
+        self.assertEqual(json.loads(lines[1]), [['row 0', 'row 1', 'row 2'], ['0', '1', '2']])
+
+    @unittest.skipUnless(pyarrow, 'pyarrow is not installed')
+    def test_parquet(self):
+        import pyarrow.parquet
+
+        out = BytesIO()
+        EXPORTERS['parquet'].write(self.sheets(), out)
+        table = pyarrow.parquet.read_table(BytesIO(out.getvalue()))
+        self.assertEqual(table.num_rows, 5000)
+        self.assertEqual(table.column('Name')[4999].as_py(), 'row 4999')
+
+    def test_columnar_alias_prefers_parquet(self):
+        self.assertIs(EXPORTERS['columnar'], EXPORTERS['parquet' if pyarrow else 'colgz'])
+
+    def test_exporters_must_implement_write(self):
+        class Incomplete(Exporter):
+            name = 'incomplete'
+        with self.assertRaises(TypeError):
+            Incomplete()
+        self.assertFalse(hasattr(EXPORTERS['xlsx'], 'stream'))
+
+    def test_unknown_format(self):
+        self.assertIsNone(get_exporter('pdf'))
+        self.assertEqual(get_exporter(None).name, 'xlsx')
+        self.assertEqual(get_exporter('CSV').name, 'csv')
+
+
+@plain_static_files
+class ExportFormatViewTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(make_warden('M'))
+        student = make_student('M', student_name='Deepa')
+        make_gatepass(student, status='returned', outing_date=date(2025, 1, 5))
+
+    def test_outings_csv(self):
+        response = self.client.get(reverse('export_outings_excel'), {'format': 'csv', 'year': '2025'})
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('gatepass_outings_2025.csv', response['Content-Disposition'])
+        rows = list(csv.reader(StringIO(body(response).decode())))
+        self.assertEqual(rows[1][:3], ['Deepa', rows[1][1], '2025-01-05'])
+        self.assertEqual(rows[1][6], 'Returned')
+        self.assertEqual(len(rows), 2)
+
+    def test_students_colgz(self):
+        response = self.client.get(reverse('export_students_excel'), {'format': 'colgz'})
+        self.assertIn('.columns.json.gz', response['Content-Disposition'])
+        lines = gzip.decompress(body(response)).decode().splitlines()
+        self.assertEqual(json.loads(lines[1])[0], ['Deepa'])
+
+    def test_unknown_format_redirects(self):
+        response = self.client.get(reverse('export_outings_excel'), {'format': 'pdf'})
+        self.assertRedirects(response, reverse('dashboard_redirect'), fetch_redirect_response=False)
+
+    def test_export_job_format(self):
+        job = self.client.post(reverse('export_outings_job'), {'format': 'csv'}).json()
+        self.assertNotEqual(self.client.post(reverse('export_outings_job')).json()['id'], job['id'])
+        self.assertEqual(self.client.post(reverse('export_outings_job'), {'format': 'pdf'}).status_code, 400)
+
+
+class ExportDataCommandTest(TestCase):
+
+    def test_writes_requested_format(self):
+        make_gatepass(make_student('M'), status='completed', outing_date=date(2025, 2, 1))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'outings.csv')
+            out = StringIO()
+            call_command('export_data', 'outings', '--format', 'csv', '--month', '2', '--output', path, stdout=out)
+            with open(path, newline='') as f:
+                self.assertEqual(len(list(csv.reader(f))), 2)
+        self.assertIn('(csv,', out.getvalue())
+
+    def test_rejects_unknown_format(self):
+        with self.assertRaises(CommandError):
+            call_command('export_data', 'students', '--format', 'pdf', stdout=StringIO())
+
+    def test_failed_export_leaves_no_file(self):
+        make_gatepass(make_student('M'), status='completed', outing_date=date(2025, 2, 1))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'outings.csv')
+            with open(path, 'w') as f:
+                f.write('earlier export')
+            with mock.patch.object(type(EXPORTERS['csv']), 'write', side_effect=RuntimeError('disk full')):
+                with self.assertRaises(RuntimeError):
+                    call_command('export_data', 'outings', '--format', 'csv', '--output', path, stdout=StringIO())
+            self.assertEqual(os.listdir(tmp), ['outings.csv'])
+            with open(path) as f:
+                self.assertEqual(f.read(), 'earlier export')
@@ -0,0 +1,109 @@
+from datetime import date
+from io import BytesIO
+
+import openpyxl
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+from django.urls import reverse
+
+from .exporters import estimate_widths, MAX_COLUMN_WIDTH, MIN_COLUMN_WIDTH
+from .exports import outing_filters, outings_filename
+from .testing import make_gatepass, make_student, make_user, make_warden, plain_static_files
+
+
+def load(response):
+    return openpyxl.load_workbook(BytesIO(b''.join(response.streaming_content)))
+
+
+def rows(ws):
+    return [list(row) for row in ws.iter_rows(values_only=True)]
+
+
+@plain_static_files
+class ExcelExportTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.warden = make_warden('M')
+        self.client.force_login(self.warden)
+
+    def test_students_export(self):
+        out = make_gatepass(make_student('F', student_name='Asha'), status='security_approved',
+                            warden_approval=self.warden, outing_date=date(2025, 3, 1))
+        make_student('M', student_name='Bala')
+
+        response = self.client.get(reverse('export_students_excel'))
+
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertIn('attachment; filename="gatepass_export_', response['Content-Disposition'])
+        wb = load(response)
+        self.assertEqual(wb.sheetnames, ['Students', 'Students Out'])
+        students = rows(wb['Students'])
+        self.assertEqual(students[0][:3], ['Student Name', 'Hall Ticket No', 'Room No'])
+        self.assertEqual([row[0] for row in students[1:]], ['Asha', 'Bala'])
+        self.assertEqual(students[1][3], 'Female')
+
+        students_out = rows(wb['Students Out'])
+        self.assertEqual(students_out[1][:3], ['Asha', out.student.hall_ticket_no, '2025-03-01'])
+        self.assertEqual(students_out[1][7], self.warden.username)
+        self.assertEqual(students_out[-1][:2], ['Total students currently out', 1])
+
+    def test_outings_export_filters_and_monthly_counts(self):
+        student = make_student('M', student_name='Chandra')
+        for outing_date, status in [
+            (date(2025, 1, 5), 'returned'),
+            (date(2025, 1, 20), 'completed'),
+            (date(2025, 2, 2), 'returned'),
+            (date(2024, 12, 30), 'returned'),
+            (date(2025, 1, 7), 'pending'),
+        ]:
+            make_gatepass(student, status=status, outing_date=outing_date)
+
+        response = self.client.get(reverse('export_outings_excel'), {'year': '2025'})
+
+        self.assertIn('gatepass_outings_2025.xlsx', response['Content-Disposition'])
+        wb = load(response)
+        outings = rows(wb['Outings'])
+        self.assertEqual([row[2] for row in outings[1:4]], ['2025-02-02', '2025-01-20', '2025-01-05'])
+        self.assertEqual(outings[1][6], 'Returned')
+        self.assertEqual(outings[-1][:2], ['Total outings in selection', 3])
+        self.assertEqual(rows(wb['Monthly Counts'])[1:], [
+            ['2025-01', 2], ['2025-02', 1], [None, None], ['Grand total outings', 3]
+        ])
+
+    def test_column_widths_are_estimated(self):
+        make_student('M', student_name='A' * 30)
+        ws = load(self.client.get(reverse('export_students_excel')))['Students']
+        self.assertEqual(ws.column_dimensions['A'].width, 32)
+        self.assertEqual(ws.column_dimensions['C'].width, MIN_COLUMN_WIDTH)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        student = make_student('M')
+        make_gatepass(student, status='returned')
+        self.client.get(reverse('export_outings_excel'))  # warm up session/user caches
+        with self.assertNumQueries(4) as ctx:
+            self.client.get(reverse('export_outings_excel'))
+        for _ in range(30):
+            make_gatepass(make_student('M'), status='returned')
+        with self.assertNumQueries(len(ctx.captured_queries)):
+            self.client.get(reverse('export_outings_excel'))
+
+    def test_students_cannot_export(self):
+        self.client.force_login(make_user('student'))
+        response = self.client.get(reverse('export_outings_excel'))
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+
+
+class ExportHelpersTest(TestCase):
+
+    def test_estimate_widths_is_clamped(self):
+        self.assertEqual(
+            estimate_widths(['Name', 'Notes'], [['x' * 20, 'y' * 500], [None, '']]),
+            [22, MAX_COLUMN_WIDTH]
+        )
+
+    def test_outing_filters_ignore_bad_year(self):
+        filters = outing_filters({'year': 'abc', 'month': '3', 'status_filter': 'returned'})
+        self.assertEqual((filters['year'], filters['month']), (None, None))
+        self.assertEqual(outings_filename(filters), 'gatepass_outings_returned.xlsx')
@@ -0,0 +1,80 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import GatePass, Notification, Student, User
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class HotQueryIndexTest(TestCase):
+    """EXPLAIN the dashboard/export/scan queries against generate_sample_data output."""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_sample_data', count=300, wardens=4, security=3, seed=1, stdout=StringIO())
+        cls.student = Student.objects.first()
+        cls.security = User.objects.filter(role='security').first()
+
+    def assertUsesIndex(self, queryset, index_names):
+        if connection.vendor == 'postgresql':
+            # Tiny tables make a seq scan cheapest; we only care that the index is usable
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        self.assertTrue(
+            any(name in plan for name in index_names),
+            f'Expected one of {index_names} in plan:\n{plan}'
+        )
+
+    def test_dashboard_status_listing(self):
+        self.assertUsesIndex(
+            GatePass.objects.filter(status='pending').order_by('-created_at'),
+            ['gatepass_status_created_idx']
+        )
+
+    def test_warden_gender_scoped_listing(self):
+        queryset = GatePass.objects.filter(
+            status='warden_approved', student__user__gender__iexact='M'
+        ).exclude(student__user__gender__isnull=True).order_by('-created_at')
+        self.assertUsesIndex(queryset, ['gatepass_status_created_idx'])
+
+    def test_student_history(self):
+        self.assertUsesIndex(
+            GatePass.objects.filter(student=self.student).order_by('-created_at'),
+            ['gatepass_student_created_idx']
+        )
+
+    def test_overdue_scan(self):
+        queryset = GatePass.objects.filter(
+            status='security_approved', expected_return_date__lt=timezone.localdate()
+        ).order_by('expected_return_date')
+        self.assertUsesIndex(queryset, ['gatepass_status_return_idx'])
+
+    def test_outing_export_range(self):
+        today = timezone.localdate()
+        queryset = GatePass.objects.filter(
+            status__in=['security_approved', 'returned', 'completed'],
+            outing_date__gte=today - timedelta(days=365),
+            outing_date__lte=today,
+        ).order_by('-outing_date', '-outing_time')
+        self.assertUsesIndex(queryset, ['gatepass_status_outing_idx'])
+
+    def test_security_dashboard_exits_and_returns(self):
+        self.assertUsesIndex(
+            GatePass.objects.filter(status='security_approved', security_approval=self.security).order_by('-created_at'),
+            ['gatepass_exit_by_status_idx']
+        )
+        self.assertUsesIndex(
+            GatePass.objects.filter(status='returned', return_verified_by=self.security).order_by('-created_at'),
+            ['gatepass_return_by_status_idx']
+        )
+
+    def test_notification_feed(self):
+        self.assertUsesIndex(
+            Notification.objects.filter(user=self.security).order_by('-created_at')[:12],
+            ['notification_user_created_idx']
+        )
@@ -0,0 +1,123 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import metrics, roster
+from .notifications import notify_many
+from .testing import make_gatepass, make_student, make_user, make_warden, plain_static_files
+from .transitions import transition
+
+
+def samples(text):
+    """{'name{labels}': value} of every sample line"""
+    return dict(
+        line.rsplit(' ', 1) for line in text.splitlines()
+        if line and not line.startswith('#')
+    )
+
+
+@plain_static_files
+@override_settings(METRICS_TOKEN='s3cret', METRICS_DIR='', METRICS_GAUGE_INTERVAL=60)
+class MetricsEndpointTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.student = make_student('M')
+        self.warden = make_warden('M')
+
+    def scrape(self):
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        return samples(response.content.decode())
+
+    def test_counters_and_histograms(self):
+        gatepass = make_gatepass(self.student)
+        transition(gatepass, 'warden_approve', self.warden)
+        notify_many([self.warden, self.student.user], gatepass, 'gatepass_request', 'New request')
+        self.client.force_login(self.student.user)
+        self.client.get(reverse('student_dashboard'))
+        self.client.force_login(self.warden)
+        self.client.get(reverse('export_outings_excel'), {'format': 'csv'}).getvalue()
+        self.client.logout()
+
+        values = self.scrape()
+        self.assertEqual(values['gatepass_transitions_total{from_status="new",to_status="pending"}'], '1')
+        self.assertEqual(values['gatepass_transitions_total{from_status="pending",to_status="warden_approved"}'], '1')
+        self.assertEqual(values['gatepass_notifications_total{type="gatepass_request"}'], '2')
+        self.assertEqual(values['gatepass_http_requests_total{method="GET",status="200",view="student_dashboard"}'], '1')
+        self.assertEqual(values['gatepass_http_request_duration_seconds_count{view="student_dashboard"}'], '1')
+        self.assertEqual(values['gatepass_http_request_duration_seconds_bucket{view="student_dashboard",le="+Inf"}'], '1')
+        self.assertEqual(values['gatepass_export_duration_seconds_count{format="csv",source="download"}'], '1')
+
+    def test_gauges_come_from_a_cached_snapshot(self):
+        make_gatepass(self.student)
+        make_gatepass(self.student, status='warden_approved')
+        away = make_gatepass(make_student('M'), status='security_approved', days_ahead=-3)
+        roster.sync([away])
+
+        values = self.scrape()
+        self.assertEqual(values['gatepass_gatepasses{status="pending"}'], '1')
+        self.assertEqual(values['gatepass_gatepasses{status="warden_approved"}'], '1')
+        self.assertEqual(values['gatepass_gatepasses{status="security_approved"}'], '1')
+        self.assertEqual(values['gatepass_overdue_gatepasses'], '1')
+
+        make_gatepass(self.student)
+        with self.assertNumQueries(0):
+            values = self.scrape()
+        self.assertEqual(values['gatepass_gatepasses{status="pending"}'], '1')
+
+        snapshot = cache.get('gatepass:metrics:gauges')
+        cache.set('gatepass:metrics:gauges', {**snapshot, 'updated_at': snapshot['updated_at'] - 61}, None)
+        self.assertEqual(self.scrape()['gatepass_gatepasses{status="pending"}'], '2')
+
+    def test_access(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.client.force_login(self.warden)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.client.force_login(make_user('superadmin'))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+        with self.settings(METRICS_TOKEN=''):
+            self.client.logout()
+            self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+
+
+class MultiprocessMetricsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_workers_are_added_up(self):
+        other = {
+            'counters': {'gatepass_notifications_total': {'type="overdue_return"': 4}},
+            'histograms': {'gatepass_export_duration_seconds': {
+                'format="xlsx",source="job"': [0] * 8 + [1] + [0] * 3 + [2.0],
+            }},
+        }
+        with open(os.path.join(self.directory, 'metrics-1-1.json'), 'w') as f:
+            json.dump(other, f)
+
+        with self.settings(METRICS_DIR=self.directory):
+            metrics.count('gatepass_notifications_total', 2, type='overdue_return')
+            metrics.observe('gatepass_export_duration_seconds', 3.0, format='xlsx', source='job')
+            values = samples(metrics.render())
+
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+        self.assertEqual(values['gatepass_notifications_total{type="overdue_return"}'], '6')
+        job = 'format="xlsx",source="job"'
+        self.assertEqual(values[f'gatepass_export_duration_seconds_bucket{{{job},le="2.5"}}'], '1')
+        self.assertEqual(values[f'gatepass_export_duration_seconds_bucket{{{job},le="5"}}'], '2')
+        self.assertEqual(values[f'gatepass_export_duration_seconds_count{{{job}}}'], '2')
+        self.assertEqual(values[f'gatepass_export_duration_seconds_sum{{{job}}}'], '5.0')
+        self.assertLessEqual(float(values['gatepass_gauges_updated_timestamp_seconds']), timezone.now().timestamp())
@@ -0,0 +1,164 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Notification, User
+from .notifications import (
+    NotificationFeed, bulk_notification_deletes, get_notification_feed, notifications_created, sync_unread_counts,
+)
+from .testing import make_student, make_gatepass, make_user, make_warden, plain_static_files
+
+
+@plain_static_files
+@override_settings(NOTIFICATION_FEED_TIMEOUT=300)
+class NotificationFeedTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.student = make_student('M')
+        self.user = self.student.user
+        self.gatepass = make_gatepass(self.student)
+
+    def notify(self, message='Hello', **extra):
+        return Notification.objects.create(
+            user=self.user, gatepass=self.gatepass, notification_type='warden_approval', message=message, **extra
+        )
+
+    def unread(self):
+        return User.objects.get(pk=self.user.pk).unread_notifications
+
+    def test_feed_is_cached_until_a_notification_is_saved(self):
+        self.notify('first')
+        self.assertEqual([n.message for n in get_notification_feed(self.user.pk)], ['first'])
+        with self.assertNumQueries(0):
+            get_notification_feed(self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notify('second')
+        with self.assertNumQueries(1):
+            messages = [n.message for n in get_notification_feed(self.user.pk)]
+        self.assertEqual(messages, ['second', 'first'])
+
+    def test_context_feed_is_lazy(self):
+        with self.assertNumQueries(0):
+            feed = NotificationFeed(self.user)
+            self.assertEqual(feed.unread_count, 0)
+        with self.assertNumQueries(1):
+            self.assertFalse(feed)
+            self.assertEqual(len(feed), 0)
+
+    def test_unread_counter_follows_create_and_read(self):
+        first = self.notify()
+        self.notify()
+        self.notify(is_read=True)
+        self.assertEqual(self.unread(), 2)
+
+        first.is_read = True
+        first.save()
+        self.assertEqual(self.unread(), 1)
+        first.save()  # unchanged read state must not double count
+        self.assertEqual(self.unread(), 1)
+
+    def test_saving_a_loaded_user_keeps_newer_notifications_counted(self):
+        loaded = User.objects.get(pk=self.user.pk)
+        self.notify()
+        loaded.first_name = 'Renamed'
+        loaded.save()
+        self.assertEqual(self.unread(), 1)
+
+        self.client.force_login(make_user('superadmin'))
+        loaded = User.objects.get(pk=self.user.pk)
+        self.notify()
+        with mock.patch('gatepass.views.get_object_or_404', return_value=loaded):
+            self.client.get(reverse('approve_user', args=[self.user.pk]))
+        self.assertEqual(self.unread(), 2)
+        self.assertEqual(User.objects.get(pk=self.user.pk).first_name, 'Renamed')
+
+    def test_bulk_created_notifications_are_counted(self):
+        get_notification_feed(self.user.pk)
+        batch = Notification.objects.bulk_create([
+            Notification(user=self.user, gatepass=self.gatepass, notification_type='overdue_return', message='late')
+            for _ in range(3)
+        ])
+        with self.captureOnCommitCallbacks(execute=True):
+            notifications_created(batch)
+        self.assertEqual(self.unread(), 3)
+        self.assertEqual(len(get_notification_feed(self.user.pk)), 3)
+
+    def test_deleting_a_gatepass_updates_counters_and_feeds(self):
+        self.notify()
+        self.notify(is_read=True)
+        other = make_gatepass(self.student)
+        Notification.objects.create(user=self.user, gatepass=other, notification_type='gatepass_request', message='kept')
+        self.assertEqual(len(get_notification_feed(self.user.pk)), 3)
+        self.assertEqual(self.unread(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.gatepass.delete()
+            # The cached feed is only dropped once the delete commits
+            self.assertEqual(len(get_notification_feed(self.user.pk)), 3)
+        self.assertEqual(self.unread(), 1)
+        self.assertEqual([n.message for n in get_notification_feed(self.user.pk)], ['kept'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.filter(user=self.user).delete()
+        self.assertEqual(self.unread(), 0)
+        self.assertEqual(get_notification_feed(self.user.pk), [])
+
+    def test_bulk_deletes_adjust_counters_once(self):
+        wardens = [make_warden('M') for _ in range(3)]
+        for n, warden in enumerate(wardens):
+            for i in range(4):
+                # The last warden has read everything
+                Notification.objects.create(
+                    user=warden, gatepass=self.gatepass, notification_type='gatepass_request', message='new',
+                    is_read=n == 2 or i == 0,
+                )
+        for warden in wardens:
+            get_notification_feed(warden.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries, bulk_notification_deletes():
+                self.gatepass.delete()
+        counter_updates = [q['sql'] for q in queries.captured_queries if 'unread_notifications' in q['sql']]
+        # Deltas of -3, -3 and 0: one UPDATE
+        self.assertEqual(len(counter_updates), 1)
+        self.assertEqual(
+            list(User.objects.filter(pk__in=[w.pk for w in wardens]).values_list('unread_notifications', flat=True)),
+            [0, 0, 0]
+        )
+        for warden in wardens:
+            with self.assertNumQueries(1):
+                self.assertEqual(get_notification_feed(warden.pk), [])
+
+    def test_rejecting_a_user_updates_other_users_counters(self):
+        warden = make_warden('M')
+        for _ in range(2):
+            Notification.objects.create(user=warden, gatepass=self.gatepass, notification_type='gatepass_request', message='new')
+        self.client.force_login(make_user('superadmin'))
+        self.client.get(reverse('reject_user', args=[self.user.pk]))
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertEqual(User.objects.get(pk=warden.pk).unread_notifications, 0)
+
+    def test_sync_unread_counts_repairs_drift(self):
+        self.notify()
+        self.notify()
+        Notification.objects.filter(user=self.user)[:1].get().delete()
+        User.objects.filter(pk=self.user.pk).update(unread_notifications=7)
+        sync_unread_counts()
+        self.assertEqual(self.unread(), 1)
+
+    def test_dashboard_bell_served_from_cache(self):
+        self.notify('Your gatepass request has been approved')
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('student_dashboard'))
+        self.assertContains(response, 'Your gatepass request has been approved')
+        self.assertContains(response, 'notif-badge')
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('student_dashboard'))
+        self.assertFalse(any('gatepass_notification' in query['sql'] for query in queries.captured_queries))
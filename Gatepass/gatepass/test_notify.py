@@ -0,0 +1,71 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from .models import Notification
+from .notifications import notify_many, security_recipients, warden_recipients
+from .testing import make_gatepass, make_security, make_student, make_user, make_warden, plain_static_files
+
+
+@plain_static_files
+class NotifyManyTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.gatepass = make_gatepass(make_student('M'))
+
+    def test_single_insert_regardless_of_headcount(self):
+        for size in (5, 50):
+            recipients = [make_security() for _ in range(size)]
+            # insert + one unread-counter update
+            with self.assertNumQueries(2):
+                created = notify_many(recipients, self.gatepass, 'warden_approval', 'Approved')
+            self.assertEqual(len(created), size)
+        self.assertEqual(Notification.objects.count(), 55)
+
+    def test_accepts_ids_and_bumps_unread_counters(self):
+        user = make_security()
+        notify_many([user.pk, user], self.gatepass, 'warden_approval', 'Approved')
+        user.refresh_from_db()
+        self.assertEqual(user.unread_notifications, 1)
+
+    def test_no_recipients_no_queries(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(notify_many([], self.gatepass, 'warden_approval', 'Approved'), [])
+
+    def test_warden_recipients_are_gender_scoped(self):
+        male = make_warden('M')
+        female = make_warden('F')
+        make_user('warden', gender='M', is_approved=False)
+        self.assertEqual(warden_recipients(' m '), [male.pk])
+        self.assertEqual(warden_recipients('F'), [female.pk])
+        self.assertEqual(warden_recipients(None), [])
+
+    def test_recipients_follow_approvals_and_deletions(self):
+        first = make_security()
+        pending = make_user('security', is_approved=False)
+        self.assertEqual(security_recipients(), [first.pk])
+
+        # Queryset updates and deletes are seen too: nothing is cached per process
+        type(pending).objects.filter(pk=pending.pk).update(is_approved=True)
+        self.assertEqual(sorted(security_recipients()), [first.pk, pending.pk])
+        first.delete()
+        self.assertEqual(security_recipients(), [pending.pk])
+        notify_many(security_recipients(), self.gatepass, 'warden_approval', 'Approved')
+        self.assertEqual(list(Notification.objects.values_list('user_id', flat=True)), [pending.pk])
+
+    def test_warden_approval_notifies_only_approved_security(self):
+        student = make_student('F')
+        warden = make_warden('F')
+        gatepass = make_gatepass(student)
+        on_duty = make_security()
+        make_user('security', is_approved=False)
+
+        self.client.force_login(warden)
+        self.client.post(
+            reverse('warden_approve_gatepass', args=[gatepass.pk]),
+            {'action': 'approve', 'parent_verification': 'on'}
+        )
+
+        recipients = set(Notification.objects.filter(gatepass=gatepass).values_list('user_id', flat=True))
+        self.assertEqual(recipients, {on_duty.pk, student.user_id})
@@ -0,0 +1,160 @@
+import socketserver
+import threading
+from io import StringIO
+
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .models import OutboundEmail, User
+from .outbox import deliver_queued_emails, queue_email
+from .testing import plain_static_files
+
+
+class FailingBackend(BaseEmailBackend):
+    """Rejects every message, like an SMTP server refusing the recipient"""
+
+    def send_messages(self, email_messages):
+        raise ConnectionRefusedError('SMTP unavailable')
+
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: accepts everything and records each DATA payload"""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 fake ESMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command.startswith('EHLO'):
+                self.reply('250 fake')
+            elif command == 'DATA':
+                self.reply('354 go ahead')
+                data = []
+                for line in iter(self.rfile.readline, b''):
+                    if line == b'.\r\n':
+                        break
+                    data.append(line)
+                self.server.messages.append(b''.join(data).decode())
+                self.reply('250 queued')
+            elif command == 'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 ok')
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeSMTPHandler)
+        self.connections = 0
+        self.messages = []
+
+
+@plain_static_files
+class OutboxTest(TestCase):
+
+    def queue(self, count=1):
+        for n in range(count):
+            queue_email(f'user{n}@example.com', 'Gatepass Account Details', f'Password: secret{n}')
+
+    def test_registration_queues_instead_of_sending(self):
+        # No on-commit callbacks run: the row is written with the user
+        response = self.client.post(reverse('register'), {
+            'role': 'security',
+            'username': 'guard1',
+            'email': 'guard1@example.com',
+            'first_name': 'Gate',
+            'last_name': 'Guard',
+            'shift': 'Night',
+            'password1': 'Secret123',
+            'password2': 'Secret123',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(User.objects.filter(username='guard1').exists())
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutboundEmail.objects.get()
+        self.assertEqual((email.to_email, email.status), ('guard1@example.com', 'queued'))
+        self.assertIn('Username: guard1', email.body)
+
+    def test_nothing_queued_when_transaction_rolls_back(self):
+        try:
+            with transaction.atomic():
+                queue_email('user@example.com', 'Subject', 'Body')
+                self.assertTrue(OutboundEmail.objects.exists())
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_worker_delivers_and_redacts_body(self):
+        self.queue(3)
+        result = deliver_queued_emails()
+
+        self.assertEqual(result, (3, 0))
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [f'user{n}@example.com' for n in range(3)])
+        self.assertFalse(OutboundEmail.objects.exclude(status='sent').exists())
+        self.assertFalse(OutboundEmail.objects.exclude(body='').exists())
+        self.assertEqual(deliver_queued_emails(), (0, 0))
+
+    @override_settings(EMAIL_BACKEND='gatepass.test_outbox.FailingBackend')
+    def test_failures_are_retried_then_given_up(self):
+        self.queue()
+        self.assertEqual(deliver_queued_emails(max_attempts=2), (0, 1))
+        email = OutboundEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), ('queued', 1))
+        self.assertIn('SMTP unavailable', email.last_error)
+
+        deliver_queued_emails(max_attempts=2)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('failed', 2))
+        self.assertEqual(deliver_queued_emails(max_attempts=2), (0, 0))
+
+    def test_one_smtp_connection_per_batch(self):
+        server = FakeSMTPServer()
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        self.queue(5)
+        with override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=server.server_address[1],
+            EMAIL_USE_TLS=False,
+        ):
+            self.assertEqual(deliver_queued_emails(batch_size=3), (3, 0))
+            self.assertEqual(deliver_queued_emails(batch_size=3), (2, 0))
+
+        self.assertEqual(server.connections, 2)
+        self.assertEqual(len(server.messages), 5)
+        self.assertIn('Password: secret0', server.messages[0])
+
+    def test_management_command_drains_queue(self):
+        self.queue(4)
+        out = StringIO()
+        call_command('send_queued_emails', '--batch-size', '3', stdout=out)
+        self.assertIn('Sent 4 email(s), 0 failed.', out.getvalue())
+        self.assertEqual(len(mail.outbox), 4)
+
+    @override_settings(EMAIL_BACKEND='gatepass.test_outbox.FailingBackend')
+    def test_management_command_stops_draining_after_a_failure(self):
+        self.queue(6)
+        out = StringIO()
+        call_command('send_queued_emails', '--batch-size', '3', '--max-attempts', '2', stdout=out)
+        self.assertIn('Sent 0 email(s), 3 failed.', out.getvalue())
+        # One attempt each at most: nothing has used up its retries
+        self.assertFalse(OutboundEmail.objects.filter(status='failed').exists())
+        self.assertEqual(sorted(OutboundEmail.objects.values_list('attempts', flat=True)), [0, 0, 0, 1, 1, 1])
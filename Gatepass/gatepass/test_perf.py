@@ -0,0 +1,75 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import perf
+from .models import Student
+from .testing import make_gatepass, make_student, make_user, plain_static_files
+
+
+@plain_static_files
+@override_settings(PERF_SAMPLE_RATE=1, PERF_SLOW_MS=60_000, PERF_SIMILAR_QUERIES=5)
+class PerformanceMiddlewareTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        perf.reset()
+        self.student = make_student('M')
+        make_gatepass(self.student)
+        self.client.force_login(self.student.user)
+
+    def test_measured_request(self):
+        with self.assertLogs('gatepass.perf', 'INFO') as logs:
+            response = self.client.get(reverse('student_dashboard'))
+
+        timing = dict(part.split(';', 1) for part in response['Server-Timing'].split(', '))
+        self.assertEqual(set(timing), {'total', 'db', 'tpl'})
+        entry = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(logs.records[-1].levelname, 'INFO')
+        self.assertEqual((entry['view'], entry['status'], entry['flags']), ('student_dashboard', 200, []))
+        self.assertIn(f'desc="{entry["queries"]} queries"', timing['db'])
+        self.assertGreater(entry['queries'], 0)
+        self.assertGreater(entry['template_ms'], 0)
+        self.assertEqual(entry['bytes'], len(response.content))
+
+    @override_settings(PERF_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_only_counted(self):
+        response = self.client.get(reverse('student_dashboard'))
+        self.assertNotIn('Server-Timing', response)
+
+        superadmin = make_user('superadmin')
+        self.client.force_login(superadmin)
+        data = self.client.get(reverse('superadmin_performance'), {'format': 'json'}).json()
+        row = next(row for row in data['views'] if row['view'] == 'student_dashboard')
+        self.assertEqual((row['requests'], row['sampled']), (1, 0))
+
+    def test_repeated_statement_is_flagged(self):
+        students = [make_student('M') for _ in range(5)]
+        with perf.measuring() as measurement:
+            for student in students:
+                Student.objects.get(pk=student.pk)
+            Student.objects.get(pk=students[0].pk)
+            list(Student.objects.filter(pk__in=[students[0].pk]))
+            list(Student.objects.filter(pk__in=[s.pk for s in students]))
+
+        self.assertEqual(measurement.queries, 8)
+        statement, times = measurement.most_repeated()
+        self.assertEqual(times, 6)
+        self.assertIn('"gatepass_student"."id" = %s', statement)
+        self.assertEqual(measurement.duplicates, 1)
+        # IN lists of any length count as the same statement
+        self.assertEqual([count for sql, count in measurement.statements.items() if 'IN (...)' in sql], [2])
+
+    def test_superadmin_aggregate(self):
+        self.client.get(reverse('student_dashboard'))
+        self.client.get(reverse('student_dashboard'))
+
+        self.assertRedirects(self.client.get(reverse('superadmin_performance')), reverse('home'), fetch_redirect_response=False)
+        self.client.force_login(make_user('superadmin'))
+        response = self.client.get(reverse('superadmin_performance'))
+        row = next(row for row in response.context['views'] if row['view'] == 'student_dashboard')
+        self.assertEqual((row['requests'], row['sampled']), (2, 2))
+        self.assertGreater(row['avg_queries'], 0)
+        self.assertContains(response, 'student_dashboard')
@@ -0,0 +1,73 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import profiles
+from .models import Student
+from .testing import make_security, make_student, make_user, plain_static_files
+
+
+def profile_queries(queries):
+    return [q['sql'] for q in queries if any(f'FROM "gatepass_{table}"' in q['sql'] for table in ('student', 'warden', 'security'))]
+
+
+@plain_static_files
+class CachedProfileTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.student = make_student('M', room_no='A-101')
+        self.client.force_login(self.student.user)
+
+    def get_dashboard(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('student_dashboard'))
+        return response, profile_queries(queries)
+
+    def test_student_pages_skip_the_profile_query_once_warm(self):
+        response, queries = self.get_dashboard()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.context['student'], self.student)
+
+        response, queries = self.get_dashboard()
+        self.assertEqual(queries, [])
+        self.assertEqual(response.context['student'].room_no, 'A-101')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('create_gatepass'))
+        self.assertEqual(profile_queries(queries), [])
+
+    def test_saves_invalidate(self):
+        self.get_dashboard()
+        student = Student.objects.get(pk=self.student.pk)
+        student.room_no = 'B-202'
+        student.save()
+        response, queries = self.get_dashboard()
+        self.assertEqual(response.context['student'].room_no, 'B-202')
+
+        student.delete()
+        response, queries = self.get_dashboard()
+        self.assertEqual(response.status_code, 404)
+        # Not having a profile is cached as well
+        response, queries = self.get_dashboard()
+        self.assertEqual((response.status_code, queries), (404, []))
+
+        user = self.student.user
+        user.role = 'security'
+        user.save()
+        self.assertIsNone(profiles.profile_for(type(user).objects.get(pk=user.pk)))
+
+    def test_request_profile(self):
+        security = make_security()
+        self.client.force_login(security)
+        self.client.get(reverse('security_dashboard'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('security_dashboard'))
+        self.assertEqual(profile_queries(queries), [])
+        self.assertEqual(response.wsgi_request.profile.user_id, security.pk)
+        self.assertContains(response, security.security_profile.name)
+
+        self.client.force_login(make_user('superadmin'))
+        response = self.client.get(reverse('superadmin_dashboard'))
+        self.assertFalse(response.wsgi_request.profile)
@@ -0,0 +1,130 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import roster
+from .models import GatePass, OutRosterEntry
+from .overdue import scan_overdue_returns
+from .testing import make_gatepass, make_security, make_student, make_user, make_warden, plain_static_files
+from .transitions import bulk_transition, transition
+
+
+class RosterMaintenanceTest(TestCase):
+
+    def setUp(self):
+        self.guard = make_security()
+        self.student = make_student('F')
+
+    def test_exit_and_return(self):
+        gatepass = make_gatepass(self.student, status='warden_approved')
+        self.assertFalse(OutRosterEntry.objects.exists())
+
+        transition(GatePass.objects.get(pk=gatepass.pk), 'security_approve', self.guard)
+        entry = OutRosterEntry.objects.get()
+        self.assertEqual((entry.gatepass_id, entry.student_id, entry.gender), (gatepass.pk, self.student.pk, 'F'))
+        self.assertEqual(entry.expected_return_date, gatepass.expected_return_date)
+        self.assertEqual(entry.left_at, GatePass.objects.get(pk=gatepass.pk).updated_at)
+
+        transition(GatePass.objects.get(pk=gatepass.pk), 'record_return', self.guard)
+        self.assertFalse(OutRosterEntry.objects.exists())
+
+    def test_bulk_exit_is_one_insert(self):
+        passes = list(GatePass.objects.filter(pk__in=[
+            make_gatepass(self.student, status='warden_approved').pk for _ in range(5)
+        ]).select_related('student__user'))
+        with CaptureQueriesContext(connection) as ctx:
+            bulk_transition(passes, 'security_approve', self.guard)
+        statements = [q['sql'].split()[0] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(statements, ['UPDATE', 'INSERT'])
+        self.assertEqual(OutRosterEntry.objects.count(), 5)
+
+    def test_saves_deletes_and_gender_changes(self):
+        gatepass = make_gatepass(self.student, status='security_approved')
+        left_at = OutRosterEntry.objects.get().left_at
+
+        gatepass.expected_return_date += timedelta(days=2)
+        gatepass.save()
+        entry = OutRosterEntry.objects.get()
+        self.assertEqual((entry.expected_return_date, entry.left_at), (gatepass.expected_return_date, left_at))
+
+        user = self.student.user
+        user.gender = 'M'
+        user.save()
+        self.assertEqual(OutRosterEntry.objects.get().gender, 'M')
+
+        gatepass.delete()
+        self.assertFalse(OutRosterEntry.objects.exists())
+
+
+class ReconcileTest(TestCase):
+
+    def setUp(self):
+        self.student = make_student('M')
+        self.out = make_gatepass(self.student, status='security_approved')
+        self.edited = make_gatepass(self.student, status='security_approved')
+        self.returned = make_gatepass(self.student, status='security_approved')
+        # Set-based writes bypass the roster
+        GatePass.objects.filter(pk=self.returned.pk).update(status='returned')
+        GatePass.objects.filter(pk=self.edited.pk).update(expected_return_date=self.edited.expected_return_date + timedelta(days=1))
+        self.missing = make_gatepass(self.student, status='warden_approved')
+        GatePass.objects.filter(pk=self.missing.pk).update(status='security_approved')
+
+    def test_reports_and_fixes_drift(self):
+        drift = roster.reconcile(fix=False)
+        self.assertEqual(drift, roster.Drift(missing=[self.missing.pk], stale=[self.returned.pk], changed=[self.edited.pk]))
+        self.assertEqual(roster.reconcile(fix=False), drift)
+
+        self.assertEqual(roster.reconcile(), drift)
+        self.assertEqual(roster.reconcile(), roster.Drift([], [], []))
+        self.assertEqual(set(OutRosterEntry.objects.values_list('gatepass_id', flat=True)),
+                         {self.out.pk, self.edited.pk, self.missing.pk})
+
+    def test_command(self):
+        with self.assertRaises(CommandError):
+            call_command('reconcile_out_roster', '--check', stdout=StringIO())
+        out = StringIO()
+        call_command('reconcile_out_roster', stdout=out)
+        self.assertIn(f'1 gatepass(es) missing from the roster: #{self.missing.pk}', out.getvalue())
+        self.assertIn('Rebuilt 3 roster row(s).', out.getvalue())
+        out = StringIO()
+        call_command('reconcile_out_roster', '--check', stdout=out)
+        self.assertIn('Out roster is in sync.', out.getvalue())
+
+
+@plain_static_files
+class RosterReadersTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        yesterday = timezone.localdate() - timedelta(days=1)
+        self.student = make_student('M')
+        self.overdue = make_gatepass(self.student, status='security_approved', expected_return_date=yesterday)
+        self.out = make_gatepass(self.student, status='security_approved')
+        make_gatepass(make_student('F'), status='security_approved')
+        # Out according to the history only; readers must ignore it
+        self.ghost = make_gatepass(self.student, status='returned', expected_return_date=yesterday)
+        GatePass.objects.filter(pk=self.ghost.pk).update(status='security_approved')
+
+    def test_warden_students_out(self):
+        self.client.force_login(make_warden('M'))
+        response = self.client.get(reverse('warden_dashboard'))
+        self.assertEqual(response.context['students_out'], 2)
+        self.assertEqual({gp.pk for gp in response.context['students_out_requests']}, {self.overdue.pk, self.out.pk})
+
+        response = self.client.get(reverse('warden_dashboard'), {'status_filter': 'returned'})
+        self.assertEqual(response.context['students_out'], 0)
+
+    def test_overdue_list_and_scan(self):
+        superadmin = make_user('superadmin')
+        self.client.force_login(superadmin)
+        response = self.client.get(reverse('superadmin_dashboard'))
+        self.assertEqual([gp.pk for gp in response.context['overdue_returns']], [self.overdue.pk])
+
+        self.assertEqual(scan_overdue_returns().gatepasses_scanned, 1)
@@ -0,0 +1,74 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db.models import Count, Q
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import roster
+from .models import GatePass, Notification, ParentVerification, User
+from .seeding import generate
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class SampleDataTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_history_is_consistent(self):
+        generated = generate(80, wardens=4, security=3, days=10, seed=5)
+
+        self.assertEqual(generated.students, 80)
+        self.assertEqual(GatePass.objects.count(), generated.gatepasses)
+        self.assertEqual(Notification.objects.count(), generated.notifications)
+        self.assertEqual(ParentVerification.objects.count(), generated.gatepasses)
+        self.assertEqual(set(GatePass.objects.values_list('status', flat=True)), {
+            'pending', 'warden_approved', 'warden_rejected', 'security_approved', 'returned', 'completed',
+        })
+        self.assertFalse(GatePass.objects.filter(status='pending', warden_approval__isnull=False).exists())
+        self.assertFalse(GatePass.objects.filter(status='returned').filter(
+            Q(actual_return_date__isnull=True) | Q(return_verified_by__isnull=True)
+        ).exists())
+        self.assertFalse(GatePass.objects.filter(updated_at__gt=timezone.now()).exists())
+        self.assertGreater(len(set(GatePass.objects.values_list('created_at__date', flat=True))), 5)
+
+        # What the signals would have maintained
+        self.assertEqual(roster.reconcile(fix=False), roster.Drift([], [], []))
+        unread = dict(Notification.objects.filter(is_read=False).values_list('user').annotate(n=Count('id')))
+        for user in User.objects.all():
+            self.assertEqual(user.unread_notifications, unread.get(user.pk, 0))
+
+        for username, password in [('student_1000', 'Student@123'), ('warden_1', 'Warden@123'), ('security_3', 'Security@123')]:
+            self.assertTrue(User.objects.get(username=username).check_password(password))
+
+    def test_seed_is_deterministic(self):
+        def snapshot():
+            return (
+                list(User.objects.order_by('username').values_list('username', 'gender', 'mobile_number')),
+                list(GatePass.objects.order_by('pk').values_list(
+                    'student__hall_ticket_no', 'status', 'purpose', 'outing_time', 'scan_token')),
+                Notification.objects.count(),
+            )
+
+        generate(25, wardens=2, security=2, seed=7)
+        first = snapshot()
+        User.objects.all().delete()
+        generate(25, wardens=2, security=2, seed=7)
+        self.assertEqual(snapshot(), first)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('generate_sample_data', count=30, wardens=2, security=1, batch_size=8, seed=1, stdout=out)
+        self.assertIn('Created 30 students...', out.getvalue())
+        self.assertIn('Total Students: 30', out.getvalue())
+
+        # Existing users are kept
+        out = StringIO()
+        call_command('generate_sample_data', count=40, wardens=2, security=1, seed=2, stdout=out)
+        self.assertIn('Total Students: 10', out.getvalue())
+        self.assertEqual(User.objects.filter(role='student').count(), 40)
+
+        with self.assertRaises(CommandError):
+            call_command('generate_sample_data', count=-1, stdout=StringIO())
@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from .models import GatePass, Notification
+from .scan import InvalidScanCode, read_scan_code, scan_code
+from .testing import make_gatepass, make_security, make_student, make_user
+
+
+class GateScanAPITest(APITestCase):
+    url = reverse('api_gate_scan')
+
+    def setUp(self):
+        cache.clear()
+        self.security = make_security()
+        self.student = make_student('M')
+        self.gatepass = make_gatepass(self.student, status='warden_approved')
+        self.client.force_authenticate(self.security)
+
+    def scan(self, code):
+        return self.client.post(self.url, {'code': code}, format='json')
+
+    def test_exit_then_return(self):
+        code = scan_code(self.gatepass)
+        response = self.scan(code)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['action'], 'exit')
+        self.assertEqual(response.data['gatepass']['status'], 'security_approved')
+        self.assertEqual(response.data['gatepass']['student_name'], self.student.student_name)
+
+        response = self.scan(code)
+        self.assertEqual(response.data['action'], 'return')
+        stored = GatePass.objects.get(pk=self.gatepass.pk)
+        self.assertEqual((stored.status, stored.security_approval, stored.return_verified_by),
+                         ('returned', self.security, self.security))
+        self.assertIsNotNone(stored.actual_return_time)
+        self.assertEqual(
+            list(Notification.objects.filter(user=self.student.user).values_list('notification_type', flat=True)
+                 .order_by('id')),
+            ['security_approval', 'return_recorded'],
+        )
+
+        response = self.scan(code)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['status'], 'returned')
+
+    def test_forged_code_is_refused_without_a_query(self):
+        tampered = scan_code(self.gatepass)[:-1] + '!'
+        with self.assertNumQueries(0):
+            response = self.scan(tampered)
+        self.assertEqual(response.status_code, 400)
+        with self.assertRaises(InvalidScanCode):
+            read_scan_code(self.gatepass.scan_token)
+
+    def test_scan_is_one_indexed_lookup_plus_the_transition(self):
+        code = scan_code(self.gatepass)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.scan(code).status_code, 200)
+        statements = [q['sql'].split()[0] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        # by token, the conditional step, the out roster, the notification and the unread counter
+        self.assertEqual(statements, ['SELECT', 'UPDATE', 'INSERT', 'INSERT', 'UPDATE'])
+        self.assertIn('"scan_token" =', ctx.captured_queries[0]['sql'])
+
+    def test_unscannable_passes_and_roles(self):
+        pending = make_gatepass(self.student)
+        self.assertEqual(self.scan(scan_code(pending)).status_code, 409)
+
+        GatePass.objects.filter(pk=pending.pk).delete()
+        self.assertEqual(self.scan(scan_code(pending)).status_code, 404)
+
+        self.client.force_authenticate(make_user('warden', gender='M'))
+        self.assertEqual(self.scan(scan_code(self.gatepass)).status_code, 403)
+
+    def test_students_get_their_code_while_it_can_be_scanned(self):
+        pending = make_gatepass(self.student)
+        self.client.force_authenticate(self.student.user)
+        rows = {row['id']: row for row in self.client.get(reverse('api_gatepass_list_create')).data['results']}
+        self.assertEqual(rows[self.gatepass.pk]['scan_code'], scan_code(self.gatepass))
+        self.assertIsNone(rows[pending.pk]['scan_code'])
+        self.assertEqual(read_scan_code(rows[self.gatepass.pk]['scan_code']), self.gatepass.scan_token)
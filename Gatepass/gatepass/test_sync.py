@@ -0,0 +1,132 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from .models import GatePass, GatePassTombstone
+from .sync import bulk_tombstones, changes_since, encode_token, scoped_tombstones
+from .testing import make_gatepass, make_security, make_student, make_warden
+
+
+@mock.patch('gatepass.sync.SYNC_LAG', timedelta(0))
+class DeltaSyncTest(APITestCase):
+    url = reverse('api_gatepass_changes')
+
+    def setUp(self):
+        self.male = make_student('M')
+        self.female = make_student('F')
+        self.security = make_security()
+        self.client.force_authenticate(self.security)
+
+    def sync(self, since=None):
+        response = self.client.get(self.url, {'since': since} if since else {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_changes_updates_and_deletes_since_token(self):
+        first, second = make_gatepass(self.male), make_gatepass(self.female)
+        data = self.sync()
+        self.assertEqual(sorted(row['id'] for row in data['changes']), [first.pk, second.pk])
+        self.assertEqual(data['deleted'], [])
+        self.assertFalse(data['has_more'])
+
+        data = self.sync(data['next'])
+        self.assertEqual((data['changes'], data['deleted']), ([], []))
+
+        first.status = 'warden_approved'
+        first.save()
+        third = make_gatepass(self.male)
+        second_id = second.pk
+        second.delete()
+        data = self.sync(data['next'])
+        self.assertEqual([row['id'] for row in data['changes']], [first.pk, third.pk])
+        self.assertEqual(data['changes'][0]['status'], 'warden_approved')
+        self.assertEqual(data['deleted'], [second_id])
+
+    def test_initial_sync_skips_old_tombstones(self):
+        make_gatepass(self.male).delete()
+        self.assertEqual(self.sync()['deleted'], [])
+
+    def test_paging_through_a_large_change_set(self):
+        passes = [make_gatepass(self.male) for _ in range(5)]
+        # Same timestamp for all rows: the id tiebreaker must keep paging exact
+        GatePass.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+        deleted_ids = [gp.pk for gp in passes[:3]]
+        for gp in passes[:3]:
+            gp.delete()
+
+        gatepasses, tombstones = GatePass.objects.all(), GatePassTombstone.objects.all()
+        token = encode_token({'u': None, 'i': 0, 'd': 0, 'at': timezone.now().isoformat()})
+        seen, deleted = [], []
+        while True:
+            changed, gone, token, has_more = changes_since(gatepasses, tombstones, token, page_size=1)
+            seen += [gp.pk for gp in changed]
+            deleted += gone
+            if not has_more:
+                break
+        self.assertEqual(seen, [gp.pk for gp in passes[3:]])
+        self.assertEqual(deleted, deleted_ids)
+
+    def test_scoping_matches_list_endpoint(self):
+        make_gatepass(self.male)
+        female_pass = make_gatepass(self.female)
+        self.client.force_authenticate(make_warden('F'))
+        data = self.sync()
+        self.assertEqual([row['id'] for row in data['changes']], [female_pass.pk])
+
+        male_pass = make_gatepass(self.male)
+        male_id = male_pass.pk
+        male_pass.delete()
+        female_id = female_pass.pk
+        female_pass.delete()
+        self.assertEqual(self.sync(data['next'])['deleted'], [female_id])
+
+        self.client.force_authenticate(self.male.user)
+        self.assertEqual(self.sync(data['next'])['deleted'], [male_id])
+
+    def test_bulk_delete_records_tombstones_once(self):
+        for _ in range(3):
+            make_gatepass(self.male)
+        queryset = GatePass.objects.all()
+        with bulk_tombstones(queryset):
+            queryset.delete()
+        tombstones = GatePassTombstone.objects.all()
+        self.assertEqual(tombstones.count(), 3)
+        self.assertEqual(set(tombstones.values_list('student_user_id', flat=True)), {self.male.user_id})
+        self.assertEqual(scoped_tombstones(make_warden('F')).count(), 0)
+
+    def test_query_count_is_constant(self):
+        data = self.sync()
+        for _ in range(20):
+            make_gatepass(self.male)
+        # changed rows (with student) + tombstones
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'since': data['next']})
+        self.assertEqual(len(response.data['changes']), 20)
+
+    def test_bad_and_expired_tokens(self):
+        self.assertEqual(self.client.get(self.url, {'since': 'garbage'}).status_code, 400)
+        old = encode_token({'u': None, 'i': 0, 'd': 0, 'at': (timezone.now() - timedelta(days=31)).isoformat()})
+        response = self.client.get(self.url, {'since': old})
+        self.assertEqual(response.status_code, 410)
+        self.assertTrue(response.data['reset'])
+
+    def test_prune_command(self):
+        make_gatepass(self.male).delete()
+        GatePassTombstone.objects.update(deleted_at=timezone.now() - timedelta(days=40))
+        make_gatepass(self.male).delete()
+        call_command('prune_sync_tombstones', stdout=StringIO())
+        self.assertEqual(GatePassTombstone.objects.count(), 1)
+
+
+class SyncLagTest(APITestCase):
+
+    def test_rows_younger_than_lag_wait_for_next_poll(self):
+        self.client.force_authenticate(make_security())
+        make_gatepass(make_student('M'))
+        response = self.client.get(reverse('api_gatepass_changes'))
+        self.assertEqual(response.data['changes'], [])
@@ -0,0 +1,127 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from .models import GateEvent, GatePass, Notification
+from .testing import make_gatepass, make_security, make_student, make_user
+
+
+class GateTerminalAPITest(APITestCase):
+    events_url = reverse('api_gate_events')
+    snapshot_url = reverse('api_gate_snapshot')
+
+    def setUp(self):
+        cache.clear()
+        self.guard = make_security()
+        self.student = make_student('M')
+        self.client.force_authenticate(self.guard)
+
+    def upload(self, *events, guard=None):
+        if guard:
+            self.client.force_authenticate(guard)
+        response = self.client.post(self.events_url, {'events': [
+            {'id': event_id, 'gatepass': gatepass.pk, 'type': kind, 'at': at.isoformat()}
+            for event_id, gatepass, kind, at in events
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_snapshot_lists_scannable_passes(self):
+        leaving = make_gatepass(self.student, status='warden_approved')
+        out = make_gatepass(self.student, status='security_approved')
+        make_gatepass(self.student)
+        make_gatepass(self.student, status='returned')
+
+        response = self.client.get(self.snapshot_url)
+        self.assertEqual(response.data['fields'][:3], ['id', 'scan_token', 'status'])
+        self.assertEqual([row[:3] for row in response.data['passes']], [
+            (leaving.pk, leaving.scan_token, 'warden_approved'),
+            (out.pk, out.scan_token, 'security_approved'),
+        ])
+        self.assertEqual(response.data['passes'][0][3], self.student.student_name)
+
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.snapshot_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.upload(('e1', leaving, 'exit', timezone.now()))
+        self.assertEqual(self.client.get(self.snapshot_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_offline_exit_and_return_are_applied_in_order(self):
+        gatepass = make_gatepass(self.student, status='warden_approved')
+        left = timezone.now() - timedelta(hours=3)
+        back = timezone.now() - timedelta(hours=1)
+
+        data = self.upload(('e2', gatepass, 'return', back), ('e1', gatepass, 'exit', left))
+
+        self.assertEqual(data['summary'], {'applied': 2, 'conflict': 0, 'not_found': 0})
+        self.assertEqual([row['id'] for row in data['results']], ['e2', 'e1'])
+        stored = GatePass.objects.get(pk=gatepass.pk)
+        self.assertEqual((stored.status, stored.security_approval, stored.return_verified_by),
+                         ('returned', self.guard, self.guard))
+        local_back = timezone.localtime(back)
+        self.assertEqual((stored.actual_return_date, stored.actual_return_time),
+                         (local_back.date(), local_back.time().replace(microsecond=0)))
+        self.assertEqual(Notification.objects.filter(user=self.student.user).count(), 2)
+
+    def test_upload_is_idempotent(self):
+        gatepass = make_gatepass(self.student, status='warden_approved')
+        first = self.upload(('e1', gatepass, 'exit', timezone.now()))
+        # The terminal lost the response and sends the batch again, with a new event
+        other = make_gatepass(self.student, status='warden_approved')
+        second = self.upload(('e1', gatepass, 'exit', timezone.now()), ('e2', other, 'exit', timezone.now()))
+
+        self.assertEqual(second['results'][0], first['results'][0])
+        self.assertEqual(second['results'][0]['result'], 'applied')
+        self.assertEqual(GateEvent.objects.count(), 2)
+        self.assertEqual(Notification.objects.filter(gatepass=gatepass).count(), 1)
+
+    def test_conflicts(self):
+        now = timezone.now()
+        missed_exit = make_gatepass(self.student, status='warden_approved')
+        shared = make_gatepass(self.student, status='warden_approved')
+        pending = make_gatepass(self.student)
+        deleted = make_gatepass(self.student, status='warden_approved')
+        GatePass.objects.filter(pk=deleted.pk).delete()
+        self.upload(('a1', shared, 'exit', now))
+
+        data = self.upload(
+            ('b1', missed_exit, 'return', now + timedelta(hours=5)),
+            ('b2', shared, 'exit', now),
+            ('b3', pending, 'exit', now),
+            ('b4', deleted, 'exit', now),
+            guard=make_security(),
+        )
+
+        self.assertEqual([(row['result'], row['status']) for row in data['results']], [
+            ('applied', 'returned'),
+            ('conflict', 'security_approved'),
+            ('conflict', 'pending'),
+            ('not_found', None),
+        ])
+        # A return from the future is stamped with the upload time
+        self.assertLessEqual(GatePass.objects.get(pk=missed_exit.pk).actual_return_date, timezone.localdate())
+        self.assertEqual(GatePass.objects.get(pk=shared.pk).security_approval, self.guard)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        def queries(count):
+            passes = [make_gatepass(self.student, status='warden_approved') for _ in range(count)]
+            now = timezone.now()
+            events = [(f'{count}-{gp.pk}-{kind}', gp, kind, now) for gp in passes for kind in ('exit', 'return')]
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.upload(*events)['summary']['applied'], 2 * count)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(queries(3), queries(40))
+
+    def test_roles_and_validation(self):
+        self.assertEqual(self.client.post(self.events_url, {'events': []}, format='json').status_code, 400)
+        bad = {'events': [{'id': 'x', 'gatepass': 1, 'type': 'wave', 'at': timezone.now().isoformat()}]}
+        self.assertEqual(self.client.post(self.events_url, bad, format='json').status_code, 400)
+
+        self.client.force_authenticate(make_user('warden', gender='M'))
+        self.assertEqual(self.client.get(self.snapshot_url).status_code, 403)
+        self.assertEqual(self.client.post(self.events_url, {'events': []}, format='json').status_code, 403)
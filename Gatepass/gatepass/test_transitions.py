@@ -0,0 +1,210 @@
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from . import events, roster
+from .models import GatePass, OutRosterEntry
+from .test_events import RecordingBroker
+from .testing import make_gatepass, make_security, make_student, make_user, make_warden, plain_static_files
+from .transitions import transition
+
+
+class TransitionTest(TestCase):
+
+    def setUp(self):
+        self.broker = RecordingBroker()
+        patcher = mock.patch.object(events, '_broker', self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.warden = make_warden('M')
+        self.gatepass = make_gatepass(make_student('M'), purpose='Home visit')
+
+    def test_applies_as_one_conditional_update_of_changed_columns(self):
+        GatePass.objects.filter(pk=self.gatepass.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        gatepass = GatePass.objects.select_related('student__user').get(pk=self.gatepass.pk)
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+            result = transition(gatepass, 'warden_approve', self.warden, parent_verification=True)
+
+        self.assertEqual(tuple(result), (True, 'warden_approved'))
+        # Savepoints aside (the UPDATE and the roster follow-up are atomic)
+        [update] = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertTrue(update.startswith('UPDATE'))
+        set_clause, where_clause = update.split(' WHERE ')
+        for column in ('status', 'warden_approval_id', 'parent_verification', 'updated_at'):
+            self.assertIn(f'"{column}"', set_clause)
+        self.assertNotIn('"purpose"', set_clause)
+        self.assertIn('"status" = \'pending\'', where_clause)
+
+        stored = GatePass.objects.get(pk=gatepass.pk)
+        self.assertEqual((stored.status, stored.warden_approval, stored.parent_verification),
+                         ('warden_approved', self.warden, True))
+        self.assertEqual(stored.updated_at, gatepass.updated_at)
+        self.assertGreater(stored.updated_at, timezone.now() - timedelta(minutes=1))
+
+        [(channels, event)] = self.broker.published
+        self.assertEqual((event['status'], event['previous_status']), ('warden_approved', 'pending'))
+
+    def test_stale_instance_gets_a_conflict(self):
+        first = GatePass.objects.get(pk=self.gatepass.pk)
+        second = GatePass.objects.get(pk=self.gatepass.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(transition(first, 'warden_approve', self.warden).applied)
+            result = transition(second, 'warden_reject', make_warden('M'), warden_rejection_reason='Late')
+
+        self.assertEqual(tuple(result), (False, 'warden_approved'))
+        self.assertEqual(second.status, 'pending')
+        stored = GatePass.objects.get(pk=self.gatepass.pk)
+        self.assertEqual((stored.warden_approval, stored.warden_rejection_reason), (self.warden, None))
+        self.assertEqual(len(self.broker.published), 1)
+
+    def test_wrong_source_status_and_deleted_pass(self):
+        result = transition(self.gatepass, 'security_approve', make_security())
+        self.assertEqual(tuple(result), (False, 'pending'))
+
+        GatePass.objects.filter(pk=self.gatepass.pk).delete()
+        self.assertEqual(tuple(transition(self.gatepass, 'warden_approve', self.warden)), (False, None))
+
+    def test_saving_the_instance_afterwards_is_not_a_second_transition(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            transition(self.gatepass, 'warden_approve', self.warden)
+            self.gatepass.save()
+        self.assertEqual(len(self.broker.published), 1)
+
+
+class InterleavedTransitionTest(TransactionTestCase):
+    """A return recorded while the exit is still writing the roster"""
+
+    def setUp(self):
+        patcher = mock.patch.object(events, '_broker', RecordingBroker())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.guard = make_security()
+        self.gatepass = make_gatepass(make_student('M'), status='warden_approved')
+
+    def record_return(self, exit_written, return_done):
+        exit_written.wait(5)
+        try:
+            deadline = time.monotonic() + 5
+            while True:
+                try:
+                    transition(GatePass.objects.get(pk=self.gatepass.pk), 'record_return', self.guard)
+                    break
+                except OperationalError:
+                    # SQLite reports the exit's open write as a lock error; wait like a row lock would
+                    if time.monotonic() > deadline:
+                        raise
+                    time.sleep(0.01)
+        finally:
+            return_done.set()
+            connection.close()
+
+    def test_exit_and_return(self):
+        exit_written, return_done = threading.Event(), threading.Event()
+        sync = roster.sync
+
+        def slow_sync(gatepasses):
+            if gatepasses[0].status == roster.OUT:
+                exit_written.set()
+                # Give the return every chance to slip in before the exit's roster write
+                return_done.wait(0.5)
+            sync(gatepasses)
+
+        returning = threading.Thread(target=self.record_return, args=(exit_written, return_done))
+        returning.start()
+        with mock.patch.object(roster, 'sync', slow_sync):
+            self.assertTrue(transition(GatePass.objects.get(pk=self.gatepass.pk), 'security_approve', self.guard).applied)
+        returning.join()
+
+        self.assertEqual(GatePass.objects.get(pk=self.gatepass.pk).status, 'returned')
+        self.assertFalse(OutRosterEntry.objects.exists())
+
+    def test_failed_follow_up_undoes_the_transition(self):
+        with mock.patch.object(roster, 'sync', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                transition(GatePass.objects.get(pk=self.gatepass.pk), 'security_approve', self.guard)
+        self.assertEqual(GatePass.objects.get(pk=self.gatepass.pk).status, 'warden_approved')
+
+
+@plain_static_files
+class ConcurrentPageTest(TestCase):
+
+    def setUp(self):
+        self.security = make_security()
+        self.gatepass = make_gatepass(make_student('M'), status='warden_approved')
+        self.client.force_login(self.security)
+
+    def test_second_guard_gets_409_with_the_current_state(self):
+        url = reverse('security_approve_gatepass', args=[self.gatepass.pk])
+        other_guard = make_security()
+        # The other guard's request passed the status check just before this one committed
+        stale = GatePass.objects.get(pk=self.gatepass.pk)
+        self.assertEqual(self.client.post(url).status_code, 302)
+
+        with mock.patch('gatepass.views.get_object_or_404', return_value=stale):
+            self.client.force_login(other_guard)
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(response.context['readonly'])
+        self.assertContains(response, 'Security Approved', status_code=409)
+        self.assertEqual(GatePass.objects.get(pk=self.gatepass.pk).security_approval, self.security)
+
+    def test_second_return_gets_the_read_only_return_page(self):
+        GatePass.objects.filter(pk=self.gatepass.pk).update(status='security_approved')
+        url = reverse('security_record_return', args=[self.gatepass.pk])
+        form = {
+            'actual_return_date': timezone.localdate().isoformat(), 'actual_return_hour': '6',
+            'actual_return_minute': '0', 'actual_return_ampm': 'PM', 'return_notes': '',
+        }
+        stale = GatePass.objects.get(pk=self.gatepass.pk)
+        self.assertEqual(self.client.post(url, form).status_code, 302)
+
+        with mock.patch('gatepass.views.get_object_or_404', return_value=stale):
+            self.client.force_login(make_security())
+            response = self.client.post(url, form)
+        self.assertEqual(response.status_code, 409)
+        self.assertTemplateUsed(response, 'gatepass/security_record_return.html')
+        self.assertContains(response, 'Already Processed', status_code=409)
+        self.assertNotContains(response, 'Confirm &amp; Record Return', status_code=409)
+
+    def test_superadmin_decision_on_a_processed_pass_is_read_only(self):
+        GatePass.objects.filter(pk=self.gatepass.pk).update(status='pending')
+        url = reverse('superadmin_approve_gatepass', args=[self.gatepass.pk])
+        transition(GatePass.objects.get(pk=self.gatepass.pk), 'warden_approve', make_warden('M'))
+
+        self.client.force_login(make_user('superadmin'))
+        response = self.client.post(url, {'action': 'reject', 'rejection_reason': 'Late'})
+        self.assertEqual(response.status_code, 409)
+        self.assertContains(response, 'Already Processed', status_code=409)
+        self.assertNotContains(response, 'Submit Decision', status_code=409)
+        self.assertNotContains(response, 'name="action"', status_code=409)
+        self.assertEqual(GatePass.objects.get(pk=self.gatepass.pk).status, 'warden_approved')
+
+
+class TransitionAPITest(APITestCase):
+
+    def setUp(self):
+        self.gatepass = make_gatepass(make_student('M'))
+
+    def test_security_approval_requires_warden_approval(self):
+        self.client.force_authenticate(make_security())
+        url = reverse('api_security_approve', args=[self.gatepass.pk])
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertEqual(GatePass.objects.get().status, 'pending')
+
+    def test_repeated_warden_approval_conflicts(self):
+        self.client.force_authenticate(make_warden('M'))
+        url = reverse('api_warden_approve', args=[self.gatepass.pk])
+        self.assertEqual(self.client.post(url).status_code, 200)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['status'], 'warden_approved')
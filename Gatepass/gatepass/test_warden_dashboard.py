@@ -0,0 +1,62 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .testing import make_student, make_warden, make_gatepass, plain_static_files
+from .views import WARDEN_SECTION_SIZE
+
+
+@plain_static_files
+class WardenDashboardTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.warden = make_warden('M')
+        self.other_warden = make_warden('M')
+        students = [make_student('M') for _ in range(3)]
+        for i in range(15):
+            student = students[i % 3]
+            make_gatepass(student, status='pending')
+            make_gatepass(student, status='warden_approved')
+            make_gatepass(student, status='security_approved')
+            make_gatepass(student, status='returned')
+        make_gatepass(students[0], status='warden_rejected', warden_approval=self.warden)
+        make_gatepass(students[0], status='warden_rejected', warden_approval=self.other_warden)
+        # Opposite gender is never visible to this warden
+        make_gatepass(make_student('F'), status='pending')
+        self.client.force_login(self.warden)
+
+    def get_dashboard(self, **params):
+        return self.client.get(reverse('warden_dashboard'), params)
+
+    def test_counters_and_sections(self):
+        response = self.get_dashboard()
+        context = response.context
+        self.assertEqual(context['total_pending'], 15)
+        self.assertEqual(context['total_approved'], 15)
+        self.assertEqual(context['total_rejected'], 1)
+        self.assertEqual(context['total_returned'], 15)
+        self.assertEqual(context['students_out'], 15)
+        self.assertEqual(context['filtered_count'], 62)
+        self.assertEqual(len(context['pending_requests']), 15)
+        self.assertEqual(len(context['approved_requests']), WARDEN_SECTION_SIZE)
+        self.assertEqual(len(context['students_out_requests']), WARDEN_SECTION_SIZE)
+        self.assertEqual([gp.warden_approval_id for gp in context['rejected_requests']], [self.warden.id])
+        created = [gp.created_at for gp in context['returned_requests']]
+        self.assertEqual(created, sorted(created, reverse=True))
+
+    def test_status_filter_is_applied_to_counters(self):
+        response = self.get_dashboard(status_filter='returned')
+        self.assertEqual(response.context['filtered_count'], 15)
+        self.assertEqual(response.context['total_pending'], 0)
+        self.assertEqual(response.context['pending_requests'], [])
+
+    @override_settings(NOTIFICATION_FEED_TIMEOUT=300)
+    def test_query_count_is_fixed(self):
+        self.get_dashboard()  # warm the notification feed cache
+        # session, user, stats aggregate, sections fetch, students out (roster)
+        with self.assertNumQueries(5):
+            self.get_dashboard()
+        # filtered to pending: nobody can be out, the roster is not read
+        with self.assertNumQueries(4):
+            self.get_dashboard(from_date='2000-01-01', to_date='2100-01-01', status_filter='pending')
@@ -0,0 +1,79 @@
+"""
+Small factories shared by the gatepass test modules.
+
+Passwords are set with ``set_unusable_password`` unless one is given, so
+fixtures do not pay for a PBKDF2 hash per user.
+"""
+from datetime import time, timedelta
+from itertools import count
+
+from django.test import override_settings
+from django.utils import timezone
+
+from .models import User, Student, Warden, Security, GatePass
+
+
+_sequence = count(1)
+
+# Templates use {% static %}; the manifest storage needs collectstatic to have run
+plain_static_files = override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage'
+)
+
+
+def make_user(role, gender=None, password=None, **extra):
+    n = next(_sequence)
+    user = User(
+        username=extra.pop('username', f'{role}_{n}'),
+        email=extra.pop('email', f'{role}{n}@example.com'),
+        role=role,
+        gender=gender,
+        is_approved=extra.pop('is_approved', True),
+        **extra
+    )
+    if password:
+        user.set_password(password)
+    else:
+        user.set_unusable_password()
+    user.save()
+    return user
+
+
+def make_student(gender='M', password=None, **extra):
+    user = make_user('student', gender=gender, password=password)
+    n = next(_sequence)
+    return Student.objects.create(
+        user=user,
+        hall_ticket_no=extra.pop('hall_ticket_no', f'HT{n:08d}'),
+        student_name=extra.pop('student_name', f'Student {n}'),
+        room_no=extra.pop('room_no', f'R{n % 500}'),
+        parent_name=extra.pop('parent_name', f'Parent {n}'),
+        parent_mobile=extra.pop('parent_mobile', f'9{n:09d}'),
+        **extra
+    )
+
+
+def make_warden(gender='M', password=None):
+    user = make_user('warden', gender=gender, password=password)
+    Warden.objects.create(user=user, name=f'Warden {user.pk}')
+    return user
+
+
+def make_security(password=None):
+    user = make_user('security', gender='M', password=password)
+    Security.objects.create(user=user, name=f'Security {user.pk}')
+    return user
+
+
+def make_gatepass(student, status='pending', days_ahead=1, **extra):
+    outing_date = extra.pop('outing_date', timezone.localdate() + timedelta(days=days_ahead))
+    return GatePass.objects.create(
+        student=student,
+        outing_date=outing_date,
+        outing_time=extra.pop('outing_time', time(10, 0)),
+        expected_return_date=extra.pop('expected_return_date', outing_date + timedelta(days=1)),
+        expected_return_time=extra.pop('expected_return_time', time(18, 0)),
+        purpose=extra.pop('purpose', 'Home visit'),
+        status=status,
+        **extra
+    )
@@ -0,0 +1,140 @@
+"""
+GatePass status transitions.
+
+The workflow is a small state machine (``TRANSITIONS``). ``transition()``
+applies one step as a single conditional UPDATE, without reading or locking
+the row first::
+
+    UPDATE gatepass SET status = <target>, <actor> = ?, <fields>, updated_at = ?
+    WHERE id = ? AND status = <source>
+
+When two guards press "Approve Exit" at once, the database lets exactly one
+UPDATE match. The other gets a conflict (``applied`` False, plus the status
+the pass has now), which the pages and the API answer with 409.
+
+``bulk_transition()`` applies one step to many passes with one UPDATE.
+
+Only the status, the acting user, the given fields and ``updated_at`` are
+written. ``updated_at`` is set explicitly because queryset ``update()``
+bypasses ``auto_now``, and sync, ETags and exports depend on it. Signals do
+not fire either, so the transition is published here, and exits and returns
+update the out roster (``gatepass.roster``).
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import metrics, roster
+from .events import publish_transition
+from .models import GatePass, Student
+
+
+Transition = namedtuple('Transition', 'source target actor_field')
+
+TRANSITIONS = {
+    'warden_approve': Transition('pending', 'warden_approved', 'warden_approval'),
+    'warden_reject': Transition('pending', 'warden_rejected', 'warden_approval'),
+    'security_approve': Transition('warden_approved', 'security_approved', 'security_approval'),
+    'record_return': Transition('security_approved', 'returned', 'return_verified_by'),
+}
+
+# ``status`` is the pass's status after the attempt, None if it no longer exists
+TransitionResult = namedtuple('TransitionResult', 'applied status')
+
+
+def transition(gatepass, action, actor, **fields):
+    """
+    Move ``gatepass`` through ``TRANSITIONS[action]`` if it is still in the
+    source status, recording ``actor`` and ``fields``.
+
+    On success the instance is updated in memory and the change published
+    once the transaction commits. The UPDATE and its follow-up (``moved()``)
+    commit together: the row lock keeps a competing transition of the same
+    pass from writing the roster in between.
+    """
+    rule = TRANSITIONS[action]
+    changes = {'status': rule.target, rule.actor_field: actor, 'updated_at': timezone.now(), **fields}
+    with transaction.atomic():
+        if GatePass.objects.filter(pk=gatepass.pk, status=rule.source).update(**changes):
+            for name, value in changes.items():
+                setattr(gatepass, name, value)
+            moved([gatepass], rule.source)
+            # A later save() of this instance is not a second transition
+            gatepass._loaded_status = rule.target
+            return TransitionResult(True, rule.target)
+    current = GatePass.objects.filter(pk=gatepass.pk).values_list('status', flat=True).first()
+    return TransitionResult(False, current)
+
+
+def load_students(gatepasses):
+    """Attach each pass's student and user; one query for the passes that lack them"""
+    missing = [
+        gatepass for gatepass in gatepasses
+        if not (GatePass.student.is_cached(gatepass) and Student.user.is_cached(gatepass.student))
+    ]
+    if missing:
+        students = Student.objects.select_related('user').in_bulk({gatepass.student_id for gatepass in missing})
+        for gatepass in missing:
+            gatepass.student = students[gatepass.student_id]
+
+
+def moved(gatepasses, previous_status):
+    """
+    Follow-up for passes that moved from ``previous_status`` to their current
+    status: keep the out roster in step, count and publish each move.
+    """
+    load_students(gatepasses)
+    metrics.gatepasses_moved(gatepasses, previous_status)
+    if roster.OUT in {previous_status, *(gatepass.status for gatepass in gatepasses)}:
+        roster.sync(gatepasses)
+    for gatepass in gatepasses:
+        student = gatepass.student
+        publish_transition(gatepass.pk, gatepass.status, previous_status, student.user_id, student.user.gender)
+
+
+def bulk_transition(gatepasses, action, actor, **fields):
+    """
+    ``transition()`` for many passes with one UPDATE. Returns ``{pk: TransitionResult}``.
+
+    Passes whose loaded status is not the source conflict without being
+    written. If the UPDATE matches fewer rows than expected, the rows it wrote
+    are found by their new status, actor and ``updated_at``.
+    """
+    rule = TRANSITIONS[action]
+    results = {}
+    candidates = []
+    for gatepass in gatepasses:
+        if gatepass.status == rule.source:
+            candidates.append(gatepass)
+        else:
+            results[gatepass.pk] = TransitionResult(False, gatepass.status)
+    if not candidates:
+        return results
+
+    changes = {'status': rule.target, rule.actor_field: actor, 'updated_at': timezone.now(), **fields}
+    ids = [gatepass.pk for gatepass in candidates]
+    # As in transition(): the UPDATE and moved() commit together
+    with transaction.atomic():
+        updated = GatePass.objects.filter(pk__in=ids, status=rule.source).update(**changes)
+        written, current = set(ids), {}
+        if updated < len(ids):
+            # Some passes moved on since they were loaded
+            written = set(GatePass.objects.filter(
+                pk__in=ids, status=rule.target, updated_at=changes['updated_at'], **{rule.actor_field: actor},
+            ).values_list('pk', flat=True))
+            current = dict(GatePass.objects.filter(pk__in=set(ids) - written).values_list('pk', 'status'))
+
+        applied = []
+        for gatepass in candidates:
+            if gatepass.pk not in written:
+                results[gatepass.pk] = TransitionResult(False, current.get(gatepass.pk))
+                continue
+            for name, value in changes.items():
+                setattr(gatepass, name, value)
+            applied.append(gatepass)
+            results[gatepass.pk] = TransitionResult(True, rule.target)
+        moved(applied, rule.source)
+    for gatepass in applied:
+        gatepass._loaded_status = rule.target
+    return results
@@ -23,10 +23,16 @@ urlpatterns = [
     path('superadmin/dashboard/', views.superadmin_dashboard, name='superadmin_dashboard'),
     path('export/students/', views.export_students_excel, name='export_students_excel'),
     path('export/outings/', views.export_outings_excel, name='export_outings_excel'),
+    path('export/outings/jobs/', views.export_outings_job, name='export_outings_job'),
+    path('export/jobs/<int:job_id>/', views.export_job_status, name='export_job_status'),
+    path('export/jobs/<int:job_id>/download/', views.export_job_download, name='export_job_download'),
+    path('events/', views.event_stream, name='event_stream'),
     
     # Gatepass URLs
     path('student/gatepass/create/', views.create_gatepass, name='create_gatepass'),
     path('warden/gatepass/<int:gatepass_id>/approve/', views.warden_approve_gatepass, name='warden_approve_gatepass'),
+    path('warden/gatepass/bulk/', views.warden_bulk_decision, name='warden_bulk_decision'),
+    path('security/gatepass/bulk-approve/', views.security_bulk_approve, name='security_bulk_approve'),
     path('security/gatepass/<int:gatepass_id>/approve/', views.security_approve_gatepass, name='security_approve_gatepass'),
     path('security/gatepass/<int:gatepass_id>/return/', views.security_record_return, name='security_record_return'),
     
@@ -36,6 +42,8 @@ urlpatterns = [
     
     # Super Admin Gatepass URLs
     path('superadmin/gatepass/<int:gatepass_id>/approve/', views.superadmin_approve_gatepass, name='superadmin_approve_gatepass'),
+    path('superadmin/performance/', views.superadmin_performance, name='superadmin_performance'),
+    path('metrics', views.metrics_endpoint, name='metrics'),
     
     # Parent Verification
     path('parent/verify/<int:gatepass_id>/', views.parent_verification, name='parent_verification'),
@@ -51,6 +59,11 @@ from . import api_views
 urlpatterns += [
     path('api/login/', api_views.LoginAPIView.as_view(), name='api_login'),
     path('api/gatepasses/', api_views.GatePassListCreateAPIView.as_view(), name='api_gatepass_list_create'),
+    path('api/gatepasses/changes/', api_views.GatePassChangesAPIView.as_view(), name='api_gatepass_changes'),
+    path('api/gatepasses/bulk-warden-approve/', api_views.BulkWardenApproveAPIView.as_view(), name='api_bulk_warden_approve'),
     path('api/gatepasses/<int:pk>/warden-approve/', api_views.WardenApproveAPIView.as_view(), name='api_warden_approve'),
     path('api/gatepasses/<int:pk>/security-approve/', api_views.SecurityApproveAPIView.as_view(), name='api_security_approve'),
+    path('api/gate/scan/', api_views.GateScanAPIView.as_view(), name='api_gate_scan'),
+    path('api/gate/snapshot/', api_views.GateSnapshotAPIView.as_view(), name='api_gate_snapshot'),
+    path('api/gate/events/', api_views.GateEventUploadAPIView.as_view(), name='api_gate_events'),
 ]
@@ -0,0 +1,25 @@
+"""
+``gatepass.urls`` with the dashboards and approval APIs served by ``gatepass.async_views``.
+
+Used by the ASGI deployment (``hostel_gatepass.urls_asgi``). URLs and names
+are unchanged, so templates and ``reverse()`` work the same under both.
+"""
+from django.urls import path
+
+from . import async_views
+from .urls import urlpatterns as sync_urlpatterns
+
+ASYNC_VIEWS = {
+    'student_dashboard': async_views.student_dashboard,
+    'warden_dashboard': async_views.warden_dashboard,
+    'security_dashboard': async_views.security_dashboard,
+    'superadmin_dashboard': async_views.superadmin_dashboard,
+    'api_warden_approve': async_views.warden_approve_api,
+    'api_security_approve': async_views.security_approve_api,
+}
+
+urlpatterns = [
+    path(str(pattern.pattern), ASYNC_VIEWS[pattern.name], name=pattern.name)
+    if pattern.name in ASYNC_VIEWS else pattern
+    for pattern in sync_urlpatterns
+]
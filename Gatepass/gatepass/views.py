@@ -2,29 +2,49 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import Http404, JsonResponse, HttpResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
 from django.db import transaction
-from django.db.models import Count, Q
-from django.db.models.functions import TruncMonth
+from django.db.models import Count, F, Max, Q, Window
+from django.db.models.functions import RowNumber
 from django.contrib.auth.views import LoginView
-from django.core.mail import send_mail
 from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
+import os
 import random
 import string
 from datetime import datetime, date, time
-import openpyxl
-from openpyxl.utils import get_column_letter
-from .models import User, Student, Warden, Security, GatePass, ParentVerification, Notification
+from .models import User, Student, Warden, Security, GatePass, ParentVerification, Notification, ExportJob, OutRosterEntry
+from .exporters import EXPORTERS, get_exporter
+from .exports import (
+    export_response, outing_filters, outing_sheets, outings_filename, ranged_file_response, student_sheets,
+    students_filename
+)
+from .export_jobs import export_path, request_outing_export
+from .conditional import conditional_page, per_request
+from .events import sse_stream, subscriptions_for
+from .outbox import queue_email
+from .notifications import bulk_notification_deletes, notify_many, security_recipients, warden_recipients
+from .transitions import transition
+from . import bulk, metrics, perf, roster
+from .profiles import require_profile
 from .forms import (
     StudentRegistrationForm, WardenRegistrationForm, SecurityRegistrationForm,
-    GatePassRequestForm, WardenApprovalForm, ParentVerificationForm, SecurityReturnForm, WardenDateFilterForm
+    GatePassRequestForm, WardenApprovalForm, ParentVerificationForm, SecurityReturnForm, WardenDateFilterForm,
+    WardenBulkDecisionForm, SecurityBulkApproveForm, OutingExportForm,
 )
 
 
+# Rows shown per non-pending section on the warden dashboard
+WARDEN_SECTION_SIZE = 10
+
+
 def _send_registration_email(to_email, username, raw_password, role_label):
-    """Send credentials to the registered user's email. Fails silently if email is not configured."""
+    """Queue credentials for the registered user's email; sent by the send_queued_emails worker."""
     if not to_email:
         return
     subject = "Gatepass Account Details"
@@ -35,8 +55,7 @@ def _send_registration_email(to_email, username, raw_password, role_label):
         f"Email: {to_email}\n\n"
         "Please keep these credentials safe."
     )
-    from_email = getattr(settings, "DEFAULT_FROM_EMAIL", "no-reply@gatepass.local")
-    send_mail(subject, message, from_email, [to_email], fail_silently=True)
+    queue_email(to_email, subject, message)
 
 
 def home(request):
@@ -363,36 +382,44 @@ def register_security(request):
     return render(request, 'gatepass/register_security.html', {'form': form})
 
 
+def _student_stats_query(request):
+    """The student's request counters as ``(queryset, aggregates)``; also the page's version"""
+    return GatePass.objects.filter(student__user=request.user), {
+        'total_requests': Count('id'),
+        'pending_requests': Count('id', filter=Q(status='pending')),
+        'approved_requests': Count('id', filter=Q(status__in=['warden_approved', 'security_approved'])),
+        'rejected_requests': Count('id', filter=Q(status='warden_rejected')),
+        'last_change': Max('updated_at'),
+    }
+
+
+@per_request
+def _student_stats(request):
+    queryset, aggregates = _student_stats_query(request)
+    return queryset.aggregate(**aggregates)
+
+
+def _student_dashboard_version(request):
+    if request.user.role != 'student':
+        return None
+    return tuple(sorted(_student_stats(request).items()))
+
+
 @login_required
+@conditional_page(_student_dashboard_version)
 def student_dashboard(request):
     """Student dashboard"""
     if request.user.role != 'student':
         messages.error(request, 'Access denied.')
         return redirect('home')
-    
-    # Check for overdue returns
-    check_overdue_returns()
-    
-    student = get_object_or_404(Student, user=request.user)
+
+    student = require_profile(request, Student)
     gatepasses = GatePass.objects.filter(student=student).order_by('-created_at')
-    
-    # Get statistics
-    total_requests = gatepasses.count()
-    pending_requests = gatepasses.filter(status='pending').count()
-    approved_requests = gatepasses.filter(status__in=['warden_approved', 'security_approved']).count()
-    rejected_requests = gatepasses.filter(status='warden_rejected').count()
-    
-    # Get recent notifications
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')[:5]
-    
+
     context = {
         'student': student,
         'gatepasses': gatepasses,
-        'total_requests': total_requests,
-        'pending_requests': pending_requests,
-        'approved_requests': approved_requests,
-        'rejected_requests': rejected_requests,
-        'notifications': notifications,
+        **_counters(_student_stats(request)),
     }
     return render(request, 'gatepass/student_dashboard.html', context)
 
@@ -404,7 +431,7 @@ def create_gatepass(request):
         messages.error(request, 'Access denied.')
         return redirect('home')
     
-    student = get_object_or_404(Student, user=request.user)
+    student = require_profile(request, Student)
     
     if request.method == 'POST':
         form = GatePassRequestForm(request.POST)
@@ -448,35 +475,15 @@ def create_gatepass(request):
             # - Female students' requests go ONLY to female wardens (NOT to male wardens)
             # - Students without gender set will NOT notify any wardens (safety measure)
             
-            # Get and normalize student gender
-            student_gender = student.user.gender
-            if student_gender:
-                student_gender = str(student_gender).strip().upper()
-            
-            if student_gender in ['M', 'F']:
-                # CRITICAL: Filter wardens by EXACT gender match - this ensures strict gender separation
-                # Only notify wardens who have the SAME gender as the student
-                # This query ensures: Female students notify ONLY female wardens, Male students notify ONLY male wardens
-                wardens_to_notify = User.objects.filter(
-                    role='warden', 
-                    is_approved=True, 
-                    gender__iexact=student_gender  # Only wardens with EXACT matching gender (case-insensitive)
-                ).exclude(
-                    gender__isnull=True
-                ).exclude(
-                    gender=''
-                )
-                
-                # Notify only the matching gender wardens
-                for warden_user in wardens_to_notify:
-                    Notification.objects.create(
-                        user=warden_user,
-                        gatepass=gatepass,
-                        notification_type='gatepass_request',
-                        message=f"New gatepass request from {student.student_name}"
-                    )
-            # If student gender is not set or invalid, DO NOT notify any wardens
-            # This ensures strict gender separation - no cross-gender notifications
+            # CRITICAL: warden_recipients() only returns approved wardens with the
+            # EXACT same gender as the student, and nobody if the student's gender
+            # is not set or invalid - no cross-gender notifications
+            notify_many(
+                warden_recipients(student.user.gender),
+                gatepass,
+                'gatepass_request',
+                f"New gatepass request from {student.student_name}"
+            )
             
             messages.success(request, 'Gatepass request submitted successfully!')
             return redirect('student_dashboard')
@@ -489,101 +496,22 @@ def create_gatepass(request):
     })
 
 
-def _auto_size_columns(ws):
-    """Adjust column widths based on cell contents."""
-    for column_cells in ws.columns:
-        # Calculate the maximum length in the column and add some padding
-        length = max(len(str(cell.value)) if cell.value is not None else 0 for cell in column_cells)
-        ws.column_dimensions[get_column_letter(column_cells[0].column)].width = max(length + 2, 12)
-
-
 @login_required
 def export_students_excel(request):
     """
     Export student list and currently-out students to Excel.
     Accessible only to wardens and superadmins.
+    ?format=csv|parquet|colgz|columnar exports just the student list (default: xlsx).
     """
     if request.user.role not in ('warden', 'superadmin'):
         messages.error(request, 'Access denied.')
         return redirect('home')
 
-    wb = openpyxl.Workbook()
-
-    # Sheet 1: All students
-    ws_students = wb.active
-    ws_students.title = "Students"
-    student_headers = [
-        "Student Name",
-        "Hall Ticket No",
-        "Room No",
-        "Gender",
-        "Email",
-        "Mobile",
-        "Parent Name",
-        "Parent Mobile",
-        "Approved",
-    ]
-    ws_students.append(student_headers)
-
-    students = Student.objects.select_related('user').order_by('student_name')
-    for student in students:
-        ws_students.append([
-            student.student_name,
-            student.hall_ticket_no,
-            student.room_no,
-            student.user.get_gender_display() if student.user.gender else "",
-            student.user.email or "",
-            student.user.mobile_number or "",
-            student.parent_name,
-            student.parent_mobile,
-            "Yes" if student.user.is_approved else "No",
-        ])
-    _auto_size_columns(ws_students)
-
-    # Sheet 2: Students currently out (security approved)
-    ws_out = wb.create_sheet("Students Out")
-    out_headers = [
-        "Student Name",
-        "Hall Ticket No",
-        "Outing Date",
-        "Outing Time",
-        "Expected Return Date",
-        "Expected Return Time",
-        "Purpose",
-        "Warden Approved By",
-        "Security Approved By",
-    ]
-    ws_out.append(out_headers)
-
-    outing_requests = (
-        GatePass.objects
-        .filter(status='security_approved')
-        .select_related('student', 'student__user', 'warden_approval', 'security_approval')
-        .order_by('-outing_date', '-outing_time')
-    )
-    for request_out in outing_requests:
-        ws_out.append([
-            request_out.student.student_name,
-            request_out.student.hall_ticket_no,
-            request_out.outing_date.strftime('%Y-%m-%d'),
-            request_out.outing_time.strftime('%H:%M') if request_out.outing_time else "",
-            request_out.expected_return_date.strftime('%Y-%m-%d'),
-            request_out.expected_return_time.strftime('%H:%M') if request_out.expected_return_time else "",
-            request_out.purpose or "",
-            request_out.warden_approval.username if request_out.warden_approval else "",
-            request_out.security_approval.username if request_out.security_approval else "",
-        ])
-    ws_out.append([])
-    ws_out.append(["Total students currently out", outing_requests.count()])
-    _auto_size_columns(ws_out)
-
-    filename = f"gatepass_export_{timezone.localdate().isoformat()}.xlsx"
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    wb.save(response)
-    return response
+    exporter = get_exporter(request.GET.get('format'))
+    if exporter is None:
+        messages.error(request, f"Unsupported export format. Choose one of: {', '.join(EXPORTERS)}.")
+        return redirect('dashboard_redirect')
+    return export_response(exporter, student_sheets(), students_filename(exporter.extension))
 
 
 @login_required
@@ -598,129 +526,87 @@ def export_outings_excel(request):
     Backwards-compatible extras:
       - year: YYYY
       - month: 1-12
+    Output:
+      - format: xlsx (default) | csv | parquet | colgz | columnar (outing rows only)
     """
     if request.user.role not in ('warden', 'superadmin'):
         messages.error(request, 'Access denied.')
         return redirect('home')
 
-    # Filters from warden dashboard
-    from_date = request.GET.get('from_date')
-    to_date = request.GET.get('to_date')
-    status_filter = request.GET.get('status_filter')
-
-    # Legacy filters kept for compatibility
-    year = request.GET.get('year')
-    month = request.GET.get('month')
-    try:
-        year = int(year) if year else None
-        month = int(month) if month else None
-    except ValueError:
-        year = None
-        month = None
-
-    wb = openpyxl.Workbook()
-
-    # Sheet 1: Outing records (filtered)
-    ws_outings = wb.active
-    ws_outings.title = "Outings"
-    ws_outings.append([
-        "Student Name",
-        "Hall Ticket No",
-        "Outing Date",
-        "Outing Time",
-        "Expected Return Date",
-        "Expected Return Time",
-        "Status",
-        "Purpose",
-        "Warden Approved By",
-        "Security Approved By",
-    ])
-
-    outing_qs = GatePass.objects.select_related(
-        'student', 'student__user', 'warden_approval', 'security_approval'
-    ).filter(status__in=['security_approved', 'returned', 'completed'])
-
-    if from_date:
-        outing_qs = outing_qs.filter(outing_date__gte=from_date)
-    if to_date:
-        outing_qs = outing_qs.filter(outing_date__lte=to_date)
-    if status_filter:
-        outing_qs = outing_qs.filter(status=status_filter)
-    if year:
-        outing_qs = outing_qs.filter(outing_date__year=year)
-    if month:
-        outing_qs = outing_qs.filter(outing_date__month=month)
-
-    outing_qs = outing_qs.order_by('-outing_date', '-outing_time')
-
-    for gp in outing_qs:
-        ws_outings.append([
-            gp.student.student_name,
-            gp.student.hall_ticket_no,
-            gp.outing_date.strftime('%Y-%m-%d'),
-            gp.outing_time.strftime('%H:%M') if gp.outing_time else "",
-            gp.expected_return_date.strftime('%Y-%m-%d'),
-            gp.expected_return_time.strftime('%H:%M') if gp.expected_return_time else "",
-            gp.get_status_display(),
-            gp.purpose or "",
-            gp.warden_approval.username if gp.warden_approval else "",
-            gp.security_approval.username if gp.security_approval else "",
-        ])
-    ws_outings.append([])
-    ws_outings.append(["Total outings in selection", outing_qs.count()])
-    _auto_size_columns(ws_outings)
-
-    # Sheet 2: Monthly counts for the same filtered dataset
-    ws_monthly = wb.create_sheet("Monthly Counts")
-    ws_monthly.append(["Month", "Total Outings"])
-
-    monthly_counts = (
-        outing_qs
-        .annotate(month=TruncMonth('outing_date'))
-        .values('month')
-        .annotate(total=Count('id'))
-        .order_by('month')
-    )
-    grand_total = 0
-    for row in monthly_counts:
-        label = row['month'].strftime('%Y-%m') if row['month'] else "Unknown"
-        ws_monthly.append([label, row['total']])
-        grand_total += row['total']
-    ws_monthly.append([])
-    ws_monthly.append(["Grand total outings", grand_total])
-    _auto_size_columns(ws_monthly)
-
-    filename_parts = ["outings"]
-    if from_date:
-        filename_parts.append(f"from-{from_date}")
-    if to_date:
-        filename_parts.append(f"to-{to_date}")
-    if status_filter:
-        filename_parts.append(status_filter)
-    if year:
-        filename_parts.append(str(year))
-    if month:
-        filename_parts.append(f"{month:02d}")
-    filename = f"gatepass_{'_'.join(filename_parts)}.xlsx"
-
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    wb.save(response)
-    return response
+    exporter = get_exporter(request.GET.get('format'))
+    if exporter is None:
+        messages.error(request, f"Unsupported export format. Choose one of: {', '.join(EXPORTERS)}.")
+        return redirect('dashboard_redirect')
+    filters = outing_filters(request.GET)
+    return export_response(exporter, outing_sheets(filters), outings_filename(filters, exporter.extension))
+
+
+def _export_job_payload(job, created=False):
+    return {
+        'id': job.pk,
+        'status': job.status,
+        'progress': job.progress,
+        'rows_written': job.rows_written,
+        'total_rows': job.total_rows,
+        'error': job.error,
+        'created': created,
+        'status_url': reverse('export_job_status', args=[job.pk]),
+        'download_url': reverse('export_job_download', args=[job.pk]) if job.status == 'done' else None,
+    }
 
 
 @login_required
-def warden_dashboard(request):
-    """Warden dashboard"""
-    if request.user.role != 'warden':
+def export_outings_job(request):
+    """
+    Queue a background outings export (POST, same filters as export_outings_excel).
+    Returns the job as JSON; an identical request reuses the existing job while the data is unchanged.
+    Invalid filters get 400 with the form errors.
+    """
+    if request.user.role not in ('warden', 'superadmin'):
+        return JsonResponse({'error': 'Access denied.'}, status=403)
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required.'}, status=405)
+    exporter = get_exporter(request.POST.get('format'))
+    if exporter is None:
+        return JsonResponse({'error': f"Unsupported export format. Choose one of: {', '.join(EXPORTERS)}."}, status=400)
+
+    form = OutingExportForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'error': 'Invalid export filters.', 'errors': form.errors}, status=400)
+
+    job, created = request_outing_export(form.filters(), request.user, exporter.name)
+    return JsonResponse(_export_job_payload(job, created), status=201 if created else 200)
+
+
+@login_required
+def export_job_status(request, job_id):
+    """Poll a background export job"""
+    if request.user.role not in ('warden', 'superadmin'):
+        return JsonResponse({'error': 'Access denied.'}, status=403)
+    job = get_object_or_404(ExportJob, id=job_id)
+    return JsonResponse(_export_job_payload(job))
+
+
+@login_required
+def export_job_download(request, job_id):
+    """Download a finished export job; supports HTTP Range for resumed downloads"""
+    if request.user.role not in ('warden', 'superadmin'):
         messages.error(request, 'Access denied.')
         return redirect('home')
-    
-    # Check for overdue returns
-    check_overdue_returns()
-    
+    job = get_object_or_404(ExportJob, id=job_id, status='done')
+    path = export_path(job)
+    if not os.path.exists(path):
+        raise Http404('Export file is no longer available.')
+    exporter = get_exporter(job.export_format)
+    etag = f'"export-{job.pk}-{job.file_size}"'
+    return ranged_file_response(
+        request, path, outings_filename(job.filters, exporter.extension), exporter.content_type, etag=etag
+    )
+
+
+@per_request
+def _warden_requests(request):
+    """The warden's filter form, gender-scoped and filtered requests, and rejection filter"""
     # Initialize filter form
     filter_form = WardenDateFilterForm(request.GET)
     
@@ -773,55 +659,136 @@ def warden_dashboard(request):
         if status_filter:
             all_requests = all_requests.filter(status=status_filter)
     
-    # Get pending gatepass requests
-    pending_requests = all_requests.filter(status='pending')
-    
-    # Get approved requests (both by this warden and all approved)
-    approved_requests = all_requests.filter(status='warden_approved')[:10]
-    
-    # Get rejected requests by this warden
-    rejected_requests = all_requests.filter(
-        status='warden_rejected',
-        warden_approval=request.user
-    )[:10]
-    
-    # Get returned requests (students who have returned)
-    returned_requests = all_requests.filter(status='returned')[:10]
-    
-    # Get students currently out
-    students_out_requests = all_requests.filter(status='security_approved')[:10]
-    
-    # Get statistics (use filtered data for consistency)
-    total_pending = all_requests.filter(status='pending').count()
-    total_approved = all_requests.filter(status='warden_approved').count()
-    total_rejected = all_requests.filter(warden_approval=request.user, status='warden_rejected').count()
-    total_returned = all_requests.filter(status='returned').count()
-    students_out = all_requests.filter(status='security_approved').count()
-    
-    # Get filtered counts for display
-    filtered_count = all_requests.count()
-    
-    # Get recent notifications
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')[:5]
-    
+    # Only rejections made by this warden are shown/counted
+    rejected_by_me = Q(status='warden_rejected', warden_approval=request.user)
+    return filter_form, all_requests, rejected_by_me
+
+
+def _warden_stats_query(request):
+    """Statistics over the filtered requests as ``(queryset, aggregates)``; also the page's version"""
+    _, all_requests, rejected_by_me = _warden_requests(request)
+    return all_requests, {
+        'total_pending': Count('id', filter=Q(status='pending')),
+        'total_approved': Count('id', filter=Q(status='warden_approved')),
+        'total_rejected': Count('id', filter=rejected_by_me),
+        'total_returned': Count('id', filter=Q(status='returned')),
+        'filtered_count': Count('id'),
+        # with the counts above, identifies the page for conditional GET
+        'last_change': Max('updated_at'),
+    }
+
+
+@per_request
+def _warden_stats(request):
+    queryset, aggregates = _warden_stats_query(request)
+    return queryset.aggregate(**aggregates)
+
+
+def _warden_dashboard_version(request):
+    if request.user.role != 'warden':
+        return None
+    return tuple(sorted(_warden_stats(request).items()))
+
+
+def _counters(stats):
+    """Dashboard statistics without the version-only fields"""
+    return {key: value for key, value in stats.items() if not key.startswith('last_')}
+
+
+def _warden_section_rows(all_requests, rejected_by_me):
+    """
+    Every list section at once: the whole pending queue plus the latest
+    WARDEN_SECTION_SIZE rows of each other status
+    """
+    return (
+        all_requests
+        .filter(Q(status__in=['pending', 'warden_approved', 'returned']) | rejected_by_me)
+        .annotate(section_rank=Window(
+            expression=RowNumber(),
+            partition_by=[F('status')],
+            order_by=[F('created_at').desc(), F('id').desc()],
+        ))
+        .filter(Q(status='pending') | Q(section_rank__lte=WARDEN_SECTION_SIZE))
+        .select_related('student', 'return_verified_by')
+        .order_by('-created_at', '-id')
+    )
+
+
+def _warden_sections(section_rows):
+    sections = {
+        'pending': [],
+        'warden_approved': [],
+        'warden_rejected': [],
+        'returned': [],
+    }
+    for gatepass in section_rows:
+        sections[gatepass.status].append(gatepass)
+    return {
+        'pending_requests': sections['pending'],
+        'approved_requests': sections['warden_approved'],
+        'rejected_requests': sections['warden_rejected'],
+        'returned_requests': sections['returned'],
+    }
+
+
+def _warden_roster_rows(request):
+    """
+    The Students Out tab, read from the out roster with the dashboard's
+    filters: the latest WARDEN_SECTION_SIZE exits, each carrying the total out
+    """
+    filter_form, _, _ = _warden_requests(request)
+    gender = roster.normalize_gender(request.user.gender)
+    entries = OutRosterEntry.objects.filter(gender=gender) if gender else OutRosterEntry.objects.none()
+    if filter_form.is_valid():
+        from_date = filter_form.cleaned_data.get('from_date')
+        to_date = filter_form.cleaned_data.get('to_date')
+        status_filter = filter_form.cleaned_data.get('status_filter')
+        if from_date:
+            entries = entries.filter(outing_date__gte=from_date)
+        if to_date:
+            entries = entries.filter(outing_date__lte=to_date)
+        if status_filter and status_filter != roster.OUT:
+            entries = entries.none()
+    return (
+        entries
+        .annotate(total_out=Window(expression=Count('pk')))
+        .select_related('gatepass__student')
+        .order_by('-left_at', '-gatepass_id')[:WARDEN_SECTION_SIZE]
+    )
+
+
+def _warden_students_out(roster_rows):
+    return {
+        'students_out': roster_rows[0].total_out if roster_rows else 0,
+        'students_out_requests': [entry.gatepass for entry in roster_rows],
+    }
+
+
+@login_required
+@conditional_page(_warden_dashboard_version)
+def warden_dashboard(request):
+    """Warden dashboard"""
+    if request.user.role != 'warden':
+        messages.error(request, 'Access denied.')
+        return redirect('home')
+
+    filter_form, all_requests, rejected_by_me = _warden_requests(request)
     context = {
         'filter_form': filter_form,
-        'pending_requests': pending_requests,
-        'approved_requests': approved_requests,
-        'rejected_requests': rejected_requests,
-        'returned_requests': returned_requests,
-        'students_out_requests': students_out_requests,
-        'total_pending': total_pending,
-        'total_approved': total_approved,
-        'total_rejected': total_rejected,
-        'total_returned': total_returned,
-        'students_out': students_out,
-        'filtered_count': filtered_count,
-        'notifications': notifications,
+        **_warden_sections(_warden_section_rows(all_requests, rejected_by_me)),
+        **_warden_students_out(list(_warden_roster_rows(request))),
+        **_counters(_warden_stats(request)),
     }
     return render(request, 'gatepass/warden_dashboard.html', context)
 
 
+def _transition_conflict(request, gatepass, template):
+    """409 page for a transition someone else made first: the pass as it is now, read-only"""
+    gatepass.refresh_from_db()
+    messages.warning(request, f'This gatepass was processed by someone else meanwhile. It is now {gatepass.get_status_display()}.')
+    return render(request, template, {'gatepass': gatepass, 'readonly': True}, status=409)
+
+
 @login_required
 def warden_approve_gatepass(request, gatepass_id):
     if request.user.role != 'warden':
@@ -870,35 +837,34 @@ def warden_approve_gatepass(request, gatepass_id):
                 if not parent_verification:
                     messages.error(request, 'Parent verification must be completed before approval.')
                     return redirect('warden_dashboard')
-                gatepass.status = 'warden_approved'
-                gatepass.warden_approval = request.user
-                gatepass.parent_verification = True
-                gatepass.save()
-                security_users = User.objects.filter(role='security')
-                for security in security_users:
-                    Notification.objects.create(
-                        user=security,
-                        gatepass=gatepass,
-                        notification_type='warden_approval',
-                        message=f"Gatepass approved by warden for {gatepass.student.student_name}"
-                    )
-                Notification.objects.create(
-                    user=gatepass.student.user,
-                    gatepass=gatepass,
-                    notification_type='warden_approval',
-                    message="Your gatepass request has been approved by the warden."
+                result = transition(gatepass, 'warden_approve', request.user, parent_verification=True)
+                if not result.applied:
+                    return _transition_conflict(request, gatepass, 'gatepass/warden_approve.html')
+                notify_many(
+                    security_recipients(),
+                    gatepass,
+                    'warden_approval',
+                    f"Gatepass approved by warden for {gatepass.student.student_name}"
+                )
+                notify_many(
+                    [gatepass.student.user_id],
+                    gatepass,
+                    'warden_approval',
+                    "Your gatepass request has been approved by the warden."
                 )
                 messages.success(request, 'Gatepass approved successfully!')
             elif action == 'reject':
-                gatepass.status = 'warden_rejected'
-                gatepass.warden_approval = request.user
-                gatepass.warden_rejection_reason = form.cleaned_data['rejection_reason']
-                gatepass.save()
-                Notification.objects.create(
-                    user=gatepass.student.user,
-                    gatepass=gatepass,
-                    notification_type='warden_rejection',
-                    message=f"Your gatepass request has been rejected. Reason: {gatepass.warden_rejection_reason}"
+                result = transition(
+                    gatepass, 'warden_reject', request.user,
+                    warden_rejection_reason=form.cleaned_data['rejection_reason'],
+                )
+                if not result.applied:
+                    return _transition_conflict(request, gatepass, 'gatepass/warden_approve.html')
+                notify_many(
+                    [gatepass.student.user_id],
+                    gatepass,
+                    'warden_rejection',
+                    f"Your gatepass request has been rejected. Reason: {gatepass.warden_rejection_reason}"
                 )
                 messages.success(request, 'Gatepass rejected.')
             return redirect('warden_dashboard')
@@ -911,49 +877,103 @@ def warden_approve_gatepass(request, gatepass_id):
     })
 
 
+def _bulk_messages(request, outcome, verb):
+    counts = bulk.summarize(outcome)
+    if counts['applied']:
+        messages.success(request, f"{verb} {counts['applied']} gatepass(es).")
+    skipped = [
+        (count, text) for count, text in [
+            (counts['conflict'], 'already processed'),
+            (counts['forbidden'], 'not yours to process'),
+            (counts['not_found'], 'no longer exist'),
+        ] if count
+    ]
+    if skipped:
+        ids = ', '.join(f"#{row['id']}" for row in outcome if row['result'] != 'applied')
+        messages.warning(request, 'Skipped ' + ', '.join(f'{count} {text}' for count, text in skipped) + f' ({ids}).')
+
+
 @login_required
+def warden_bulk_decision(request):
+    """Approve or reject the pending requests selected on the warden dashboard"""
+    if request.user.role != 'warden':
+        messages.error(request, 'Access denied.')
+        return redirect('home')
+    if request.method != 'POST':
+        return redirect('warden_dashboard')
+
+    form = WardenBulkDecisionForm(request.POST)
+    if not form.is_valid():
+        for error in form.errors.values():
+            messages.error(request, error[0])
+        return redirect('warden_dashboard')
+
+    ids = form.cleaned_data['ids']
+    if form.cleaned_data['action'] == 'approve':
+        _bulk_messages(request, bulk.warden_approve(request.user, ids), 'Approved')
+    else:
+        _bulk_messages(request, bulk.warden_reject(request.user, ids, form.cleaned_data['rejection_reason']), 'Rejected')
+    return redirect('warden_dashboard')
+
+
+SECURITY_DASHBOARD_STATUSES = ['warden_approved', 'security_approved', 'returned']
+
+
+def _security_stats_query(request):
+    """The security dashboard's counters as ``(queryset, aggregates)``; also the page's version"""
+    mine = Q(security_approval=request.user, status='security_approved')
+    returned_by_me = Q(return_verified_by=request.user, status='returned')
+    return GatePass.objects.filter(status__in=SECURITY_DASHBOARD_STATUSES), {
+        'total_pending': Count('id', filter=Q(status='warden_approved')),
+        'total_approved': Count('id', filter=mine),
+        'total_returned': Count('id', filter=returned_by_me),
+        'last_total': Count('id'),
+        'last_change': Max('updated_at'),
+    }
+
+
+@per_request
+def _security_stats(request):
+    queryset, aggregates = _security_stats_query(request)
+    return queryset.aggregate(**aggregates)
+
+
+def _security_lists(request):
+    return {
+        # Approved gatepasses waiting for security approval
+        'approved_requests': GatePass.objects.filter(
+            status='warden_approved'
+        ).select_related('student', 'warden_approval').order_by('-created_at'),
+        # Security approved requests (students who have left but not returned)
+        'security_approved': GatePass.objects.filter(
+            status='security_approved',
+            security_approval=request.user
+        ).select_related('student').order_by('-created_at')[:10],
+        # Returned requests
+        'returned_requests': GatePass.objects.filter(
+            status='returned',
+            return_verified_by=request.user
+        ).select_related('student').order_by('-created_at')[:10],
+    }
+
+
+def _security_dashboard_version(request):
+    if request.user.role != 'security':
+        return None
+    return tuple(sorted(_security_stats(request).items()))
+
+
+@login_required
+@conditional_page(_security_dashboard_version)
 def security_dashboard(request):
     """Security dashboard"""
     if request.user.role != 'security':
         messages.error(request, 'Access denied.')
         return redirect('home')
     
-    # Check for overdue returns
-    check_overdue_returns()
-    
-    # Get approved gatepasses waiting for security approval
-    approved_requests = GatePass.objects.filter(
-        status='warden_approved'
-    ).order_by('-created_at')
-    
-    # Get security approved requests (students who have left but not returned)
-    security_approved = GatePass.objects.filter(
-        status='security_approved',
-        security_approval=request.user
-    ).order_by('-created_at')[:10]
-    
-    # Get returned requests
-    returned_requests = GatePass.objects.filter(
-        status='returned',
-        return_verified_by=request.user
-    ).order_by('-created_at')[:10]
-    
-    # Get statistics
-    total_pending = approved_requests.count()
-    total_approved = GatePass.objects.filter(security_approval=request.user, status='security_approved').count()
-    total_returned = GatePass.objects.filter(return_verified_by=request.user, status='returned').count()
-    
-    # Get recent notifications
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')[:5]
-    
     context = {
-        'approved_requests': approved_requests,
-        'security_approved': security_approved,
-        'returned_requests': returned_requests,
-        'total_pending': total_pending,
-        'total_approved': total_approved,
-        'total_returned': total_returned,
-        'notifications': notifications,
+        **_security_lists(request),
+        **_counters(_security_stats(request)),
     }
     return render(request, 'gatepass/security_dashboard.html', context)
 
@@ -973,16 +993,15 @@ def security_approve_gatepass(request, gatepass_id):
         return redirect('security_dashboard')
     
     if request.method == 'POST':
-        gatepass.status = 'security_approved'
-        gatepass.security_approval = request.user
-        gatepass.save()
+        if not transition(gatepass, 'security_approve', request.user).applied:
+            return _transition_conflict(request, gatepass, 'gatepass/security_approve.html')
         
         # Create notification for student
-        Notification.objects.create(
-            user=gatepass.student.user,
-            gatepass=gatepass,
-            notification_type='security_approval',
-            message="Your gatepass has been approved by security. You can now leave the campus."
+        notify_many(
+            [gatepass.student.user_id],
+            gatepass,
+            'security_approval',
+            "Your gatepass has been approved by security. You can now leave the campus."
         )
         
         messages.success(request, 'Gatepass approved by security!')
@@ -993,55 +1012,70 @@ def security_approve_gatepass(request, gatepass_id):
     })
 
 
+def _superadmin_stats_queries(request):
+    """The super admin dashboard's counters as ``(queryset, aggregates)`` per table; also the page's version"""
+    return [
+        (User.objects.all(), {
+            'total_students': Count('id', filter=Q(role='student')),
+            'total_wardens': Count('id', filter=Q(role='warden')),
+            'total_security': Count('id', filter=Q(role='security')),
+            'last_pending_users': Count('id', filter=Q(is_approved=False) & ~Q(role='superadmin')),
+            'last_user': Max('id'),
+        }),
+        (GatePass.objects.all(), {
+            'total_gatepasses': Count('id'),
+            'pending_gatepasses': Count('id', filter=Q(status='pending')),
+            'overdue_count': Count('id', filter=Q(status='security_approved', expected_return_date__lt=date.today())),
+            'last_change': Max('updated_at'),
+        }),
+        (Notification.objects.all(), {'last_notification_count': Count('id'), 'last_notification': Max('id')}),
+    ]
+
+
+@per_request
+def _superadmin_stats(request):
+    stats = {}
+    for queryset, aggregates in _superadmin_stats_queries(request):
+        stats.update(queryset.aggregate(**aggregates))
+    return stats
+
+
+def _superadmin_lists(request):
+    return {
+        # Pending user approvals
+        'pending_users': User.objects.filter(is_approved=False).exclude(role='superadmin'),
+        # Overdue returns
+        'overdue_returns': GatePass.objects.filter(
+            roster_entry__expected_return_date__lt=date.today()
+        ).select_related('student').order_by('roster_entry__expected_return_date'),
+        # All pending gatepass requests for superadmin approval
+        'pending_gatepass_approvals': GatePass.objects.filter(
+            status='pending'
+        ).select_related('student').order_by('-created_at'),
+        # Recent gatepass requests
+        'recent_gatepasses': GatePass.objects.select_related('student').order_by('-created_at')[:10],
+        # Recent notifications
+        'notifications': Notification.objects.order_by('-created_at')[:10],
+    }
+
+
+def _superadmin_dashboard_version(request):
+    if request.user.role != 'superadmin':
+        return None
+    return tuple(sorted(_superadmin_stats(request).items()))
+
+
 @login_required
+@conditional_page(_superadmin_dashboard_version)
 def superadmin_dashboard(request):
     """Super admin dashboard"""
     if request.user.role != 'superadmin':
         messages.error(request, 'Access denied.')
         return redirect('home')
     
-    # Check for overdue returns
-    check_overdue_returns()
-    
-    # Get pending user approvals
-    pending_users = User.objects.filter(is_approved=False).exclude(role='superadmin')
-    
-    # Get overdue returns
-    from datetime import date
-    overdue_returns = GatePass.objects.filter(
-        status='security_approved',
-        expected_return_date__lt=date.today()
-    ).order_by('expected_return_date')
-    
-    # Get all pending gatepass requests for superadmin approval
-    pending_gatepass_approvals = GatePass.objects.filter(status='pending').order_by('-created_at')
-    
-    # Get statistics
-    total_students = User.objects.filter(role='student').count()
-    total_wardens = User.objects.filter(role='warden').count()
-    total_security = User.objects.filter(role='security').count()
-    total_gatepasses = GatePass.objects.count()
-    pending_gatepasses = GatePass.objects.filter(status='pending').count()
-    overdue_count = overdue_returns.count()
-    
-    # Get recent gatepass requests
-    recent_gatepasses = GatePass.objects.order_by('-created_at')[:10]
-    
-    # Get recent notifications
-    notifications = Notification.objects.order_by('-created_at')[:10]
-    
     context = {
-        'pending_users': pending_users,
-        'overdue_returns': overdue_returns,
-        'pending_gatepass_approvals': pending_gatepass_approvals,
-        'total_students': total_students,
-        'total_wardens': total_wardens,
-        'total_security': total_security,
-        'total_gatepasses': total_gatepasses,
-        'pending_gatepasses': pending_gatepasses,
-        'overdue_count': overdue_count,
-        'recent_gatepasses': recent_gatepasses,
-        'notifications': notifications,
+        **_superadmin_lists(request),
+        **_counters(_superadmin_stats(request)),
     }
     return render(request, 'gatepass/superadmin_dashboard.html', context)
 
@@ -1055,7 +1089,7 @@ def approve_user(request, user_id):
     
     user = get_object_or_404(User, id=user_id)
     user.is_approved = True
-    user.save()
+    user.save(update_fields=['is_approved', 'updated_at'])
     
     messages.success(request, f'User {user.username} has been approved.')
     return redirect('superadmin_dashboard')
@@ -1069,7 +1103,8 @@ def reject_user(request, user_id):
         return redirect('home')
     
     user = get_object_or_404(User, id=user_id)
-    user.delete()
+    with transaction.atomic(), bulk_notification_deletes():
+        user.delete()
     
     messages.success(request, f'User {user.username} has been rejected and deleted.')
     return redirect('superadmin_dashboard')
@@ -1102,6 +1137,23 @@ def parent_verification(request, gatepass_id):
     })
 
 
+@login_required
+def security_bulk_approve(request):
+    """Approve the exits selected on the security dashboard"""
+    if request.user.role != 'security':
+        messages.error(request, 'Access denied.')
+        return redirect('home')
+    if request.method != 'POST':
+        return redirect('security_dashboard')
+
+    form = SecurityBulkApproveForm(request.POST)
+    if form.is_valid():
+        _bulk_messages(request, bulk.security_approve(request.user, form.cleaned_data['ids']), 'Approved the exit of')
+    else:
+        messages.error(request, form.errors['ids'][0])
+    return redirect('security_dashboard')
+
+
 @login_required
 def security_record_return(request, gatepass_id):
     """Security record student return"""
@@ -1129,18 +1181,21 @@ def security_record_return(request, gatepass_id):
                 return_hour += 12
             elif return_ampm == 'AM' and return_hour == 12:
                 return_hour = 0
-            gatepass.actual_return_time = time(return_hour, return_minute)
-
-            gatepass.status = 'returned'
-            gatepass.return_verified_by = request.user
-            gatepass.save()
+            result = transition(
+                gatepass, 'record_return', request.user,
+                actual_return_date=form.cleaned_data['actual_return_date'],
+                actual_return_time=time(return_hour, return_minute),
+                return_notes=form.cleaned_data['return_notes'],
+            )
+            if not result.applied:
+                return _transition_conflict(request, gatepass, 'gatepass/security_record_return.html')
             
             # Create notification for student
-            Notification.objects.create(
-                user=gatepass.student.user,
-                gatepass=gatepass,
-                notification_type='return_recorded',
-                message=f"Your return has been recorded on {gatepass.actual_return_date} at {gatepass.actual_return_time}"
+            notify_many(
+                [gatepass.student.user_id],
+                gatepass,
+                'return_recorded',
+                f"Your return has been recorded on {gatepass.actual_return_date} at {gatepass.actual_return_time}"
             )
             
             messages.success(request, f'Return recorded for {gatepass.student.student_name}')
@@ -1154,53 +1209,6 @@ def security_record_return(request, gatepass_id):
     })
 
 
-def check_overdue_returns():
-    """Check for overdue returns and create notifications"""
-    from django.utils import timezone
-    from datetime import datetime, date, time, time
-    
-    # Get all security approved gatepasses that haven't returned
-    overdue_gatepasses = GatePass.objects.filter(
-        status='security_approved',
-        expected_return_date__lt=date.today()
-    )
-    
-    for gatepass in overdue_gatepasses:
-        # Check if notification already exists for today
-        today = date.today()
-        if not Notification.objects.filter(
-            gatepass=gatepass,
-            notification_type='overdue_return',
-            created_at__date=today
-        ).exists():
-            # Create notification for warden
-            if gatepass.warden_approval:
-                Notification.objects.create(
-                    user=gatepass.warden_approval,
-                    gatepass=gatepass,
-                    notification_type='overdue_return',
-                    message=f"URGENT: Student {gatepass.student.student_name} has not returned after expected date {gatepass.expected_return_date}. Parent contact: {gatepass.student.parent_mobile}"
-                )
-            
-            # Create notification for superadmin
-            superadmin = User.objects.filter(role='superadmin').first()
-            if superadmin:
-                Notification.objects.create(
-                    user=superadmin,
-                    gatepass=gatepass,
-                    notification_type='overdue_return',
-                    message=f"URGENT: Student {gatepass.student.student_name} (Hall Ticket: {gatepass.student.hall_ticket_no}) has not returned after expected date {gatepass.expected_return_date}. Parent contact: {gatepass.student.parent_mobile}"
-                )
-            
-            # Create notification for student
-            Notification.objects.create(
-                user=gatepass.student.user,
-                gatepass=gatepass,
-                notification_type='overdue_return',
-                message=f"URGENT: You have not returned to the hostel after your expected return date {gatepass.expected_return_date}. Please contact the hostel immediately."
-            )
-
-
 @login_required
 def superadmin_approve_gatepass(request, gatepass_id):
     """Super admin approval for gatepass"""
@@ -1213,34 +1221,29 @@ def superadmin_approve_gatepass(request, gatepass_id):
     if request.method == 'POST':
         action = request.POST.get('action')
         if action == 'approve':
-            gatepass.status = 'warden_approved'
-            gatepass.warden_approval = request.user
-            gatepass.save()
+            if not transition(gatepass, 'warden_approve', request.user).applied:
+                return _transition_conflict(request, gatepass, 'gatepass/superadmin_approve_gatepass.html')
             
             # Create notification for security
-            security_users = User.objects.filter(role='security', is_approved=True)
-            for security in security_users:
-                Notification.objects.create(
-                    user=security,
-                    gatepass=gatepass,
-                    notification_type='gatepass_approved',
-                    message=f"Gatepass approved by Super Admin for {gatepass.student.student_name}"
-                )
+            notify_many(
+                security_recipients(),
+                gatepass,
+                'gatepass_approved',
+                f"Gatepass approved by Super Admin for {gatepass.student.student_name}"
+            )
             
             messages.success(request, f'Gatepass approved for {gatepass.student.student_name}')
         elif action == 'reject':
             reason = request.POST.get('rejection_reason', '')
-            gatepass.status = 'warden_rejected'
-            gatepass.warden_approval = request.user
-            gatepass.warden_rejection_reason = reason
-            gatepass.save()
+            if not transition(gatepass, 'warden_reject', request.user, warden_rejection_reason=reason).applied:
+                return _transition_conflict(request, gatepass, 'gatepass/superadmin_approve_gatepass.html')
             
             # Create notification for student
-            Notification.objects.create(
-                user=gatepass.student.user,
-                gatepass=gatepass,
-                notification_type='gatepass_rejected',
-                message=f"Your gatepass request has been rejected by Super Admin. Reason: {reason}"
+            notify_many(
+                [gatepass.student.user_id],
+                gatepass,
+                'gatepass_rejected',
+                f"Your gatepass request has been rejected by Super Admin. Reason: {reason}"
             )
             
             messages.success(request, f'Gatepass rejected for {gatepass.student.student_name}')
@@ -1252,6 +1255,31 @@ def superadmin_approve_gatepass(request, gatepass_id):
     })
 
 
+def _authenticated_user(request):
+    # Resolves the lazy request.user (a session lookup) outside the event loop
+    user = request.user
+    return user if user.is_authenticated else None
+
+
+async def event_stream(request):
+    """
+    Live updates for the logged-in user as Server-Sent Events (see ``gatepass.events``).
+
+    Only served under ASGI. A WSGI worker would be held for the whole stream,
+    so there the response is 204, which tells ``EventSource`` not to reconnect.
+    """
+    user = await sync_to_async(_authenticated_user)(request)
+    if user is None:
+        return HttpResponse(status=401)
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(sse_stream(subscriptions_for(user)), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @login_required
 def warden_debug(request):
     """Debug information for warden dashboard"""
@@ -1260,7 +1288,7 @@ def warden_debug(request):
         return redirect('home')
     
     # Get all gatepass requests
-    all_requests = GatePass.objects.all().order_by('-created_at')
+    all_requests = GatePass.objects.select_related('student__user', 'warden_approval').order_by('-created_at')
     
     # Apply gender filter if warden has gender set
     # CRITICAL: Only show requests from students with matching gender
@@ -1296,14 +1324,44 @@ def debug_info(request):
         messages.error(request, 'Access denied.')
         return redirect('home')
     
-    # Check for overdue returns
-    check_overdue_returns()
-    
     context = {
-        'students': Student.objects.all(),
+        'students': Student.objects.select_related('user'),
         'wardens': User.objects.filter(role='warden'),
         'security': User.objects.filter(role='security'),
-        'gatepasses': GatePass.objects.all(),
-        'notifications': Notification.objects.all(),
+        'gatepasses': GatePass.objects.select_related(
+            'student__user', 'warden_approval', 'security_approval', 'return_verified_by'
+        ),
+        'notifications': Notification.objects.select_related('user', 'gatepass__student'),
     }
-    return render(request, 'gatepass/debug_info.html', context)
\ No newline at end of file
+    return render(request, 'gatepass/debug_info.html', context)
+
+
+@login_required
+def superadmin_performance(request):
+    """
+    Per-view request statistics from ``gatepass.perf``.
+    ?format=json returns them as JSON.
+    """
+    if request.user.role != 'superadmin':
+        messages.error(request, 'Access denied.')
+        return redirect('home')
+
+    views = perf.view_stats()
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'sample_rate': settings.PERF_SAMPLE_RATE, 'views': views})
+    return render(request, 'gatepass/superadmin_performance.html', {
+        'views': views,
+        'sample_rate': settings.PERF_SAMPLE_RATE,
+    })
+
+
+def metrics_endpoint(request):
+    """
+    Prometheus metrics from ``gatepass.metrics``, for scrapers sending
+    ``Authorization: Bearer <METRICS_TOKEN>`` and for super admins.
+    """
+    authorization = request.headers.get('Authorization', '')
+    scraper = bool(settings.METRICS_TOKEN) and constant_time_compare(authorization, f'Bearer {settings.METRICS_TOKEN}')
+    if not scraper and getattr(request.user, 'role', None) != 'superadmin':
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
@@ -3,14 +3,58 @@ ASGI config for hostel_gatepass project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server (e.g. ``uvicorn hostel_gatepass.asgi:application``)
+to enable the live-update stream at ``/events/`` (``gatepass.events``); under
+WSGI that endpoint answers 204 and dashboards are refreshed by hand.
+
+Pages are the sync views by default, as under WSGI. Set ``ASYNC_VIEWS=True``
+to serve the dashboards and approval APIs with the async views of
+``gatepass.async_views`` instead. In production run several workers under
+gunicorn::
+
+    gunicorn hostel_gatepass.asgi:application -k uvicorn.workers.UvicornWorker
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
+import asyncio
 import os
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hostel_gatepass.settings')
 
-application = get_asgi_application()
+
+class RequestLimit:
+    """
+    Let at most ``limit`` HTTP requests into the application at once; the
+    others wait in the event loop.
+
+    Django runs every request in a thread of its own, with its own database
+    connection. Unbounded, hundreds of concurrent requests in one process
+    keep the thread that holds a database lock waiting for the GIL, and on
+    SQLite the other writers give up with "database is locked". Paths in
+    ``unlimited`` (the event streams, open for minutes) are let through.
+    """
+
+    def __init__(self, app, limit, unlimited=()):
+        self.app = app
+        self.unlimited = frozenset(unlimited)
+        self.slots = asyncio.Semaphore(limit)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] in self.unlimited:
+            return await self.app(scope, receive, send)
+        async with self.slots:
+            return await self.app(scope, receive, send)
+
+
+def _application():
+    from django.conf import settings
+    from django.urls import reverse
+
+    return RequestLimit(get_asgi_application(), settings.ASGI_MAX_REQUESTS, unlimited=[reverse('event_stream')])
+
+
+application = _application()
@@ -65,6 +65,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'gatepass.perf.PerformanceMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -72,15 +73,25 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'gatepass.profiles.ProfileMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'hostel_gatepass.urls'
+# Serve the dashboards and approval APIs with the async views of
+# gatepass.async_views. Opt-in, for the ASGI deployment (hostel_gatepass.asgi)
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'False').lower() == 'true'
+ROOT_URLCONF = 'hostel_gatepass.urls_asgi' if ASYNC_VIEWS else 'hostel_gatepass.urls'
+
+# Requests an ASGI worker process handles at once (hostel_gatepass.asgi); the
+# rest wait without a thread or a database connection. /events/ streams are
+# not counted
+ASGI_MAX_REQUESTS = int(os.environ.get('ASGI_MAX_REQUESTS', '4'))
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django's backend, timing renders for gatepass.perf
+        'BACKEND': 'gatepass.perf.DjangoTemplates',
         'DIRS': [BASE_DIR / 'gatepass' / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -118,6 +129,99 @@ else:
     }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Local memory by default (per process). Set CACHE_DIR to share a file cache
+# between gunicorn workers on one host, or REDIS_URL to share it across hosts
+# (needs the `redis` package).
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ["REDIS_URL"],
+        }
+    }
+elif os.environ.get("CACHE_DIR"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ["CACHE_DIR"],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Sessions are read through the cache when it is shared between workers. A
+# per-process cache would keep serving a session another worker has ended.
+if os.environ.get("REDIS_URL") or os.environ.get("CACHE_DIR"):
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Seconds a user's cached Student/Warden/Security profile may be served
+# (gatepass.profiles); saves drop it from the cache earlier
+PROFILE_CACHE_TIMEOUT = int(os.environ.get("PROFILE_CACHE_TIMEOUT", "300"))
+
+# Seconds a user's cached notification feed may be served before re-querying.
+# Changes drop it only from the cache they run against, so it is off (0)
+# unless the workers share one
+NOTIFICATION_FEED_TIMEOUT = int(os.environ.get(
+    "NOTIFICATION_FEED_TIMEOUT",
+    "300" if os.environ.get("REDIS_URL") or os.environ.get("CACHE_DIR") else "0",
+))
+
+# Where the run_export_jobs worker writes background export files
+EXPORT_ROOT = Path(os.environ.get("EXPORT_ROOT", BASE_DIR / "exports"))
+
+# Carries live-update events to /events/ streams. The in-process broker only
+# reaches streams served by the same process; with several workers use
+# gatepass.events.RedisBroker (needs the `redis` package).
+EVENT_BROKER = os.environ.get(
+    "EVENT_BROKER",
+    "gatepass.events.RedisBroker" if os.environ.get("REDIS_URL") else "gatepass.events.InProcessBroker",
+)
+EVENT_BROKER_URL = os.environ.get("EVENT_BROKER_URL", os.environ.get("REDIS_URL", ""))
+
+# Per-request instrumentation (gatepass.perf): the share of requests whose
+# queries, template time and size are measured, and when a measured request
+# is logged as a warning (slow, or the same statement this many times)
+PERF_SAMPLE_RATE = float(os.environ.get("PERF_SAMPLE_RATE", "0.05"))
+PERF_SLOW_MS = float(os.environ.get("PERF_SLOW_MS", "1000"))
+PERF_SIMILAR_QUERIES = int(os.environ.get("PERF_SIMILAR_QUERIES", "10"))
+
+# Measured requests are logged as JSON lines on gatepass.perf; set
+# PERF_LOG_LEVEL=INFO to log all of them, not only the flagged ones
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'gatepass.perf': {
+            'handlers': ['console'],
+            'level': os.environ.get("PERF_LOG_LEVEL", "WARNING"),
+            'propagate': False,
+        },
+    },
+}
+
+# Prometheus metrics at /metrics (gatepass.metrics). With several worker
+# processes set METRICS_DIR to a directory they all share (emptied on each
+# deploy). Scrapers authenticate with "Authorization: Bearer <METRICS_TOKEN>";
+# without a token only a logged-in super admin can read the page. The pass
+# counts are recounted at most every METRICS_GAUGE_INTERVAL seconds.
+METRICS_DIR = os.environ.get("METRICS_DIR", "")
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+METRICS_GAUGE_INTERVAL = int(os.environ.get("METRICS_GAUGE_INTERVAL", "30"))
+
+# Part of dashboard ETags, so pages cached by browsers are re-rendered after a deploy
+DEPLOY_VERSION = os.environ.get("DEPLOY_VERSION") or os.environ.get("RENDER_GIT_COMMIT", "")
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
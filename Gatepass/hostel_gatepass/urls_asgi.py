@@ -0,0 +1,14 @@
+"""
+URL configuration with the async views, for the ASGI deployment.
+
+Same as ``hostel_gatepass.urls`` except that the dashboards and approval APIs
+are the async views of ``gatepass.async_views``. Selected by ``ASYNC_VIEWS``
+(off by default).
+"""
+from django.contrib import admin
+from django.urls import path, include
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path('', include('gatepass.urls_async')),
+]